@@ -1,11 +1,13 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.core.config import settings
+from app.core.security import is_admin_token
 from app.db.database import get_db
 from app.db import models
+from app.services.admission import admission_controller, AdmissionRejected
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
@@ -32,3 +34,23 @@ async def get_current_user(
         return user.username
     except JWTError:
         raise credentials_exception
+
+
+async def require_admin(x_admin_token: str = Header(None)) -> None:
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+
+async def enforce_admission(current_user: str, endpoint_class: str):
+    """Charge ``current_user``'s bucket for an LLM call; for handlers that only sometimes reach the LLM."""
+    try:
+        await admission_controller.admit(current_user, endpoint_class)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)}
+        )
+
+def admission_control(endpoint_class: str, user_dependency=get_current_user):
+    """Rate limit and load-shed an LLM-backed route; pass the user dependency the route itself uses."""
+    async def _admit(current_user: str = Depends(user_dependency)):
+        await enforce_admission(current_user, endpoint_class)
+    return _admit
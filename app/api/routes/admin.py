@@ -0,0 +1,49 @@
+# book_manager/app/api/routes/admin.py
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from app.api.dependencies import require_admin
+from app.core.profiling import profile_store
+from app.core.timing import stage_timings
+from app.services.catalog_cache import catalog_cache
+from app.services.llm_pool import llm_pool
+from app.services.llm_scheduler import llm_scheduler
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/llm/scheduler")
+async def get_llm_scheduler_metrics():
+    return llm_scheduler.metrics()
+
+@router.get("/llm/pool")
+async def get_llm_pool_metrics():
+    return llm_pool.metrics()
+
+@router.get("/catalog-cache")
+async def get_catalog_cache_metrics():
+    return catalog_cache.metrics()
+
+@router.get("/timings")
+async def get_stage_timings():
+    return stage_timings.snapshot()
+
+@router.get("/profiles")
+async def list_profiles():
+    return await to_thread.run_sync(profile_store.list)
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    format: str = Query("prof", pattern="^(prof|text)$"),
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|calls)$"),
+):
+    """``prof`` is the raw pstats file (snakeviz, ``python -m pstats``); ``text`` is the top of the report."""
+    if format == "text":
+        report = await to_thread.run_sync(profile_store.text_report, profile_id, sort)
+        if report is None:
+            raise HTTPException(status_code=404, detail="Profile not found")
+        return PlainTextResponse(report)
+    path = profile_store.stats_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
@@ -1,71 +1,202 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, BackgroundTasks, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from app.db.database import SessionLocal
 from app.db import models
 from app.schemas.book import BookOut
 from app.core.security import get_current_user
+from app.api.dependencies import admission_control, enforce_admission
+from app.services.admission import INTERACTIVE, UPLOAD
+from app.core.config import settings
+from app.core.serialization import RowSerializer
+from app.core.timing import StageTimer
+from app.core.etag import (
+    book_etag, catalog_etag, summary_etag, cache_headers, etag_matches, has_conditional_header, not_modified
+)
 import os
+import json
+import asyncio
+import functools
+from typing import Awaitable, Callable
 from app.services.ai_summary import generate_summary
-
-# LangChain imports
-from langchain.document_loaders import PyMuPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.chains.summarize import load_summarize_chain
-from langchain_ollama import ChatOllama
-from app.core.prompt_templates import SUMMARY_PROMPT_TEMPLATE
+from app.services.summary_progress import summary_progress, SummaryProgress, TERMINAL_STATUSES
+from app.services.llm import ensure_ai_enabled
+from app.services import summarizer, book_text, chunk_summaries
+from app.services.book_text import StoredText
+from app.services.catalog_cache import (
+    CachedList, LIST_CHANGED, book_changed, catalog_cache, commit_with_invalidation
+)
 import tempfile
-from anyio import to_thread
+from anyio import to_thread, from_thread
+
+MAX_STATUS_WAIT_SECONDS = 60
+STATUS_DB_RECHECK_SECONDS = 2
 
 router = APIRouter()
 
+book_serializer = RowSerializer(BookOut)
+
 async def get_db():
     async with SessionLocal() as session:
         yield session
 
-def choose_summary_chain(llm, docs):
-    # Choose refine if many long documents, else use map_reduce
-    avg_length = sum(len(doc.page_content) for doc in docs) / len(docs)
-    if len(docs) > 20 or avg_length > 1000:
-        return load_summarize_chain(llm, chain_type="refine")
+async def set_summary_status(book_id: int, status: models.SummaryStatus, summary: str = None):
+    async with SessionLocal() as db:
+        result = await db.execute(select(models.Book).where(models.Book.id == book_id))
+        book = result.scalar_one_or_none()
+        if book:
+            book.summary_status = status.value
+            changes = []
+            if summary is not None:
+                book.summary = summary
+                book.version = models.Book.version + 1
+                changes.append(book_changed(book_id))
+            db.add(book)
+            await commit_with_invalidation(db, *changes)
+            await db.refresh(book)
+
+async def summarize_stored_text(book_id: int, stored: StoredText, quick: bool, timer: StageTimer):
+    """The cleaning, LLM and saving stages, run from text already extracted from the PDF."""
+    pages = summarizer.select_pages(stored.pages, quick)
+    chunker = summarizer.chunker_for(pages)
+    tokens_removed = 0
+    if stored.chunks and stored.chunker == chunker:
+        docs = await to_thread.run_sync(summarizer.documents_from_texts, stored.chunks)
     else:
-        return load_summarize_chain(llm, chain_type="map_reduce")
+        summary_progress.update(book_id, stage="cleaning")
+        with timer.stage("cleaning"):
+            docs, cleanup = await to_thread.run_sync(summarizer.prepare_documents, pages)
+        tokens_removed = cleanup.tokens_removed
+        print(
+            f"Book {book_id}: removed {cleanup.lines_removed} boilerplate lines and "
+            f"{cleanup.chunks_removed} duplicate chunks (~{cleanup.tokens_removed} of {cleanup.tokens_before} tokens)"
+        )
+        with timer.stage("store_chunks"):
+            async with SessionLocal() as db:
+                await book_text.save_chunks(db, book_id, [doc.page_content for doc in docs], chunker)
+    if settings.SUMMARY_CHUNK_REUSE:
+        summary = await summarize_incrementally(book_id, [doc.page_content for doc in docs], tokens_removed, timer)
+    else:
+        summary = await summarize_with_chain(book_id, docs, tokens_removed, timer)
 
-async def generate_and_update_summary(book_id: int, file_path: str, quick: bool):
-    loader = PyMuPDFLoader(file_path)
-    pages = loader.load()
+    summary_progress.update(book_id, stage="saving")
+    with timer.stage("saving"):
+        await set_summary_status(book_id, models.SummaryStatus.COMPLETED, summary=summary)
+        async with SessionLocal() as db:
+            await book_text.mark_summarized(db, book_id, summarizer.current_summary_fingerprint(chunker))
+    summary_progress.update(book_id, status=models.SummaryStatus.COMPLETED.value, stage="done")
 
-    if quick:
-        pages = pages[:10]
+async def summarize_with_chain(book_id: int, docs, tokens_removed: int, timer: StageTimer) -> str:
+    chain_type = summarizer.choose_summary_chain_type(docs)
+    timer.context.update(chunks=len(docs), chain_type=chain_type)
 
-    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=150)
-    docs = splitter.split_documents(pages)
+    summary_progress.update(
+        book_id,
+        stage="summarizing",
+        chunks_done=0,
+        chunks_total=summarizer.expected_llm_calls(chain_type, docs),
+        tokens_removed=tokens_removed,
+    )
 
-    llm = ChatOllama(model="llama3", base_url="http://host.docker.internal:11434")
+    def report_call_done(calls_done: int):
+        from_thread.run_sync(functools.partial(summary_progress.update, book_id, chunks_done=calls_done))
 
-    prompt_template = SUMMARY_PROMPT_TEMPLATE
+    with timer.stage("summarizing"):
+        return await to_thread.run_sync(summarizer.summarize_documents, docs, chain_type, report_call_done)
 
-    chain = choose_summary_chain(llm, docs)
-    chain.llm_chain.prompt = prompt_template
+async def summarize_incrementally(book_id: int, texts: list[str], tokens_removed: int, timer: StageTimer) -> str:
+    """Map-reduce that only sends chunks without a stored summary to the LLM.
 
-    def summarize_blocking():
-        res = chain.invoke(docs)
-        return res["output_text"] if isinstance(res, dict) else res
+    Chunk summaries are looked up by content hash, so a revised edition pays for its
+    changed chunks plus the reduce calls instead of the whole book.
+    """
+    fingerprint = summarizer.current_partial_fingerprint()
+    with timer.stage("load_partials"):
+        async with SessionLocal() as db:
+            plan = await chunk_summaries.plan_chunks(db, texts, fingerprint)
+    map_calls = len(plan.to_map)
+    timer.context.update(chunks=len(texts), chunks_mapped=map_calls, chain_type="incremental_map_reduce")
+    print(f"Book {book_id}: summarizing {map_calls} of {len(texts)} chunks, reusing stored summaries for the rest")
 
-    summary = await to_thread.run_sync(summarize_blocking)
+    # the reduce call count is only known round by round, so the total grows as rounds start
+    summary_progress.update(
+        book_id, stage="summarizing", chunks_done=0, chunks_total=map_calls + 1, tokens_removed=tokens_removed
+    )
+    reduce_calls = 0
 
-    async with SessionLocal() as db:
-        result = await db.execute(select(models.Book).where(models.Book.id == book_id))
-        book = result.scalar_one_or_none()
-        if book:
-            book.summary = summary
-            db.add(book)
-            await db.commit()
-            await db.refresh(book)
+    def report_map_call(calls_done: int):
+        from_thread.run_sync(functools.partial(summary_progress.update, book_id, chunks_done=calls_done))
+
+    def report_reduce_round(calls: int):
+        nonlocal reduce_calls
+        reduce_calls += calls
+        from_thread.run_sync(functools.partial(summary_progress.update, book_id, chunks_total=map_calls + reduce_calls))
+
+    def report_reduce_call(calls_done: int):
+        from_thread.run_sync(functools.partial(summary_progress.update, book_id, chunks_done=map_calls + calls_done))
+
+    with timer.stage("map"):
+        summaries = await to_thread.run_sync(summarizer.map_chunks, [texts[i] for i in plan.to_map], report_map_call)
+    mapped = {plan.hashes[index]: summary for index, summary in zip(plan.to_map, summaries)}
+    with timer.stage("store_partials"):
+        async with SessionLocal() as db:
+            await chunk_summaries.save_partials(db, mapped, fingerprint)
+    with timer.stage("reduce"):
+        return await to_thread.run_sync(
+            summarizer.reduce_partials, plan.partials(mapped), report_reduce_round, report_reduce_call
+        )
+
+async def run_summary_job(book_id: int, load_text: Callable[[StageTimer], Awaitable[StoredText]], quick: bool):
+    timer = StageTimer("summary", book_id=book_id, quick=quick)
+    try:
+        summary_progress.update(
+            book_id, status=models.SummaryStatus.PROCESSING.value, stage="loading", chunks_done=0, error=None
+        )
+        with timer.stage("status"):
+            await set_summary_status(book_id, models.SummaryStatus.PROCESSING)
+        await summarize_stored_text(book_id, await load_text(timer), quick, timer)
+        timer.finish()
+    except Exception as e:
+        summary_progress.update(book_id, status=models.SummaryStatus.FAILED.value, stage="failed", error=str(e))
+        await set_summary_status(book_id, models.SummaryStatus.FAILED)
+        timer.finish("failed")
+        raise
+
+async def generate_and_update_summary(book_id: int, file_path: str, quick: bool):
+    async def extract_text(timer: StageTimer) -> StoredText:
+        # every page is kept, so a quick summary can later be redone in full without the PDF
+        with timer.stage("pdf_parsing"):
+            pages = await to_thread.run_sync(summarizer.extract_page_texts, file_path)
+        with timer.stage("store_text"):
+            async with SessionLocal() as db:
+                await book_text.save_pages(db, book_id, pages)
+        return StoredText(pages=pages)
+
+    try:
+        await run_summary_job(book_id, extract_text, quick)
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+async def resummarize_book(book_id: int, quick: bool = False):
+    async def stored_text(timer: StageTimer) -> StoredText:
+        with timer.stage("load_text"):
+            async with SessionLocal() as db:
+                stored = await book_text.load_book_text(db, book_id)
+        if stored is None:
+            raise ValueError(f"No stored text for book {book_id}")
+        return stored
 
-    os.remove(file_path)
+    await run_summary_job(book_id, stored_text, quick)
 
-@router.post("/", response_model=BookOut)
+# ensure_ai_enabled comes first, so a worker with AI disabled answers 503 without charging the upload bucket
+@router.post(
+    "/",
+    response_model=BookOut,
+    dependencies=[Depends(ensure_ai_enabled), Depends(admission_control(UPLOAD, get_current_user))],
+)
 async def add_book(
     background_tasks: BackgroundTasks,
     title: str = Form(...),
@@ -87,44 +218,242 @@ async def add_book(
         author=author,
         genre=genre,
         year_published=year_published,
-        summary="Generating..."
+        summary="Generating...",
+        summary_status=models.SummaryStatus.PENDING.value
     )
     db.add(db_book)
-    await db.commit()
+    await commit_with_invalidation(db, LIST_CHANGED)
     await db.refresh(db_book)
 
+    summary_progress.update(db_book.id, status=models.SummaryStatus.PENDING.value, stage="queued")
     background_tasks.add_task(generate_and_update_summary, db_book.id, tmp_path, quick)
 
     return db_book
 
+async def load_catalog(db: AsyncSession) -> CachedList:
+    result = await db.execute(select(*book_serializer.columns(models.Book), models.Book.version))
+    rows = result.all()
+    etag = catalog_etag(len(rows), max((row.id for row in rows), default=0), sum(row.version or 0 for row in rows))
+    return CachedList(body=book_serializer.dumps(rows), etag=etag, rows=len(rows))
+
+async def load_book_row(db: AsyncSession, book_id: int):
+    columns = [*book_serializer.columns(models.Book), models.Book.version, models.Book.review_version]
+    result = await db.execute(select(*columns).where(models.Book.id == book_id))
+    row = result.one_or_none()
+    return dict(row._mapping) if row is not None else None
+
 @router.get("/", response_model=list[BookOut])
-async def get_all_books(db: AsyncSession = Depends(get_db),current_user: str = Depends(get_current_user)):
+async def get_all_books(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    if catalog_cache.enabled:
+        catalog = await catalog_cache.get_list(functools.partial(load_catalog, db))
+        if etag_matches(request, catalog.etag):
+            return not_modified(catalog.etag)
+        return Response(content=catalog.body, media_type="application/json", headers=cache_headers(catalog.etag))
+
+    if has_conditional_header(request):
+        result = await db.execute(
+            select(func.count(models.Book.id), func.max(models.Book.id), func.sum(models.Book.version))
+        )
+        etag = catalog_etag(*result.one())
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+    if settings.FAST_JSON_LISTS:
+        catalog = await load_catalog(db)
+        return Response(content=catalog.body, media_type="application/json", headers=cache_headers(catalog.etag))
+
     result = await db.execute(select(models.Book))
-    return result.scalars().all()
+    books = result.scalars().all()
+    etag = catalog_etag(len(books), max((b.id for b in books), default=0), sum(b.version or 0 for b in books))
+    response.headers.update(cache_headers(etag))
+    return books
 
 @router.get("/{book_id}", response_model=BookOut)
-async def get_book(book_id: int, db: AsyncSession = Depends(get_db),current_user: str = Depends(get_current_user)):
+async def get_book(
+    book_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    if catalog_cache.enabled:
+        row = await catalog_cache.get_book(book_id, functools.partial(load_book_row, db, book_id))
+        if row is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+        etag = book_etag(book_id, row["version"])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers.update(cache_headers(etag))
+        return row
+
+    if has_conditional_header(request):
+        result = await db.execute(select(models.Book.version).where(models.Book.id == book_id))
+        version = result.scalar_one_or_none()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+        etag = book_etag(book_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
     result = await db.execute(select(models.Book).where(models.Book.id == book_id))
     book = result.scalar_one_or_none()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
+    response.headers.update(cache_headers(book_etag(book.id, book.version)))
     return book
 
-@router.get("/{book_id}/summary/status")
-async def get_summary_status(book_id: int, db: AsyncSession = Depends(get_db), current_user: str = Depends(get_current_user)):
+def progress_from_book(book) -> SummaryProgress:
+    status = book.summary_status
+    if status not in {s.value for s in models.SummaryStatus}:
+        # rows written before summary_status existed only carry the sentinel text
+        ready = book.summary and book.summary.strip().lower() != "generating..."
+        status = models.SummaryStatus.COMPLETED.value if ready else models.SummaryStatus.PENDING.value
+    return SummaryProgress(book_id=book.id, status=status, stage="done" if status in TERMINAL_STATUSES else "queued")
+
+async def load_summary_progress(db: AsyncSession, book_id: int) -> SummaryProgress:
+    state = summary_progress.get(book_id)
+    if state is not None:
+        return state
     result = await db.execute(select(models.Book).where(models.Book.id == book_id))
     book = result.scalar_one_or_none()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
-    is_ready = book.summary and book.summary.strip().lower() != "generating..."
-    return {"book_id": book.id, "summary_ready": is_ready}
+    return progress_from_book(book)
+
+async def wait_for_summary_progress(db: AsyncSession, book_id: int, since: int, wait: float) -> SummaryProgress:
+    """Long-poll: return as soon as the state moves past ``since`` or ``wait`` expires.
+
+    Jobs owned by this worker wake the waiter directly. Jobs running in another
+    worker are only visible in the database, so those are re-checked periodically.
+    """
+    state = await load_summary_progress(db, book_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while not state.finished and state.version <= since:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        if summary_progress.get(book_id) is not None:
+            tracked = await summary_progress.wait_for_change(book_id, since, remaining)
+            if tracked is None:
+                # evicted from the tracker while waiting; the database still has the status
+                db.expire_all()
+                tracked = await load_summary_progress(db, book_id)
+            state = tracked
+        else:
+            await asyncio.sleep(min(STATUS_DB_RECHECK_SECONDS, remaining))
+            db.expire_all()
+            state = await load_summary_progress(db, book_id)
+            if state.finished:
+                break
+    return state
+
+@router.get("/{book_id}/summary/status")
+async def get_summary_status(
+    book_id: int,
+    wait: float = Query(0, ge=0, le=MAX_STATUS_WAIT_SECONDS),
+    since: int = Query(-1),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    if wait:
+        state = await wait_for_summary_progress(db, book_id, since, wait)
+    else:
+        state = await load_summary_progress(db, book_id)
+    return state.as_dict()
+
+@router.get("/{book_id}/summary/events")
+async def stream_summary_events(book_id: int, db: AsyncSession = Depends(get_db), current_user: str = Depends(get_current_user)):
+    initial = await load_summary_progress(db, book_id)
+
+    def sse(state: SummaryProgress) -> str:
+        event = state.status if state.finished else "progress"
+        return f"event: {event}\ndata: {json.dumps(state.as_dict())}\n\n"
+
+    async def event_stream():
+        yield sse(initial)
+        if initial.finished:
+            return
+        async for state in summary_progress.subscribe(book_id):
+            if state is None:
+                yield ": keep-alive\n\n"
+                if summary_progress.get(book_id) is None:
+                    # job is owned by another worker; fall back to the stored status
+                    async with SessionLocal() as session:
+                        latest = await load_summary_progress(session, book_id)
+                    if latest.finished:
+                        yield sse(latest)
+                        return
+                continue
+            yield sse(state)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @router.get("/{book_id}/summary")
-async def get_summary(book_id: int, db: AsyncSession = Depends(get_db),current_user: str = Depends(get_current_user)):
+async def get_summary(
+    book_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    # The generated text only depends on the stored title/summary, so an unchanged
+    # row version lets us skip the LLM round trip entirely.
+    if has_conditional_header(request):
+        result = await db.execute(select(models.Book.version).where(models.Book.id == book_id))
+        version = result.scalar_one_or_none()
+        if version is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+        etag = summary_etag(book_id, version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
     result = await db.execute(select(models.Book).where(models.Book.id == book_id))
     book = result.scalar_one_or_none()
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
+    # charged only here: revalidations and missing books never reach the LLM
+    await enforce_admission(current_user, INTERACTIVE)
     prompt = f"Summarize the following book content:\n\nTitle: {book.title}\n\nSummary: {book.summary}"
     ai_summary = await generate_summary(prompt)
-    return {"generated_summary": ai_summary}
\ No newline at end of file
+    response.headers.update(cache_headers(summary_etag(book.id, book.version)))
+    return {"generated_summary": ai_summary}
+
+@router.post(
+    "/{book_id}/summary/regenerate",
+    status_code=202,
+    dependencies=[Depends(ensure_ai_enabled), Depends(admission_control(UPLOAD, get_current_user))],
+)
+async def regenerate_summary(
+    book_id: int,
+    background_tasks: BackgroundTasks,
+    quick: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Re-run the summary from the text stored at upload; the current summary is served until it finishes."""
+    result = await db.execute(select(models.Book).where(models.Book.id == book_id))
+    book = result.scalar_one_or_none()
+    if not book:
+        raise HTTPException(status_code=404, detail="Book not found")
+    state = summary_progress.get(book_id)
+    if book.summary_status == models.SummaryStatus.PROCESSING.value or (state is not None and not state.finished):
+        raise HTTPException(status_code=409, detail="A summary is already being generated for this book")
+    result = await db.execute(select(models.BookText.book_id).where(models.BookText.book_id == book_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=409, detail="No stored text for this book; upload the PDF again")
+
+    book.summary_status = models.SummaryStatus.PENDING.value
+    db.add(book)
+    await db.commit()
+
+    state = summary_progress.update(
+        book_id, status=models.SummaryStatus.PENDING.value, stage="queued", chunks_done=0, chunks_total=0, error=None
+    )
+    background_tasks.add_task(resummarize_book, book_id, quick)
+    return state.as_dict()
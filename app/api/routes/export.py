@@ -0,0 +1,36 @@
+# book_manager/app/api/routes/export.py
+from datetime import datetime
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+
+from app.api.dependencies import require_admin
+from app.db.database import SessionLocal
+from app.services.export import FORMATS, ExportFilters, export_bytes
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/{kind}")
+async def export(
+    kind: Literal["books", "reviews"],
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+    genre: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    updated_since: Optional[datetime] = None,
+    after_id: int = Query(0, ge=0, description="resume after the last id already received"),
+):
+    filters = ExportFilters(genre, year_from, year_to, updated_since, after_id)
+
+    async def body():
+        # the session lives as long as the stream, not the request handler
+        async with SessionLocal() as db:
+            async for chunk in export_bytes(db, kind, format, filters, gzip=gzip):
+                yield chunk
+
+    filename = f"{kind}.{format}" + (".gz" if gzip else "")
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    media_type = "application/gzip" if gzip else FORMATS[format]
+    return StreamingResponse(body(), media_type=media_type, headers=headers)
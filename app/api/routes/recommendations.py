@@ -4,14 +4,22 @@ from sqlalchemy.future import select
 from app.db.database import get_db, SessionLocal
 from app.db import models
 from app.schemas import recommendations
-from langchain_ollama import ChatOllama
-from langchain.prompts import PromptTemplate
 from anyio import to_thread
-from app.api.dependencies import get_current_user
-from app.core.prompt_templates import RECOMMENDATION_PROMPT
+from app.api.dependencies import get_current_user, enforce_admission
+from app.services.admission import INTERACTIVE
+from app.core.config import settings
+from app.core.timing import StageTimer
+from app.core.prompt_templates import RECOMMENDATION_PROMPT_TEXT
+from app.services.llm import get_chat_model, message_text, DEFAULT_MODEL
+from app.services.llm_cache import llm_cache
+from app.services.llm_scheduler import llm_scheduler, Priority
+from app.services.recommendation_blurbs import BlurbStore, blurb_key
+from app.services import recommender
 
 router = APIRouter()
 
+blurbs = BlurbStore(ttl=settings.RECOMMENDATION_BLURB_TTL)
+
 @router.post("/preferences")
 async def save_preferences(preferences: recommendations.UserPreferences, db: AsyncSession = Depends(get_db), current_user: str = Depends(get_current_user)):
     # Overwrite or create user preference
@@ -32,64 +40,94 @@ async def save_preferences(preferences: recommendations.UserPreferences, db: Asy
 
 @router.get("/recommendations")
 async def get_recommendations(db: AsyncSession = Depends(get_db), current_user: str = Depends(get_current_user)):
-    result = await db.execute(select(models.User).where(models.User.username == current_user))
-    pref = result.scalar_one_or_none()
+    timer = StageTimer("recommendations")
+    try:
+        return await recommend(db, current_user, timer)
+    except HTTPException as e:
+        timer.outcome = f"http_{e.status_code}"
+        raise
+    except Exception:
+        timer.outcome = "error"
+        raise
+    finally:
+        timer.finish()
+
+async def recommend(db: AsyncSession, current_user: str, timer: StageTimer) -> dict:
+    with timer.stage("load_preferences"):
+        result = await db.execute(select(models.User).where(models.User.username == current_user))
+        pref = result.scalar_one_or_none()
 
     if not pref:
         raise HTTPException(status_code=404, detail="No preferences found for user")
 
-    book_query = await db.execute(select(models.Book))
-    all_books = book_query.scalars().all()
-
-    matched_books = []
-
-    for book in all_books:
-        match_score = 0.0
-
-        if pref.genre and pref.genre.lower() in book.genre.lower():
-            match_score += 0.4
-        if pref.author and pref.author.lower() in book.author.lower():
-            match_score += 0.3
-        if pref.min_year and book.year_published >= pref.min_year:
-            match_score += 0.15
-        if pref.max_year and book.year_published <= pref.max_year:
-            match_score += 0.15
+    with timer.stage("load_books"):
+        book_query = await db.execute(select(models.Book))
+        all_books = book_query.scalars().all()
 
-        if match_score > 0:
-            rating = round(match_score * 5, 1)
-            confidence = "High" if match_score >= 0.8 else "Medium" if match_score >= 0.5 else "Low"
+    with timer.stage("scoring"):
+        matched_books = []
 
-            matched_books.append({
-                "title": book.title,
-                "author": book.author,
-                "year_published": book.year_published,
-                "summary": book.summary,
-                "rating": rating,
-                "confidence": confidence
-            })
+        for book in all_books:
+            match_score = recommender.score_book(pref, book)
+            if match_score > 0:
+                matched_books.append({
+                    "title": book.title,
+                    "author": book.author,
+                    "year_published": book.year_published,
+                    "summary": book.summary,
+                    "rating": recommender.rating(match_score),
+                    "confidence": recommender.confidence(match_score)
+                })
+        matched_books.sort(key=lambda x: x["rating"], reverse=True)
 
     if matched_books:
-        matched_books.sort(key=lambda x: x["rating"], reverse=True)
         # Prepare input for LLM to get a contextual recommendation message
         book_titles = ", ".join([book["title"] for book in matched_books])
-        prompt_template = RECOMMENDATION_PROMPT
-        llm = ChatOllama(model="llama3", temperature=0.7, base_url="http://host.docker.internal:11434")
-        llm_prompt = prompt_template.format(
+        llm_prompt = RECOMMENDATION_PROMPT_TEXT.format(
             genre=pref.genre or "Any",
             author=pref.author or "Any",
             min_year=pref.min_year or "Any",
             max_year=pref.max_year or "Any",
             book_titles=book_titles
         )
-        recommendation_summary = await to_thread.run_sync(llm.invoke, llm_prompt)
-        recommendation_text = (
-            recommendation_summary.content
-            if hasattr(recommendation_summary, "content")
-            else str(recommendation_summary)
-        ).strip().split("\n")[0]
+        if not settings.AI_ENABLED:
+            # ranking needs no LLM, so CRUD-only workers still answer without the blurb
+            timer.outcome = "ai_disabled"
+            return {"recommendation_summary": None, "books": matched_books}
+
+        async def invoke_llm() -> str:
+            llm = get_chat_model(temperature=0.7)
+            async with llm_scheduler.slot(Priority.INTERACTIVE):
+                recommendation_summary = await to_thread.run_sync(llm.invoke, llm_prompt)
+            return message_text(recommendation_summary).split("\n")[0]
+
+        async def generate_blurb() -> str:
+            cache_key = llm_cache.make_key(DEFAULT_MODEL, llm_prompt, temperature=0.7)
+            return await llm_cache.get_or_generate(cache_key, DEFAULT_MODEL, invoke_llm)
+
+        key = blurb_key(pref.genre, pref.author, pref.min_year, pref.max_year, [b["title"] for b in matched_books])
+        if blurbs.get_cached(key) is None and not blurbs.is_pending(key):
+            # charged only here: cached or already-running blurbs, missing preferences and no matches skip the LLM
+            await enforce_admission(current_user, INTERACTIVE)
+        with timer.stage("blurb"):
+            try:
+                recommendation_text = await blurbs.get(key, generate_blurb, settings.RECOMMENDATION_BLURB_TIMEOUT)
+            except Exception:
+                # BlurbStore has logged it; the ranking does not depend on the blurb
+                timer.outcome = "blurb_failed"
+                return {"recommendation_summary": None, "recommendation_pending": False, "books": matched_books}
+        if recommendation_text is None:
+            timer.outcome = "blurb_pending"
+            # the ranked books are ready; the blurb finishes in the background and is cached for the next call
+            return {
+                "recommendation_summary": None,
+                "recommendation_pending": blurbs.is_pending(key),
+                "books": matched_books
+            }
         return {
             "recommendation_summary": recommendation_text,
             "books": matched_books
         }
     else:
-        return {"message": "Sorry, we couldn't find any books matching your preferences."}
\ No newline at end of file
+        timer.outcome = "no_match"
+        return {"message": "Sorry, we couldn't find any books matching your preferences."}
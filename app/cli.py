@@ -0,0 +1,130 @@
+# book_manager/app/cli.py
+"""Admin commands.
+
+``python -m app.cli resummarize`` re-runs summaries from stored book text, e.g. after a
+prompt template change. Without ``--all`` only books whose summary was produced with
+a different prompt or chunking than the current one are redone.
+
+``python -m app.cli recommend`` recomputes every user's top-k recommendations into
+``user_recommendations`` (the nightly digest job).
+
+``python -m app.cli export books|reviews`` streams a dump to a file or stdout, like
+``GET /export/{kind}``.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy.future import select
+
+from app.db import models
+from app.db.database import SessionLocal, engine
+
+async def stale_book_ids(book_ids: list[int], quick: bool, include_current: bool) -> list[int]:
+    from app.services import summarizer
+
+    query = select(models.BookText.book_id, models.BookText.page_offsets, models.BookText.summarized_with)
+    if book_ids:
+        query = query.where(models.BookText.book_id.in_(book_ids))
+    async with SessionLocal() as db:
+        rows = (await db.execute(query.order_by(models.BookText.book_id))).all()
+
+    selected = []
+    for book_id, page_offsets, summarized_with in rows:
+        # one offset per page, so the offsets stand in for the pages when sizing the selection
+        chunker = summarizer.chunker_for(summarizer.select_pages(page_offsets, quick))
+        if include_current or summarized_with != summarizer.current_summary_fingerprint(chunker):
+            selected.append(book_id)
+    return selected
+
+async def resummarize(book_ids: list[int], quick: bool, include_current: bool, concurrency: int) -> int:
+    from app.api.routes.books import resummarize_book
+
+    selected = await stale_book_ids(book_ids, quick, include_current)
+    print(f"Re-summarizing {len(selected)} book(s)")
+    semaphore = asyncio.Semaphore(concurrency)
+    failed = 0
+
+    async def run(book_id: int):
+        nonlocal failed
+        async with semaphore:
+            try:
+                await resummarize_book(book_id, quick)
+                print(f"Book {book_id}: done")
+            except Exception as e:
+                failed += 1
+                print(f"Book {book_id}: failed ({e})")
+
+    await asyncio.gather(*(run(book_id) for book_id in selected))
+    return failed
+
+async def recommend(top_k: int, memory_mb: int) -> int:
+    from app.services.recommender import run_batch
+
+    started = time.perf_counter()
+    users, stored = await run_batch(SessionLocal, top_k, memory_mb * 1024 * 1024)
+    print(f"Stored {stored} recommendation(s) for {users} user(s) in {time.perf_counter() - started:.1f}s")
+    return 0
+
+async def export(args) -> int:
+    from app.services.export import ExportFilters, export_bytes
+
+    filters = ExportFilters(args.genre, args.year_from, args.year_to, args.updated_since, args.after_id)
+    out = open(args.output, "wb") if args.output != "-" else sys.stdout.buffer
+    try:
+        async with SessionLocal() as db:
+            async for chunk in export_bytes(db, args.kind, args.format, filters, gzip=args.gzip):
+                out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+        else:
+            out.flush()
+    return 0
+
+async def _main(args) -> int:
+    try:
+        if args.command == "resummarize":
+            failed = await resummarize(args.book_id, args.quick, args.all, args.concurrency)
+            return 1 if failed else 0
+        if args.command == "recommend":
+            return await recommend(args.top_k, args.memory_mb)
+        if args.command == "export":
+            return await export(args)
+        return 2
+    finally:
+        await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Book manager admin commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    resummarize_parser = commands.add_parser("resummarize", help="regenerate summaries from stored book text")
+    resummarize_parser.add_argument("--book-id", type=int, action="append", default=[], help="limit to these books")
+    resummarize_parser.add_argument("--all", action="store_true", help="include books already summarized with the current prompt")
+    resummarize_parser.add_argument("--quick", action="store_true", help="summarize only the first pages")
+    # the LLM scheduler bounds concurrent model calls; this only bounds books in flight
+    resummarize_parser.add_argument("--concurrency", type=int, default=4)
+
+    recommend_parser = commands.add_parser("recommend", help="recompute stored top-k recommendations for all users")
+    recommend_parser.add_argument("--top-k", type=int, default=10)
+    # bounds the users x books score matrices held at once; users are processed in chunks to fit
+    recommend_parser.add_argument("--memory-mb", type=int, default=256)
+
+    export_parser = commands.add_parser("export", help="stream books or reviews as NDJSON or CSV")
+    export_parser.add_argument("kind", choices=["books", "reviews"])
+    export_parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    export_parser.add_argument("--gzip", action="store_true")
+    export_parser.add_argument("--output", "-o", default="-", help="file to write, - for stdout")
+    export_parser.add_argument("--genre")
+    export_parser.add_argument("--year-from", type=int)
+    export_parser.add_argument("--year-to", type=int)
+    export_parser.add_argument("--updated-since", type=datetime.fromisoformat)
+    export_parser.add_argument("--after-id", type=int, default=0, help="resume after the last id already exported")
+
+    raise SystemExit(asyncio.run(_main(parser.parse_args())))
+
+if __name__ == "__main__":
+    main()
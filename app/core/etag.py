@@ -0,0 +1,42 @@
+# book_manager/app/core/etag.py
+import hashlib
+from fastapi import Request, Response
+
+# Clients may keep a copy but must revalidate it; the data sits behind auth so shared caches stay out.
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+def book_etag(book_id: int, version: int) -> str:
+    return make_etag("book", book_id, version)
+
+def catalog_etag(count: int, max_id, version_sum) -> str:
+    # Books are never deleted, so count + highest id + sum of row versions changes on any insert or update
+    return make_etag("books", count, max_id or 0, version_sum or 0)
+
+def reviews_etag(book_id: int, review_version: int) -> str:
+    return make_etag("reviews", book_id, review_version)
+
+def summary_etag(book_id: int, version: int) -> str:
+    return make_etag("summary", book_id, version)
+
+def has_conditional_header(request: Request) -> bool:
+    return "if-none-match" in request.headers
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110 13.1.2)
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag))
@@ -0,0 +1,171 @@
+# book_manager/app/core/profiling.py
+import cProfile
+import contextvars
+import io
+import json
+import os
+import pstats
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Callable, Optional
+
+from anyio import to_thread
+
+from app.core.config import settings
+from app.core.security import is_admin_token
+
+PROFILE_ID_HEADER = "X-Profile-Id"
+_PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# metadata of the profile being recorded for the current request, if any
+_active_profile: contextvars.ContextVar[Optional[dict]] = contextvars.ContextVar("active_profile", default=None)
+
+def attach_to_profile(key: str, value):
+    """Add ``value`` to the current request's profile metadata; a no-op when not profiling."""
+    meta = _active_profile.get()
+    if meta is not None and not meta.get("closed"):
+        meta.setdefault(key, []).append(value)
+
+class ProfileStore:
+    """Profiles on disk as ``<id>.prof`` (pstats format) plus ``<id>.json`` metadata.
+
+    A shared directory lets an admin download a profile from any worker; only the
+    newest ``max_profiles`` are kept.
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def _path(self, profile_id: str, suffix: str) -> Optional[str]:
+        if not _PROFILE_ID_RE.match(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.{suffix}")
+
+    def save(self, profile_id: str, profiler: cProfile.Profile, meta: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        profiler.dump_stats(self._path(profile_id, "prof"))
+        with open(self._path(profile_id, "json"), "w") as f:
+            json.dump({k: v for k, v in meta.items() if k != "closed"}, f)
+        self._prune()
+
+    def _metadata_files(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory) if name.endswith(".json")]
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    def _prune(self):
+        for path in self._metadata_files()[self.max_profiles:]:
+            for stale in (path, path[:-len(".json")] + ".prof"):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+    def list(self) -> list[dict]:
+        profiles = []
+        for path in self._metadata_files():
+            try:
+                with open(path) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # pruned or still being written by another worker
+        return profiles
+
+    def stats_path(self, profile_id: str) -> Optional[str]:
+        path = self._path(profile_id, "prof")
+        return path if path and os.path.exists(path) else None
+
+    def text_report(self, profile_id: str, sort: str = "cumulative", limit: int = 60) -> Optional[str]:
+        path = self.stats_path(profile_id)
+        if path is None:
+            return None
+        out = io.StringIO()
+        pstats.Stats(path, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+profile_store = ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_STORED)
+
+class ProfilingMiddleware:
+    """Record a cProfile of single requests and store it for download from /admin/profiles.
+
+    A request is profiled when it carries ``X-Profile: 1`` with a valid ``X-Admin-Token``,
+    or when it is sampled at ``sample_rate``. cProfile follows the event-loop thread, so
+    other requests interleaved with the profiled one show up too, and thread-pool work
+    (bcrypt, PDF parsing, LLM calls) appears only as the awaiting frame. Only one request
+    per worker is profiled at a time; the profile ends when the response body is sent.
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store, sample_rate: Optional[float] = None,
+                 sampler: Callable[[], float] = random.random):
+        self.app = app
+        self.store = store
+        self.sample_rate = settings.PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.sampler = sampler
+        self._busy = threading.Lock()
+
+    def _trigger(self, scope) -> Optional[str]:
+        headers = {name: value for name, value in scope.get("headers", [])}
+        if headers.get(b"x-profile", b"").strip() in (b"1", b"true") and \
+                is_admin_token(headers.get(b"x-admin-token", b"").decode("latin-1")):
+            return "header"
+        if self.sample_rate > 0 and self.sampler() < self.sample_rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        meta = {
+            "id": profile_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "trigger": trigger,
+            "started_at": time.time(),
+        }
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        saved = False
+
+        def stop():
+            if not meta.get("closed"):
+                profiler.disable()
+                meta["closed"] = True
+                meta["duration_ms"] = round(1000 * (time.perf_counter() - started), 3)
+                self._busy.release()
+
+        async def save():
+            nonlocal saved
+            if not saved:
+                saved = True
+                await to_thread.run_sync(self.store.save, profile_id, profiler, meta)
+
+        async def send_profiled(message):
+            if message["type"] == "http.response.start":
+                meta["status"] = message["status"]
+                if trigger == "header":
+                    message = {**message, "headers": [*message.get("headers", []),
+                                                      (PROFILE_ID_HEADER.lower().encode(), profile_id.encode())]}
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # background tasks run after this; they are not part of the request's profile
+                stop()
+                await save()
+
+        token = _active_profile.set(meta)
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_profiled)
+        finally:
+            stop()
+            _active_profile.reset(token)
+            await save()
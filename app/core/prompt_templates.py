@@ -1,13 +1,14 @@
+# book_manager/app/core/prompt_templates.py
+# Plain strings so importing this module stays cheap; LangChain PromptTemplates are
+# built on the first call of their accessor by the workers that actually summarize.
+from functools import lru_cache
 
-
-from langchain.prompts import PromptTemplate
-
-SUMMARY_PROMPT_TEMPLATE = PromptTemplate.from_template(
+SUMMARY_PROMPT_TEXT = (
     "You are an expert summarizer. Summarize the following book content clearly and concisely, "
     "preserving the main ideas, plot, or concepts. Highlight the core message and important takeaways.\n\n{text}"
 )
 
-RECOMMENDATION_PROMPT = PromptTemplate.from_template(
+RECOMMENDATION_PROMPT_TEXT = (
     "You are an intelligent and friendly book recommender. A user has the following preferences:\n"
     "- Genre: {genre}\n"
     "- Favorite Author: {author}\n"
@@ -15,4 +16,14 @@ RECOMMENDATION_PROMPT = PromptTemplate.from_template(
     "Based on these preferences, you matched the following books from the library database: {book_titles}.\n\n"
     "Write a friendly and insightful one-line recommendation summary that encourages the user to explore these books. "
     "Focus on variety, relevance, and appeal."
-)
\ No newline at end of file
+)
+
+@lru_cache(maxsize=None)
+def summary_prompt_template():
+    from langchain.prompts import PromptTemplate
+    return PromptTemplate.from_template(SUMMARY_PROMPT_TEXT)
+
+@lru_cache(maxsize=None)
+def recommendation_prompt():
+    from langchain.prompts import PromptTemplate
+    return PromptTemplate.from_template(RECOMMENDATION_PROMPT_TEXT)
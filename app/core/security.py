@@ -1,7 +1,9 @@
+import hmac
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
+from app.core.config import settings
 
 SECRET_KEY = "your_secret_key"
 ALGORITHM = "HS256"
@@ -33,6 +35,10 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise credentials_exception
 
+def is_admin_token(token: str) -> bool:
+    """Admin access is disabled while ADMIN_TOKEN is empty."""
+    return bool(settings.ADMIN_TOKEN and token and hmac.compare_digest(token, settings.ADMIN_TOKEN))
+
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
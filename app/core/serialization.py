@@ -0,0 +1,27 @@
+# book_manager/app/core/serialization.py
+from typing import Iterable, Sequence, Type
+
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+
+class RowSerializer:
+    """Renders result tuples straight to JSON bytes in the shape of a response schema.
+
+    Field names are resolved once from the pydantic model, so each call is a zip per
+    row plus a single orjson pass; rows are trusted to already match the schema.
+    """
+
+    def __init__(self, schema: Type[BaseModel]):
+        self.fields: tuple = tuple(schema.model_fields)
+
+    def columns(self, entity) -> list:
+        return [getattr(entity, name) for name in self.fields]
+
+    def dumps(self, rows: Iterable[Sequence]) -> bytes:
+        fields = self.fields
+        # zip stops at the schema fields, so trailing bookkeeping columns are dropped
+        return orjson.dumps([dict(zip(fields, row)) for row in rows])
+
+    def response(self, rows: Iterable[Sequence], headers: dict = None) -> Response:
+        return Response(content=self.dumps(rows), media_type="application/json", headers=headers)
@@ -0,0 +1,96 @@
+# book_manager/app/core/timing.py
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from app.core import profiling
+
+@dataclass
+class StageStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+            "max_ms": round(1000 * self.max, 3),
+            "last_ms": round(1000 * self.last, 3),
+        }
+
+class TimingStats:
+    """Per-worker aggregates of stage durations, keyed by operation and stage."""
+
+    def __init__(self):
+        self._stats: dict[tuple[str, str], StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, stage: str, seconds: float):
+        with self._lock:
+            self._stats.setdefault((operation, stage), StageStats()).record(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            snapshot = {}
+            for (operation, stage), stats in self._stats.items():
+                snapshot.setdefault(operation, {})[stage] = stats.as_dict()
+            return snapshot
+
+    def clear(self):
+        with self._lock:
+            self._stats.clear()
+
+stage_timings = TimingStats()
+
+class StageTimer:
+    """Wall-clock time per named stage of one run, e.g. one summary job.
+
+    Costs two ``perf_counter`` calls per stage, so it stays on in production. ``finish``
+    folds the run into ``stage_timings``, prints one JSON line and, if the run belongs
+    to a profiled request, attaches the stages to that profile.
+    """
+
+    def __init__(self, operation: str, stats: TimingStats = stage_timings, **context):
+        self.operation = operation
+        self.stats = stats
+        self.context = context
+        self.stages: dict[str, float] = {}
+        self.outcome = "ok"
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def finish(self, outcome: Optional[str] = None) -> dict:
+        if outcome is not None:
+            self.outcome = outcome
+        total = time.perf_counter() - self._started
+        for name, seconds in self.stages.items():
+            self.stats.record(self.operation, name, seconds)
+        self.stats.record(self.operation, "total", total)
+        record = {
+            "operation": self.operation,
+            "outcome": self.outcome,
+            **self.context,
+            "total_ms": round(1000 * total, 3),
+            "stages_ms": {name: round(1000 * seconds, 3) for name, seconds in self.stages.items()},
+        }
+        profiling.attach_to_profile("stages", record)
+        print(f"timing {json.dumps(record)}")
+        return record
@@ -12,11 +12,12 @@ Base = declarative_base()
 import asyncio
 
 async def init_db():
+    from app.db.migrations import run_migrations
+
     retries = 5
     for i in range(retries):
         try:
-            async with engine.begin() as conn:
-                await conn.run_sync(Base.metadata.create_all)
+            await run_migrations(engine)
             break
         except Exception as e:
             print(f"DB not ready yet ({i+1}/{retries}) — retrying...")
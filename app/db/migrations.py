@@ -0,0 +1,165 @@
+# book_manager/app/db/migrations.py
+"""Versioned schema migrations.
+
+Each migration runs once and is recorded in ``schema_migrations``. Steps are written
+to be idempotent, so a database created by an older ``create_all`` and a brand new
+one converge on the same schema. Run ``python -m app.db.migrations`` to upgrade or
+``python -m app.db.migrations --status`` to list what is applied.
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.db.database import Base
+
+# arbitrary constant; serializes migration runs from workers starting at the same time
+MIGRATION_LOCK_ID = 72_310_455
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block on Postgres
+    transactional: bool = True
+
+def add_column_if_missing(conn: Connection, table: str, column: str, ddl: str):
+    existing = {c["name"] for c in inspect(conn).get_columns(table)}
+    if column not in existing:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+def create_index(conn: Connection, name: str, table: str, expression: str):
+    concurrently = "CONCURRENTLY " if conn.dialect.name == "postgresql" else ""
+    conn.execute(text(f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({expression})"))
+
+def create_tables(conn: Connection, *tables: str):
+    Base.metadata.create_all(conn, tables=[Base.metadata.tables[name] for name in tables], checkfirst=True)
+
+def _0001_initial_schema(conn: Connection):
+    from app.db import models  # noqa: F401  registers the tables on Base.metadata
+
+    create_tables(conn, "users", "books", "reviews")
+
+def _0002_book_versioning(conn: Connection):
+    add_column_if_missing(conn, "books", "summary_status", "VARCHAR NOT NULL DEFAULT 'pending'")
+    add_column_if_missing(conn, "books", "version", "INTEGER NOT NULL DEFAULT 1")
+    add_column_if_missing(conn, "books", "review_version", "INTEGER NOT NULL DEFAULT 0")
+    add_column_if_missing(conn, "books", "updated_at", "TIMESTAMP")
+    conn.execute(text(
+        "UPDATE books SET summary_status = 'completed' "
+        "WHERE summary_status = 'pending' AND summary IS NOT NULL AND lower(summary) <> 'generating...'"
+    ))
+
+def _0003_query_indexes(conn: Connection):
+    create_index(conn, "ix_books_genre", "books", "genre")
+    create_index(conn, "ix_books_author", "books", "author")
+    create_index(conn, "ix_books_year_published", "books", "year_published")
+    create_index(conn, "ix_reviews_book_id", "reviews", "book_id")
+    create_index(conn, "ix_reviews_user_id", "reviews", "user_id")
+
+def _0004_book_texts(conn: Connection):
+    from app.db import models  # noqa: F401
+
+    create_tables(conn, "book_texts")
+
+def _0005_catalog_changes(conn: Connection):
+    from app.db import models  # noqa: F401
+
+    create_tables(conn, "catalog_changes")
+
+def _0006_user_recommendations(conn: Connection):
+    from app.db import models  # noqa: F401
+
+    create_tables(conn, "user_recommendations")
+
+def _0007_export_timestamps(conn: Connection):
+    add_column_if_missing(conn, "reviews", "created_at", "TIMESTAMP")
+    create_index(conn, "ix_reviews_created_at", "reviews", "created_at")
+    create_index(conn, "ix_books_updated_at", "books", "updated_at")
+
+def _0008_chunk_summaries(conn: Connection):
+    from app.db import models  # noqa: F401
+
+    create_tables(conn, "chunk_summaries")
+
+MIGRATIONS = [
+    Migration(1, "initial schema", _0001_initial_schema),
+    Migration(2, "book summary status and versions", _0002_book_versioning),
+    Migration(3, "indexes for filtered book and review queries", _0003_query_indexes, transactional=False),
+    Migration(4, "stored book text for re-summarization", _0004_book_texts),
+    Migration(5, "catalog cache change log", _0005_catalog_changes),
+    Migration(6, "batch recommendations", _0006_user_recommendations),
+    Migration(7, "timestamps for incremental exports", _0007_export_timestamps, transactional=False),
+    Migration(8, "chunk summaries for incremental re-summarization", _0008_chunk_summaries),
+]
+
+def _ensure_version_table(conn: Connection):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY, name VARCHAR NOT NULL, applied_at TIMESTAMP NOT NULL)"
+    ))
+
+def _applied_versions(conn: Connection) -> set[int]:
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+def _record(conn: Connection, migration: Migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, name, applied_at) VALUES (:version, :name, :applied_at)"),
+        {"version": migration.version, "name": migration.name, "applied_at": datetime.utcnow()},
+    )
+
+async def run_migrations(engine: AsyncEngine) -> list[int]:
+    """Apply pending migrations in order; returns the versions applied by this call."""
+    applied_now = []
+    async with engine.connect() as lock_conn:
+        lock_conn = await lock_conn.execution_options(isolation_level="AUTOCOMMIT")
+        postgres = lock_conn.dialect.name == "postgresql"
+        if postgres:
+            await lock_conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+        try:
+            await lock_conn.run_sync(_ensure_version_table)
+            applied = await lock_conn.run_sync(_applied_versions)
+            for migration in MIGRATIONS:
+                if migration.version in applied:
+                    continue
+                print(f"Applying migration {migration.version}: {migration.name}")
+                if migration.transactional:
+                    async with engine.begin() as conn:
+                        await conn.run_sync(migration.upgrade)
+                        await conn.run_sync(_record, migration)
+                else:
+                    await lock_conn.run_sync(migration.upgrade)
+                    await lock_conn.run_sync(_record, migration)
+                applied_now.append(migration.version)
+        finally:
+            if postgres:
+                await lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": MIGRATION_LOCK_ID})
+    return applied_now
+
+async def migration_status(engine: AsyncEngine) -> list[tuple[int, str, bool]]:
+    async with engine.begin() as conn:
+        await conn.run_sync(_ensure_version_table)
+        applied = await conn.run_sync(_applied_versions)
+    return [(m.version, m.name, m.version in applied) for m in MIGRATIONS]
+
+async def _main(status_only: bool):
+    from app.db.database import engine
+
+    if status_only:
+        for version, name, applied in await migration_status(engine):
+            print(f"{version:>4}  {'applied' if applied else 'pending':<8} {name}")
+    else:
+        applied = await run_migrations(engine)
+        print(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    asyncio.run(_main(parser.parse_args().status))
@@ -1,31 +1,89 @@
 # book_manager/app/db/models.py
-from sqlalchemy import Column, Integer, String, ForeignKey
+import enum
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Float, LargeBinary, JSON
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
+class SummaryStatus(str, enum.Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class Book(Base):
     __tablename__ = "books"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    author = Column(String, nullable=False)
-    genre = Column(String, nullable=False)
-    year_published = Column(Integer)
+    author = Column(String, nullable=False, index=True)
+    genre = Column(String, nullable=False, index=True)
+    year_published = Column(Integer, index=True)
     summary = Column(String)
+    summary_status = Column(String, nullable=False, default=SummaryStatus.PENDING.value)
+    # bumped on every change to the row / to its reviews; drives the HTTP ETags
+    version = Column(Integer, nullable=False, default=1)
+    review_version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     reviews = relationship("Review", back_populates="book")
 
+class BookText(Base):
+    """Extracted page text and the last prepared chunks, zlib-compressed; see app/services/book_text.py."""
+    __tablename__ = "book_texts"
+
+    book_id = Column(Integer, ForeignKey("books.id"), primary_key=True)
+    pages = Column(LargeBinary, nullable=False)
+    page_offsets = Column(JSON, nullable=False)
+    chunks = Column(LargeBinary)
+    chunk_offsets = Column(JSON)
+    chunker = Column(String)
+    # fingerprint of the prompt and chunking behind the book's current summary
+    summarized_with = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ChunkSummary(Base):
+    """Map-phase summary of one chunk, keyed by its normalized text; see app/services/chunk_summaries.py."""
+    __tablename__ = "chunk_summaries"
+
+    content_hash = Column(String, primary_key=True)
+    # prompt and model the summary was generated with
+    fingerprint = Column(String, primary_key=True)
+    summary = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class CatalogChange(Base):
+    """Catalog cache invalidations for workers that cannot LISTEN (SQLite); see app/services/catalog_cache.py."""
+    __tablename__ = "catalog_changes"
+
+    id = Column(Integer, primary_key=True)
+    message = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
 class Review(Base):
     __tablename__ = "reviews"
 
     id = Column(Integer, primary_key=True, index=True)
-    book_id = Column(Integer, ForeignKey("books.id"))
-    user_id = Column(String, ForeignKey("users.username"))
+    book_id = Column(Integer, ForeignKey("books.id"), index=True)
+    user_id = Column(String, ForeignKey("users.username"), index=True)
     review_text = Column(String)
     rating = Column(Integer)
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
 
     book = relationship("Book", back_populates="reviews")
 
+class UserRecommendation(Base):
+    """Top-k books per user from the batch job (``python -m app.cli recommend``), e.g. for email digests."""
+    __tablename__ = "user_recommendations"
+
+    id = Column(Integer, primary_key=True)
+    username = Column(String, ForeignKey("users.username"), nullable=False, index=True)
+    book_id = Column(Integer, ForeignKey("books.id"), nullable=False)
+    rank = Column(Integer, nullable=False)
+    rating = Column(Float, nullable=False)
+    confidence = Column(String, nullable=False)
+    generated_at = Column(DateTime, nullable=False)
+
 class User(Base):
     __tablename__ = "users"
 
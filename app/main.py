@@ -1,8 +1,16 @@
 # book_manager/app/main.py
-from fastapi import FastAPI
-from app.api.routes import books, reviews , auth , recommendations
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from anyio import to_thread
+from app.api.routes import books, reviews , auth , recommendations, admin, export
 from app.core.config import settings
+from app.core.profiling import ProfilingMiddleware
 from app.db.database import init_db
+from app.services.catalog_cache import catalog_listener
+from app.services.llm import AIUnavailableError
+from app.services.llm_pool import llm_pool_monitor
+from app.services.llm_scheduler import SchedulerQueueFull
+from app.services.review_batcher import review_batcher
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer
 
@@ -11,6 +19,31 @@ app = FastAPI(title="Intelligent Book Management System")
 @app.on_event("startup")
 async def startup():
     await init_db()
+    if settings.CATALOG_CACHE_ENABLED:
+        catalog_listener.start()
+    if settings.AI_ENABLED:
+        llm_pool_monitor.start()
+    if settings.AI_ENABLED and settings.AI_PRELOAD:
+        from app.services import summarizer
+        await to_thread.run_sync(summarizer.preload)
+
+@app.on_event("shutdown")
+async def shutdown():
+    await catalog_listener.stop()
+    await llm_pool_monitor.stop()
+    await review_batcher.stop()
+
+@app.exception_handler(AIUnavailableError)
+async def ai_unavailable_handler(request: Request, exc: AIUnavailableError):
+    return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+@app.exception_handler(SchedulerQueueFull)
+async def scheduler_queue_full_handler(request: Request, exc: SchedulerQueueFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 # Allow CORS for testing
 app.add_middleware(
@@ -20,12 +53,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(ProfilingMiddleware)
 
 # Include Routers
 app.include_router(books.router, prefix="/books", tags=["Books"])
 app.include_router(reviews.router, prefix="/books", tags=["Reviews"])
 app.include_router(auth.router, prefix="/auth", tags=["Auth"])
 app.include_router(recommendations.router, prefix="/recommendations", tags=["Recommendations"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
+app.include_router(export.router, prefix="/export", tags=["Export"])
 
 @app.get("/")
 def root():
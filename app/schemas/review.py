@@ -6,5 +6,6 @@ class ReviewIn(BaseModel):
     rating: int
 
 class ReviewOut(ReviewIn):
+    id: int
     user_id: str
     book_id: int
\ No newline at end of file
@@ -0,0 +1,171 @@
+# book_manager/app/services/admission.py
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+from anyio import to_thread
+
+from app.core.config import settings
+from app.services.llm_scheduler import LLMScheduler, Priority, llm_scheduler
+from app.services.summary_progress import SummaryProgressTracker, summary_progress
+
+INTERACTIVE = "interactive"
+UPLOAD = "upload"
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: float):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = max(1, math.ceil(retry_after))
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: float
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """``"20/60"`` allows bursts of 20 requests, refilled at 20 per 60 seconds."""
+        count, seconds = spec.split("/")
+        return cls(capacity=float(count), refill_per_second=float(count) / float(seconds))
+
+def refill(tokens: float, updated: float, now: float, limit: RateLimit) -> float:
+    return min(limit.capacity, tokens + (now - updated) * limit.refill_per_second)
+
+def take_token(tokens: float, limit: RateLimit) -> tuple[float, float]:
+    """Returns (tokens left, seconds to wait); a wait of 0 means the request is admitted."""
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.refill_per_second
+
+class InMemoryBucketStore:
+    """Token buckets for a single worker process."""
+
+    blocking = False
+
+    def __init__(self):
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, limit: RateLimit, now: float) -> float:
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (limit.capacity, now))
+            tokens, wait = take_token(refill(tokens, updated, now, limit), limit)
+            self._buckets[key] = (tokens, now)
+            return wait
+
+class SQLiteBucketStore:
+    """Token buckets in a SQLite file, so every worker on the host draws from the same bucket.
+
+    Stand-in for a shared store such as Redis; each take is one short write transaction.
+    """
+
+    PRUNE_EVERY = 1000
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, limit: RateLimit, now: float) -> float:
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (limit.capacity, now)
+            tokens, wait = take_token(refill(tokens, updated, now, limit), limit)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now)
+            )
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                # a bucket idle for a day is full again, so dropping it changes nothing
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - 86400,))
+            conn.execute("COMMIT")
+            return wait
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+class AdmissionController:
+    """Per-user token buckets plus global load shedding for LLM-backed endpoints.
+
+    Rate limits answer 429 with the exact time until the user's next token. Load
+    shedding answers 503 once the LLM scheduler's interactive queue or the number of
+    summary jobs running in this worker passes its threshold, with Retry-After
+    estimated from recent LLM service times.
+    """
+
+    def __init__(self, store, limits: dict, scheduler: LLMScheduler, progress: SummaryProgressTracker,
+                 max_interactive_queue: int, max_active_summaries: int, clock=time.time):
+        self.store = store
+        self.limits = limits
+        self.scheduler = scheduler
+        self.progress = progress
+        self.max_interactive_queue = max_interactive_queue
+        self.max_active_summaries = max_active_summaries
+        self.clock = clock
+
+    async def admit(self, user: str, endpoint_class: str):
+        self.shed_load(endpoint_class)
+        limit = self.limits[endpoint_class]
+        key = f"{endpoint_class}:{user}"
+        if self.store.blocking:
+            wait = await to_thread.run_sync(self.store.take, key, limit, self.clock())
+        else:
+            wait = self.store.take(key, limit, self.clock())
+        if wait > 0:
+            raise AdmissionRejected(429, "Rate limit exceeded", wait)
+
+    def shed_load(self, endpoint_class: str):
+        if endpoint_class == INTERACTIVE:
+            if self.scheduler.queue_depth(Priority.INTERACTIVE) >= self.max_interactive_queue:
+                raise AdmissionRejected(
+                    503, "LLM service is overloaded", self.scheduler.estimated_wait(Priority.INTERACTIVE)
+                )
+        elif endpoint_class == UPLOAD:
+            active = self.progress.active()
+            if len(active) >= self.max_active_summaries:
+                raise AdmissionRejected(503, "Too many summaries in progress", self.summary_drain_time(active))
+
+    def summary_drain_time(self, active: list) -> float:
+        # each job gets roughly max_concurrency / len(active) slots; the closest one to done frees up first
+        remaining = min(max(state.chunks_total - state.chunks_done, 1) for state in active)
+        service = self.scheduler.stats[Priority.BACKGROUND].recent_service
+        return remaining * service * len(active) / self.scheduler.max_concurrency
+
+def build_bucket_store():
+    if settings.RATE_LIMIT_BACKEND == "sqlite":
+        return SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+    return InMemoryBucketStore()
+
+admission_controller = AdmissionController(
+    store=build_bucket_store(),
+    limits={
+        INTERACTIVE: RateLimit.parse(settings.RATE_LIMIT_INTERACTIVE),
+        UPLOAD: RateLimit.parse(settings.RATE_LIMIT_UPLOAD),
+    },
+    scheduler=llm_scheduler,
+    progress=summary_progress,
+    max_interactive_queue=settings.SHED_INTERACTIVE_QUEUE_DEPTH,
+    max_active_summaries=settings.MAX_ACTIVE_SUMMARIES,
+)
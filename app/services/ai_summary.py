@@ -1,17 +1,26 @@
 # book_manager/app/services/ai_summary.py
 import httpx
-from app.core.config import settings
+from app.services.llm import ensure_ai_enabled, DEFAULT_MODEL
+from app.services.llm_cache import llm_cache
+from app.services.llm_pool import llm_pool
+from app.services.llm_scheduler import llm_scheduler, Priority
 
 async def generate_summary(prompt: str) -> str:
+    ensure_ai_enabled()
+    key = llm_cache.make_key(DEFAULT_MODEL, prompt)
+    return await llm_cache.get_or_generate(key, DEFAULT_MODEL, lambda: request_summary(prompt))
+
+async def request_summary(prompt: str) -> str:
     headers = {"Content-Type": "application/json"}
     body = {
-        "model": "llama3",
+        "model": DEFAULT_MODEL,
         "prompt": prompt,
         "stream": False
     }
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(settings.LLAMA_ENDPOINT, json=body)
+    async with llm_scheduler.slot(Priority.INTERACTIVE), llm_pool.alease(DEFAULT_MODEL) as backend, \
+            httpx.AsyncClient() as client:
+        response = await client.post(f"{backend.url}/api/generate", json=body)
         if response.status_code == 200:
             result = response.json()
             return result.get("response", "").strip()
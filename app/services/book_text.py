@@ -0,0 +1,79 @@
+# book_manager/app/services/book_text.py
+# Extracted page text and prepared chunks, kept per book so summaries can be re-run
+# (full instead of quick, or under a new prompt) without the PDF.
+import hashlib
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db import models
+
+COMPRESSION_LEVEL = 6
+
+def pack_texts(texts: list[str]) -> tuple[bytes, list[int]]:
+    """Concatenate and compress ``texts``; the offsets are each text's end position."""
+    offsets, end = [], 0
+    for text in texts:
+        end += len(text)
+        offsets.append(end)
+    return zlib.compress("".join(texts).encode("utf-8"), COMPRESSION_LEVEL), offsets
+
+def unpack_texts(blob: bytes, offsets: list[int]) -> list[str]:
+    joined = zlib.decompress(blob).decode("utf-8")
+    starts = [0] + offsets[:-1]
+    return [joined[start:end] for start, end in zip(starts, offsets)]
+
+def chunker_fingerprint(page_count: int, chunk_size: int, chunk_overlap: int) -> str:
+    """Identifies how stored chunks were produced; chunks are only reused when it matches."""
+    return f"pages={page_count};size={chunk_size};overlap={chunk_overlap}"
+
+def summary_fingerprint(template: str, chunker: str) -> str:
+    """Identifies the prompt and chunking a summary was generated with."""
+    return hashlib.sha256(f"{chunker}\x1f{template}".encode("utf-8")).hexdigest()[:16]
+
+@dataclass
+class StoredText:
+    pages: list[str]
+    chunks: Optional[list[str]] = None
+    chunker: Optional[str] = None
+    summarized_with: Optional[str] = None
+
+async def load_book_text(db: AsyncSession, book_id: int) -> Optional[StoredText]:
+    result = await db.execute(select(models.BookText).where(models.BookText.book_id == book_id))
+    row = result.scalar_one_or_none()
+    if row is None:
+        return None
+    chunks = unpack_texts(row.chunks, row.chunk_offsets) if row.chunks is not None else None
+    return StoredText(
+        pages=unpack_texts(row.pages, row.page_offsets),
+        chunks=chunks,
+        chunker=row.chunker,
+        summarized_with=row.summarized_with,
+    )
+
+async def save_pages(db: AsyncSession, book_id: int, pages: list[str]):
+    blob, offsets = pack_texts(pages)
+    row = await db.get(models.BookText, book_id) or models.BookText(book_id=book_id)
+    row.pages, row.page_offsets = blob, offsets
+    row.chunks = row.chunk_offsets = row.chunker = None
+    db.add(row)
+    await db.commit()
+
+async def save_chunks(db: AsyncSession, book_id: int, chunks: list[str], chunker: str):
+    blob, offsets = pack_texts(chunks)
+    row = await db.get(models.BookText, book_id)
+    if row is None:
+        return
+    row.chunks, row.chunk_offsets, row.chunker = blob, offsets, chunker
+    db.add(row)
+    await db.commit()
+
+async def mark_summarized(db: AsyncSession, book_id: int, fingerprint: str):
+    row = await db.get(models.BookText, book_id)
+    if row is not None:
+        row.summarized_with = fingerprint
+        db.add(row)
+        await db.commit()
@@ -0,0 +1,213 @@
+# book_manager/app/services/catalog_cache.py
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import delete, func, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import engine
+
+CHANNEL = "catalog_changes"
+LIST_CHANGED = "list"
+LISTENER_RETRY_SECONDS = 5
+POSTGRES_KEEPALIVE_SECONDS = 30
+# the SQLite stand-in keeps change rows long enough for every poller to have read them
+CHANGE_RETENTION = timedelta(hours=1)
+
+def book_changed(book_id: int) -> str:
+    return f"book:{book_id}"
+
+def reviews_changed(book_id: int) -> str:
+    return f"reviews:{book_id}"
+
+@dataclass(frozen=True)
+class CachedList:
+    body: bytes
+    etag: str
+    rows: int
+
+class CatalogCache:
+    """In-process read-through cache of book rows and the rendered catalog list.
+
+    Bounded to ``max_books`` rows (LRU) and one list of at most ``max_list_rows`` books.
+    Writers call ``commit_with_invalidation``, which drops the entries in this worker
+    and broadcasts the change to the others (see ``InvalidationListener``). A load that
+    raced an invalidation is returned but not stored, so it cannot resurrect stale data.
+    """
+
+    def __init__(self, max_books: int, max_list_rows: int, enabled: bool = True):
+        self.max_books = max_books
+        self.max_list_rows = max_list_rows
+        self.enabled = enabled
+        self._books: "OrderedDict[int, dict]" = OrderedDict()
+        self._list: Optional[CachedList] = None
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def get_book(self, book_id: int, load: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        row = self._books.get(book_id)
+        if row is not None:
+            self._books.move_to_end(book_id)
+            self.hits += 1
+            return row
+        self.misses += 1
+        generation = self._generation
+        row = await load()
+        if row is not None and generation == self._generation:
+            self._books[book_id] = row
+            while len(self._books) > self.max_books:
+                self._books.popitem(last=False)
+        return row
+
+    async def get_list(self, load: Callable[[], Awaitable[CachedList]]) -> CachedList:
+        if self._list is not None:
+            self.hits += 1
+            return self._list
+        self.misses += 1
+        generation = self._generation
+        catalog = await load()
+        if catalog.rows <= self.max_list_rows and generation == self._generation:
+            self._list = catalog
+        return catalog
+
+    def apply(self, message: str):
+        """Drop what a change message makes stale; unknown messages clear everything."""
+        self._generation += 1
+        kind, _, book_id = message.partition(":")
+        if kind == LIST_CHANGED:
+            self._list = None
+        elif kind == "book" and book_id.isdigit():
+            self._books.pop(int(book_id), None)
+            self._list = None
+        elif kind == "reviews" and book_id.isdigit():
+            # cached rows carry review_version
+            self._books.pop(int(book_id), None)
+        else:
+            self.clear()
+
+    def clear(self):
+        self._generation += 1
+        self._books.clear()
+        self._list = None
+
+    def metrics(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "books": len(self._books),
+            "list_cached": self._list is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+catalog_cache = CatalogCache(
+    max_books=settings.CATALOG_CACHE_MAX_BOOKS,
+    max_list_rows=settings.CATALOG_CACHE_MAX_LIST_ROWS,
+    enabled=settings.CATALOG_CACHE_ENABLED,
+)
+
+async def commit_with_invalidation(db: AsyncSession, *messages: str, cache: Optional[CatalogCache] = None):
+    """Commit ``db`` and invalidate the cache here and, through the same transaction, in other workers.
+
+    On Postgres the NOTIFY is delivered only if the transaction commits; on SQLite the
+    change row becomes visible to the other workers' pollers the same way.
+    """
+    cache = cache or catalog_cache
+    if cache.enabled:
+        for message in messages:
+            if db.bind.dialect.name == "postgresql":
+                await db.execute(text("SELECT pg_notify(:channel, :message)"), {"channel": CHANNEL, "message": message})
+            else:
+                await db.execute(insert(models.CatalogChange).values(message=message))
+    await db.commit()
+    if cache.enabled:
+        for message in messages:
+            cache.apply(message)
+
+class InvalidationListener:
+    """Applies other workers' catalog changes to this worker's cache.
+
+    Postgres: LISTEN on a dedicated connection. SQLite: poll the catalog_changes table.
+    Whenever the listener (re)connects the cache is cleared, since changes may have
+    been missed while it was down.
+    """
+
+    def __init__(self, engine: AsyncEngine, cache: CatalogCache, poll_interval: float):
+        self.engine = engine
+        self.cache = cache
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                if self.engine.dialect.name == "postgresql":
+                    await self._listen_postgres()
+                else:
+                    await self._poll_changes()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Catalog cache listener failed ({e}); retrying in {LISTENER_RETRY_SECONDS}s")
+                self.cache.clear()
+                await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+    async def _listen_postgres(self):
+        async with self.engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            listener = raw.driver_connection
+
+            def on_notify(connection, pid, channel, payload):
+                self.cache.apply(payload)
+
+            await listener.add_listener(CHANNEL, on_notify)
+            self.cache.clear()
+            try:
+                while True:
+                    # a dead connection would otherwise drop notifications silently
+                    await asyncio.sleep(POSTGRES_KEEPALIVE_SECONDS)
+                    await listener.execute("SELECT 1")
+            finally:
+                await listener.remove_listener(CHANNEL, on_notify)
+
+    async def _poll_changes(self):
+        async with self.engine.connect() as conn:
+            last_id = (await conn.execute(select(func.max(models.CatalogChange.id)))).scalar() or 0
+        self.cache.clear()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            async with self.engine.begin() as conn:
+                rows = (await conn.execute(
+                    select(models.CatalogChange.id, models.CatalogChange.message)
+                    .where(models.CatalogChange.id > last_id)
+                    .order_by(models.CatalogChange.id)
+                )).all()
+                for change_id, message in rows:
+                    self.cache.apply(message)
+                    last_id = change_id
+                if rows:
+                    await conn.execute(
+                        delete(models.CatalogChange)
+                        .where(models.CatalogChange.created_at < datetime.utcnow() - CHANGE_RETENTION)
+                    )
+
+catalog_listener = InvalidationListener(engine, catalog_cache, settings.CATALOG_CACHE_POLL_INTERVAL)
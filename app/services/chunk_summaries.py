@@ -0,0 +1,73 @@
+# book_manager/app/services/chunk_summaries.py
+# Content-addressed store of map-phase chunk summaries. A chunk that any earlier upload
+# (another edition, a re-upload, a re-summarize) already summarized under the same prompt
+# and model is reused instead of sent to the LLM again.
+import hashlib
+import unicodedata
+from dataclasses import dataclass, field
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db import models
+
+# keeps the IN lists well under SQLite's bound-parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+def normalize_chunk(text: str) -> str:
+    """Unicode- and whitespace-normalized text, so re-extraction noise does not change the hash."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(normalize_chunk(text).encode("utf-8")).hexdigest()
+
+def partial_fingerprint(template: str, model: str) -> str:
+    """Identifies the prompt and model chunk summaries were generated with."""
+    return hashlib.sha256(f"{model}\x1f{template}".encode("utf-8")).hexdigest()[:16]
+
+@dataclass
+class ChunkPlan:
+    """Which chunks of a book need the map phase and which reuse a stored summary."""
+    hashes: list[str]
+    reused: dict[str, str] = field(default_factory=dict)
+    # index of the first chunk with each hash that has no stored summary
+    to_map: list[int] = field(default_factory=list)
+
+    def partials(self, mapped: dict[str, str]) -> list[str]:
+        """Chunk summaries in book order, from the store or from this run's map phase."""
+        return [self.reused[h] if h in self.reused else mapped[h] for h in self.hashes]
+
+async def load_partials(db: AsyncSession, hashes: list[str], fingerprint: str) -> dict[str, str]:
+    found = {}
+    distinct = sorted(set(hashes))
+    for start in range(0, len(distinct), LOOKUP_BATCH_SIZE):
+        result = await db.execute(
+            select(models.ChunkSummary.content_hash, models.ChunkSummary.summary).where(
+                models.ChunkSummary.fingerprint == fingerprint,
+                models.ChunkSummary.content_hash.in_(distinct[start:start + LOOKUP_BATCH_SIZE]),
+            )
+        )
+        found.update(result.all())
+    return found
+
+async def plan_chunks(db: AsyncSession, texts: list[str], fingerprint: str) -> ChunkPlan:
+    hashes = [chunk_hash(text) for text in texts]
+    plan = ChunkPlan(hashes, reused=await load_partials(db, hashes, fingerprint))
+    seen = set(plan.reused)
+    for index, h in enumerate(hashes):
+        if h not in seen:
+            seen.add(h)
+            plan.to_map.append(index)
+    return plan
+
+async def save_partials(db: AsyncSession, partials: dict[str, str], fingerprint: str):
+    """Store new chunk summaries; a chunk another worker stored meanwhile keeps its first summary."""
+    if not partials:
+        return
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    await db.execute(
+        dialect.insert(models.ChunkSummary).on_conflict_do_nothing(),
+        [{"content_hash": h, "fingerprint": fingerprint, "summary": summary} for h, summary in partials.items()],
+    )
+    await db.commit()
@@ -0,0 +1,121 @@
+# book_manager/app/services/export.py
+# Streams the catalog or all reviews as NDJSON or CSV straight off a server-side cursor,
+# so memory stays flat however large the export is. Rows come out in id order; to
+# resume an interrupted export pass the last id received as ``after_id``.
+import csv
+import io
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import orjson
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db import models
+
+BATCH_SIZE = 1000
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+BOOK_COLUMNS = (
+    models.Book.id, models.Book.title, models.Book.author, models.Book.genre, models.Book.year_published,
+    models.Book.summary, models.Book.summary_status, models.Book.updated_at,
+)
+REVIEW_COLUMNS = (
+    models.Review.id, models.Review.book_id, models.Review.user_id, models.Review.review_text,
+    models.Review.rating, models.Review.created_at,
+)
+
+@dataclass(frozen=True)
+class ExportFilters:
+    genre: Optional[str] = None
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+    updated_since: Optional[datetime] = None
+    after_id: int = 0
+
+def export_query(kind: str, filters: ExportFilters):
+    """Books are filtered directly; reviews by their book's genre/year and by when they were written."""
+    if kind == "books":
+        entity, query = models.Book, select(*BOOK_COLUMNS)
+        updated_column = models.Book.updated_at
+    elif kind == "reviews":
+        entity, query = models.Review, select(*REVIEW_COLUMNS)
+        updated_column = models.Review.created_at
+        if filters.genre is not None or filters.year_from is not None or filters.year_to is not None:
+            query = query.join(models.Book, models.Book.id == models.Review.book_id)
+    else:
+        raise ValueError(f"Unknown export kind: {kind}")
+
+    if filters.genre is not None:
+        query = query.where(func.lower(models.Book.genre) == filters.genre.lower())
+    if filters.year_from is not None:
+        query = query.where(models.Book.year_published >= filters.year_from)
+    if filters.year_to is not None:
+        query = query.where(models.Book.year_published <= filters.year_to)
+    if filters.updated_since is not None:
+        query = query.where(updated_column >= filters.updated_since)
+    # keyset resume: cheap on the primary key however far into the export it is
+    return query.where(entity.id > filters.after_id).order_by(entity.id)
+
+def column_names(kind: str) -> list[str]:
+    return [column.key for column in (BOOK_COLUMNS if kind == "books" else REVIEW_COLUMNS)]
+
+def encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+class NDJSONEncoder:
+    def header(self, columns: list[str]) -> bytes:
+        return b""
+
+    def rows(self, columns: list[str], rows) -> bytes:
+        return b"".join(orjson.dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+class CSVEncoder:
+    def header(self, columns: list[str]) -> bytes:
+        return self.rows(columns, [columns])
+
+    def rows(self, columns: list[str], rows) -> bytes:
+        out = io.StringIO()
+        csv.writer(out).writerows([encode_value(value) for value in row] for row in rows)
+        return out.getvalue().encode("utf-8")
+
+ENCODERS = {"ndjson": NDJSONEncoder, "csv": CSVEncoder}
+
+class GzipStream:
+    """Incremental gzip; each chunk is flushed so clients can decode as data arrives."""
+
+    def __init__(self, level: int = 6):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+async def stream_rows(db: AsyncSession, kind: str, filters: ExportFilters, batch_size: int = BATCH_SIZE):
+    """Batches of result rows from a server-side cursor, at most ``batch_size`` rows held at once."""
+    query = export_query(kind, filters).execution_options(yield_per=batch_size)
+    result = await db.stream(query)
+    async for partition in result.partitions(batch_size):
+        yield partition
+
+async def export_bytes(db: AsyncSession, kind: str, fmt: str, filters: ExportFilters, gzip: bool = False,
+                       batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+    encoder = ENCODERS[fmt]()
+    compressor = GzipStream() if gzip else None
+    columns = column_names(kind)
+
+    def emit(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    header = encoder.header(columns)
+    if header:
+        yield emit(header)
+    async for rows in stream_rows(db, kind, filters, batch_size):
+        yield emit(encoder.rows(columns, rows))
+    if compressor:
+        yield compressor.finish()
@@ -0,0 +1,77 @@
+# book_manager/app/services/llm.py
+# Service boundary for the LangChain/Ollama stack. Nothing heavy is imported at module
+# load; the first caller pays the import, and workers started with AI_ENABLED=false never do.
+from functools import lru_cache
+from typing import Optional
+from app.core.config import settings
+from app.services.llm_pool import llm_pool
+from app.services.llm_scheduler import llm_scheduler, Priority
+
+DEFAULT_MODEL = "llama3"
+
+class AIUnavailableError(RuntimeError):
+    pass
+
+def ensure_ai_enabled():
+    if not settings.AI_ENABLED:
+        raise AIUnavailableError("AI features are disabled on this worker")
+
+@lru_cache(maxsize=None)
+def _backend_chat_model(base_url: str, model: str, temperature: Optional[float]):
+    from langchain_ollama import ChatOllama
+
+    kwargs = {"model": model, "base_url": base_url}
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    return ChatOllama(**kwargs)
+
+@lru_cache(maxsize=None)
+def _pooled_chat_class():
+    from langchain_ollama import ChatOllama
+
+    class PooledChatOllama(ChatOllama):
+        """ChatOllama that sends each call to the backend llm_pool picks for it.
+
+        With a priority, calls first wait for an llm_scheduler slot, which requires
+        running in an anyio worker thread.
+        """
+
+        priority: Optional[int] = None
+
+        def _generate(self, *args, **kwargs):
+            if self.priority is None:
+                return self._generate_on_pool(*args, **kwargs)
+            with llm_scheduler.blocking_slot(Priority(self.priority)):
+                return self._generate_on_pool(*args, **kwargs)
+
+        def _generate_on_pool(self, *args, **kwargs):
+            with llm_pool.lease(self.model) as backend:
+                return _backend_chat_model(backend.url, self.model, self.temperature)._generate(*args, **kwargs)
+
+        async def _agenerate(self, *args, **kwargs):
+            async with llm_pool.alease(self.model) as backend:
+                return await _backend_chat_model(backend.url, self.model, self.temperature)._agenerate(*args, **kwargs)
+
+    return PooledChatOllama
+
+def get_chat_model(temperature: float = None, model: str = DEFAULT_MODEL, cached: bool = False,
+                   priority: Priority = None):
+    """Build a chat model whose calls are spread over llm_pool's backends.
+
+    With ``priority`` each call is also admitted through llm_scheduler. Callers on the
+    event loop pass no priority and wrap the call in ``llm_scheduler.slot`` themselves;
+    chains running in worker threads pass one so every chunk call queues.
+    """
+    ensure_ai_enabled()
+    kwargs = {"model": model, "base_url": settings.llama_endpoints[0]}
+    if priority is not None:
+        kwargs["priority"] = int(priority)
+    if temperature is not None:
+        kwargs["temperature"] = temperature
+    if cached:
+        from app.services.llm_cache import llm_cache, langchain_cache_class
+        kwargs["cache"] = langchain_cache_class()(llm_cache)
+    return _pooled_chat_class()(**kwargs)
+
+def message_text(message) -> str:
+    return (message.content if hasattr(message, "content") else str(message)).strip()
@@ -0,0 +1,300 @@
+# book_manager/app/services/llm_cache.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from functools import lru_cache
+from typing import Awaitable, Callable, Optional
+
+from anyio import to_thread
+
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_responses_last_access ON llm_responses (last_access);
+CREATE TABLE IF NOT EXISTS llm_leases (
+    key TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS llm_cache_stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total_bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO llm_cache_stats (id, total_bytes) SELECT 1, COALESCE(SUM(size), 0) FROM llm_responses;
+CREATE TRIGGER IF NOT EXISTS llm_responses_size_insert AFTER INSERT ON llm_responses BEGIN
+    UPDATE llm_cache_stats SET total_bytes = total_bytes + NEW.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS llm_responses_size_update AFTER UPDATE OF size ON llm_responses BEGIN
+    UPDATE llm_cache_stats SET total_bytes = total_bytes + NEW.size - OLD.size WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS llm_responses_size_delete AFTER DELETE ON llm_responses BEGIN
+    UPDATE llm_cache_stats SET total_bytes = total_bytes - OLD.size WHERE id = 1;
+END;
+"""
+
+class LLMResponseCache:
+    """Prompt-keyed LLM response cache in a SQLite file shared by every worker process.
+
+    Entries are evicted least-recently-used once the stored responses exceed
+    ``max_bytes``; triggers keep a running byte total, so a store only scans for
+    victims when it pushes the total over the limit. Hits record their access time in
+    memory and write it back in batches (every ``touch_batch`` hits or
+    ``touch_interval`` seconds, and before each eviction). Identical concurrent
+    requests are coalesced twice over: within a process they await the same task, and
+    otherwise the first one takes a lease row while the others poll for its result.
+    Every generating caller holds the lease under its own owner token, so the async
+    and blocking paths of one process cannot both claim a key.
+    """
+
+    def __init__(self, path: str, max_bytes: int, lease_seconds: float = 600, poll_interval: float = 0.25,
+                 enabled: bool = True, touch_batch: int = 64, touch_interval: float = 5.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.enabled = enabled
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self._owner_prefix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        self._schema_ready = False
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._inflight_blocking: dict[str, threading.Event] = {}
+        self._inflight_lock = threading.Lock()
+        self._touches: dict[str, float] = {}
+        self._touch_lock = threading.Lock()
+        self._touches_flushed_at = time.monotonic()
+
+    @staticmethod
+    def make_key(model: str, prompt: str, **params) -> str:
+        # only parameters that change the output belong in params (temperature, chain type, ...)
+        payload = json.dumps(
+            {"model": model, "prompt": hashlib.sha256(prompt.encode()).hexdigest(), "params": params},
+            sort_keys=True, default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._schema_ready:
+                # one transaction, so the byte total is seeded before any trigger can count a row
+                conn.executescript(f"BEGIN IMMEDIATE;{SCHEMA}COMMIT;")
+                self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, key: str) -> Optional[str]:
+        row = self._connection().execute("SELECT response FROM llm_responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._touch(key)
+        return row[0]
+
+    def _touch(self, key: str):
+        now = time.time()
+        with self._touch_lock:
+            self._touches[key] = now
+            due = (len(self._touches) >= self.touch_batch
+                   or time.monotonic() - self._touches_flushed_at >= self.touch_interval)
+        if due:
+            self.flush_touches()
+
+    def flush_touches(self):
+        with self._touch_lock:
+            touches, self._touches = self._touches, {}
+            self._touches_flushed_at = time.monotonic()
+        if not touches:
+            return
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "UPDATE llm_responses SET last_access = MAX(last_access, ?) WHERE key = ?",
+                [(accessed, key) for key, accessed in touches.items()],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def total_bytes(self) -> int:
+        return self._connection().execute("SELECT total_bytes FROM llm_cache_stats WHERE id = 1").fetchone()[0]
+
+    def store(self, key: str, model: str, response: str):
+        conn = self._connection()
+        now = time.time()
+        # an upsert rather than INSERT OR REPLACE: REPLACE deletes without firing the size trigger
+        conn.execute(
+            "INSERT INTO llm_responses (key, model, response, size, created_at, last_access) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET model = excluded.model, "
+            "response = excluded.response, size = excluded.size, created_at = excluded.created_at, "
+            "last_access = excluded.last_access",
+            (key, model, response, len(response.encode()), now, now),
+        )
+        if self.total_bytes() > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Drop least recently used responses until the total is back within max_bytes."""
+        self.flush_touches()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            excess = self.total_bytes() - self.max_bytes
+            victims = []
+            # walks ix_llm_responses_last_access from the oldest end and stops once enough is freed
+            for key, size in conn.execute("SELECT key, size FROM llm_responses ORDER BY last_access, key"):
+                if excess <= 0:
+                    break
+                victims.append((key,))
+                excess -= size
+            conn.executemany("DELETE FROM llm_responses WHERE key = ?", victims)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def new_owner(self) -> str:
+        return f"{self._owner_prefix}-{uuid.uuid4().hex[:8]}"
+
+    def try_claim(self, key: str, owner: str) -> bool:
+        conn = self._connection()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT owner, expires_at FROM llm_leases WHERE key = ?", (key,)).fetchone()
+            # a response stored between the caller's lookup and this claim needs no new generation
+            stored = conn.execute("SELECT 1 FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if stored is not None or (row is not None and row[0] != owner and row[1] > now):
+                conn.execute("COMMIT")
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_leases (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, owner, now + self.lease_seconds),
+            )
+            conn.execute("COMMIT")
+            return True
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def release(self, key: str, owner: str):
+        self._connection().execute("DELETE FROM llm_leases WHERE key = ? AND owner = ?", (key, owner))
+
+    async def get_or_generate(self, key: str, model: str, generate: Callable[[], Awaitable[str]]) -> str:
+        if not self.enabled:
+            return await generate()
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._resolve(key, model, generate))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _resolve(self, key: str, model: str, generate: Callable[[], Awaitable[str]]) -> str:
+        owner = self.new_owner()
+        while True:
+            cached = await to_thread.run_sync(self.lookup, key)
+            if cached is not None:
+                return cached
+            if await to_thread.run_sync(self.try_claim, key, owner):
+                try:
+                    response = await generate()
+                    await to_thread.run_sync(self.store, key, model, response)
+                    return response
+                finally:
+                    await to_thread.run_sync(self.release, key, owner)
+            # another caller holds the lease; its result will show up in the table
+            await asyncio.sleep(self.poll_interval)
+
+    def get_or_generate_blocking(self, key: str, model: str, generate: Callable[[], str]) -> str:
+        """Thread-side variant for LangChain code that already runs off the event loop."""
+        if not self.enabled:
+            return generate()
+        while True:
+            with self._inflight_lock:
+                waiting_on = self._inflight_blocking.get(key)
+                if waiting_on is None:
+                    self._inflight_blocking[key] = threading.Event()
+            if waiting_on is not None:
+                waiting_on.wait()
+                cached = self.lookup(key)
+                if cached is not None:
+                    return cached
+                continue
+            try:
+                return self._resolve_blocking(key, model, generate)
+            finally:
+                with self._inflight_lock:
+                    self._inflight_blocking.pop(key).set()
+
+    def _resolve_blocking(self, key: str, model: str, generate: Callable[[], str]) -> str:
+        owner = self.new_owner()
+        while True:
+            cached = self.lookup(key)
+            if cached is not None:
+                return cached
+            if self.try_claim(key, owner):
+                try:
+                    response = generate()
+                    self.store(key, model, response)
+                    return response
+                finally:
+                    self.release(key, owner)
+            time.sleep(self.poll_interval)
+
+    def clear(self):
+        with self._touch_lock:
+            self._touches.clear()
+        self._connection().execute("DELETE FROM llm_responses")
+
+@lru_cache(maxsize=None)
+def langchain_cache_class():
+    """LangChain ``BaseCache`` over the shared store, for per-call reuse inside chains."""
+    from langchain_core.caches import BaseCache
+    from langchain_core.load import dumps, loads
+
+    class SharedLLMCache(BaseCache):
+        def __init__(self, store: LLMResponseCache):
+            self.store = store
+
+        def lookup(self, prompt: str, llm_string: str):
+            if not self.store.enabled:
+                return None
+            cached = self.store.lookup(self.store.make_key(llm_string, prompt))
+            return loads(cached) if cached is not None else None
+
+        def update(self, prompt: str, llm_string: str, return_val):
+            if self.store.enabled:
+                self.store.store(self.store.make_key(llm_string, prompt), llm_string, dumps(return_val))
+
+        def clear(self, **kwargs):
+            self.store.clear()
+
+    return SharedLLMCache
+
+llm_cache = LLMResponseCache(
+    settings.LLM_CACHE_PATH,
+    settings.LLM_CACHE_MAX_BYTES,
+    enabled=settings.LLM_CACHE_ENABLED,
+)
@@ -0,0 +1,201 @@
+# book_manager/app/services/llm_pool.py
+# Spreads LLM calls over the Ollama servers in LLAMA_ENDPOINTS. Each call goes to the
+# available backend with the fewest calls in flight, preferring servers that already
+# have the model loaded. Backends that keep failing are ejected for a while and come
+# back on their own once the ejection lapses; the health monitor keeps a dead backend
+# ejected and tracks which models each server has installed and loaded.
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import httpx
+
+from app.core.config import settings
+
+# an idle backend that would first have to load the model ranks like one with this many calls in flight
+COLD_MODEL_PENALTY = 2
+HEALTH_CHECK_TIMEOUT = 5.0
+
+def model_name(name: str) -> str:
+    """Ollama lists ``llama3`` as ``llama3:latest``."""
+    return name if ":" in name else f"{name}:latest"
+
+@dataclass
+class Backend:
+    url: str
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    # None until the first health check, when any model is assumed to be installed
+    models: Optional[frozenset] = None
+    loaded: frozenset = frozenset()
+    last_error: Optional[str] = None
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def has_model(self, model: str) -> bool:
+        return self.models is None or model in self.models
+
+    def as_dict(self, now: float) -> dict:
+        return {
+            "url": self.url,
+            "available": self.available(now),
+            "ejected_for": round(max(0.0, self.ejected_until - now), 3),
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "models": sorted(self.models) if self.models is not None else None,
+            "loaded": sorted(self.loaded),
+            "last_error": self.last_error,
+        }
+
+class LLMPool:
+    """Least-outstanding-requests routing over Ollama backends, with model affinity.
+
+    ``lease`` (threads) and ``alease`` (event loop) pick a backend and count the call
+    against it until it finishes. ``eject_after`` consecutive failed calls, or one
+    failed health check, eject a backend for ``eject_seconds``. If every backend is
+    ejected, calls go to the one due back first rather than failing outright.
+    """
+
+    def __init__(self, urls: list[str], eject_after: int, eject_seconds: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.backends = [Backend(url.rstrip("/")) for url in urls]
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def _choose(self, model: str) -> Backend:
+        now = self._clock()
+        candidates = [backend for backend in self.backends if backend.available(now)]
+        if not candidates:
+            return min(self.backends, key=lambda backend: backend.ejected_until)
+        candidates = [backend for backend in candidates if backend.has_model(model)] or candidates
+        # fewest requests so far breaks ties, so idle backends take turns
+        return min(candidates, key=lambda backend: (
+            backend.outstanding + (0 if model in backend.loaded else COLD_MODEL_PENALTY), backend.requests
+        ))
+
+    def acquire(self, model: str) -> Backend:
+        with self._lock:
+            backend = self._choose(model_name(model))
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def release(self, backend: Backend, model: str, error: Optional[BaseException] = None):
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.consecutive_failures = 0
+                # the server keeps the model in memory after answering
+                backend.loaded = backend.loaded | {model_name(model)}
+                return
+            backend.failures += 1
+            backend.consecutive_failures += 1
+            backend.last_error = str(error) or type(error).__name__
+            if backend.consecutive_failures >= self.eject_after:
+                self._eject(backend)
+
+    def _eject(self, backend: Backend):
+        backend.ejected_until = self._clock() + self.eject_seconds
+        backend.consecutive_failures = 0
+        backend.loaded = frozenset()
+
+    @contextmanager
+    def lease(self, model: str):
+        backend = self.acquire(model)
+        error = None
+        try:
+            yield backend
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(backend, model, error)
+
+    @asynccontextmanager
+    async def alease(self, model: str):
+        backend = self.acquire(model)
+        error = None
+        try:
+            yield backend
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(backend, model, error)
+
+    async def check(self, backend: Backend, client: httpx.AsyncClient) -> bool:
+        """Refresh installed (/api/tags) and loaded (/api/ps) models; eject the backend on failure or bad data."""
+        try:
+            tags = await client.get(f"{backend.url}/api/tags")
+            tags.raise_for_status()
+            running = await client.get(f"{backend.url}/api/ps")
+            running.raise_for_status()
+            models = frozenset(model_name(entry["name"]) for entry in tags.json().get("models", []))
+            loaded = frozenset(model_name(entry["name"]) for entry in running.json().get("models", []))
+        except (httpx.HTTPError, ValueError, KeyError, TypeError, AttributeError) as e:
+            with self._lock:
+                backend.last_error = f"health check failed: {str(e) or type(e).__name__}"
+                self._eject(backend)
+            return False
+        with self._lock:
+            backend.models, backend.loaded = models, loaded
+        return True
+
+    async def check_all(self) -> list[bool]:
+        async with httpx.AsyncClient(timeout=HEALTH_CHECK_TIMEOUT) as client:
+            return await asyncio.gather(*(self.check(backend, client) for backend in self.backends))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            return {"backends": [backend.as_dict(now) for backend in self.backends]}
+
+llm_pool = LLMPool(
+    settings.llama_endpoints,
+    eject_after=settings.LLM_EJECT_AFTER_FAILURES,
+    eject_seconds=settings.LLM_EJECT_SECONDS,
+)
+
+class LLMPoolMonitor:
+    """Health-checks every backend of ``pool`` each ``interval`` seconds."""
+
+    def __init__(self, pool: LLMPool, interval: float):
+        self.pool = pool
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.pool.check_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # a dead monitor would leave ejected backends out and model lists stale for good
+                print(f"LLM pool health check failed ({e!r}); retrying in {self.interval}s")
+            await asyncio.sleep(self.interval)
+
+llm_pool_monitor = LLMPoolMonitor(llm_pool, settings.LLM_HEALTH_CHECK_INTERVAL)
@@ -0,0 +1,168 @@
+# book_manager/app/services/llm_scheduler.py
+import asyncio
+import enum
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, asdict
+
+from anyio import from_thread
+
+from app.core.config import settings
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+class SchedulerQueueFull(RuntimeError):
+    def __init__(self, priority: Priority, retry_after: int):
+        super().__init__(f"LLM queue for {priority.name.lower()} requests is full")
+        self.priority = priority
+        self.retry_after = retry_after
+
+@dataclass
+class ClassStats:
+    queued: int = 0
+    running: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    # exponentially weighted averages, react to load changes faster than total/admitted
+    recent_wait: float = 0.0
+    recent_service: float = 0.0
+    completed: int = 0
+
+    def record_wait(self, waited: float):
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        self.recent_wait = waited if self.admitted == 1 else 0.8 * self.recent_wait + 0.2 * waited
+
+    def record_service(self, held: float):
+        self.completed += 1
+        self.recent_service = held if self.completed == 1 else 0.8 * self.recent_service + 0.2 * held
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["avg_wait"] = self.total_wait / self.admitted if self.admitted else 0.0
+        return data
+
+class LLMScheduler:
+    """Admits LLM calls in priority order, at most ``max_concurrency`` at a time.
+
+    The cap should match the Ollama servers' combined ``OLLAMA_NUM_PARALLEL`` so requests wait
+    here, where interactive calls can overtake queued background chunk calls, rather
+    than in Ollama's FIFO. Each class has its own queue limit; beyond it callers get
+    ``SchedulerQueueFull`` immediately instead of waiting behind an unbounded backlog.
+    """
+
+    def __init__(self, max_concurrency: int, queue_limits: dict):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = queue_limits
+        self.stats = {priority: ClassStats() for priority in Priority}
+        self._heap: list = []
+        self._seq = itertools.count()
+        self._running = 0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    def queue_depth(self, priority: Priority = None) -> int:
+        if priority is None:
+            return sum(stats.queued for stats in self.stats.values())
+        return self.stats[priority].queued
+
+    def retry_after(self, priority: Priority) -> int:
+        return max(1, math.ceil(self.stats[priority].recent_wait))
+
+    def estimated_wait(self, priority: Priority) -> float:
+        """Seconds until a newly queued call of this class would start, from recent service times."""
+        ahead = sum(self.stats[p].queued for p in Priority if p <= priority)
+        service = self.stats[priority].recent_service or self.stats[Priority.BACKGROUND].recent_service
+        return (ahead + 1) * service / self.max_concurrency
+
+    async def acquire(self, priority: Priority):
+        stats = self.stats[priority]
+        # release() hands slots to queued waiters first, so a free slot means nobody live is queued
+        if self._running < self.max_concurrency:
+            self._running += 1
+            stats.running += 1
+            stats.record_wait(0.0)
+            return
+        if stats.queued >= self.queue_limits[priority]:
+            stats.rejected += 1
+            raise SchedulerQueueFull(priority, self.retry_after(priority))
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._heap, (int(priority), next(self._seq), waiter))
+        stats.queued += 1
+        started = time.monotonic()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                # still queued: the heap entry is skipped when it comes up
+                stats.queued -= 1
+            else:
+                # the slot was handed over just as we were cancelled
+                stats.running += 1
+                self.release(priority)
+            raise
+        stats.running += 1
+        stats.record_wait(time.monotonic() - started)
+
+    def release(self, priority: Priority):
+        self._running -= 1
+        self.stats[priority].running -= 1
+        while self._heap and self._running < self.max_concurrency:
+            queued_priority, _, waiter = heapq.heappop(self._heap)
+            if waiter.cancelled():
+                continue
+            self.stats[Priority(queued_priority)].queued -= 1
+            self._running += 1
+            waiter.set_result(None)
+
+    def _finish(self, priority: Priority, held: float):
+        self.stats[priority].record_service(held)
+        self.release(priority)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority):
+        await self.acquire(priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._finish(priority, time.monotonic() - started)
+
+    @contextmanager
+    def blocking_slot(self, priority: Priority):
+        """For LLM calls made from worker threads started with ``anyio.to_thread``."""
+        from_thread.run(self.acquire, priority)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            from_thread.run_sync(self._finish, priority, time.monotonic() - started)
+
+    def metrics(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self._running,
+            "classes": {
+                priority.name.lower(): {**stats.as_dict(), "queue_limit": self.queue_limits[priority]}
+                for priority, stats in self.stats.items()
+            },
+        }
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.OLLAMA_NUM_PARALLEL * len(settings.llama_endpoints),
+    queue_limits={
+        Priority.INTERACTIVE: settings.LLM_QUEUE_LIMIT_INTERACTIVE,
+        Priority.BACKGROUND: settings.LLM_QUEUE_LIMIT_BACKGROUND,
+    },
+)
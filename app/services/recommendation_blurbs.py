@@ -0,0 +1,79 @@
+# book_manager/app/services/recommendation_blurbs.py
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable, Optional
+
+def blurb_key(genre, author, min_year, max_year, titles: Iterable[str]) -> str:
+    """Identical preferences matching the same set of books share one blurb, whoever asks."""
+    prefs = [(value or "").strip().lower() if isinstance(value, str) else value
+             for value in (genre, author, min_year, max_year)]
+    payload = json.dumps([prefs, sorted(set(titles))], default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class BlurbStore:
+    """Deadline-bounded, de-duplicated blurb generation with a bounded TTL cache.
+
+    A caller waits at most ``timeout`` seconds. If the LLM is slower, the generation
+    keeps running in the background and its result lands in the cache for the next
+    caller; concurrent callers with the same key share a single generation. A failed
+    generation is logged once and raised to the callers still waiting for it.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._cache: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def get_cached(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        expires_at, text = entry
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return text
+
+    def put(self, key: str, text: str):
+        self._cache[key] = (time.monotonic() + self.ttl, text)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def is_pending(self, key: str) -> bool:
+        return key in self._pending
+
+    async def get(self, key: str, generate: Callable[[], Awaitable[str]], timeout: float) -> Optional[str]:
+        cached = self.get_cached(key)
+        if cached is not None:
+            return cached
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.create_task(generate())
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+
+        try:
+            # shield: a timeout or client disconnect must not cancel the shared generation
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._pending.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            print(f"Recommendation blurb generation failed: {error!r}")
+            return
+        self.put(key, task.result())
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,222 @@
+# book_manager/app/services/recommender.py
+# Preference matching shared by GET /recommendations and the nightly batch job
+# (`python -m app.cli recommend`), which scores every user against every book with NumPy.
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.db import models
+
+GENRE_WEIGHT = 0.4
+AUTHOR_WEIGHT = 0.3
+MIN_YEAR_WEIGHT = 0.15
+MAX_YEAR_WEIGHT = 0.15
+# every weight is a multiple of 0.05, so score * 20 is an exact small integer
+SCORE_STEPS = 20
+
+def score_book(pref, book) -> float:
+    match_score = 0.0
+    if pref.genre and pref.genre.lower() in book.genre.lower():
+        match_score += GENRE_WEIGHT
+    if pref.author and pref.author.lower() in book.author.lower():
+        match_score += AUTHOR_WEIGHT
+    if pref.min_year and book.year_published is not None and book.year_published >= pref.min_year:
+        match_score += MIN_YEAR_WEIGHT
+    if pref.max_year and book.year_published is not None and book.year_published <= pref.max_year:
+        match_score += MAX_YEAR_WEIGHT
+    return match_score
+
+def rating(match_score: float) -> float:
+    return round(match_score * 5, 1)
+
+def confidence(match_score: float) -> str:
+    return "High" if match_score >= 0.8 else "Medium" if match_score >= 0.5 else "Low"
+
+def substring_table(needles: Sequence[str], haystacks: Sequence[str]) -> np.ndarray:
+    """``table[i, j]`` is whether ``needles[i]`` occurs in ``haystacks[j]``.
+
+    Built over distinct lowercase values, so the per-user work is a lookup. The extra
+    all-False last row and column are where missing values point.
+    """
+    table = np.zeros((len(needles) + 1, len(haystacks) + 1), dtype=bool)
+    if len(needles) and len(haystacks):
+        found = np.char.find(np.asarray(haystacks, dtype=str)[None, :], np.asarray(needles, dtype=str)[:, None])
+        table[:-1, :-1] = found >= 0
+    return table
+
+def chunk_table(values: Sequence[str], codes: np.ndarray, haystacks: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Substring table for just the ``values`` that ``codes`` use, and ``codes`` renumbered into it.
+
+    The missing-value code, ``len(values)``, sorts last and so lands on the all-False row.
+    """
+    used, local_codes = np.unique(codes, return_inverse=True)
+    present = used[used < len(values)]
+    return substring_table([values[code] for code in present], haystacks), local_codes
+
+def intern(values: Sequence[Optional[str]]) -> tuple[list[str], np.ndarray]:
+    """Distinct lowercase values and each input's code; missing values get code ``len(distinct)``."""
+    lowered = [value.lower() if value else None for value in values]
+    distinct = sorted({value for value in lowered if value is not None})
+    index = {value: code for code, value in enumerate(distinct)}
+    missing = len(distinct)
+    return distinct, np.fromiter((index.get(v, missing) for v in lowered), dtype=np.int32, count=len(lowered))
+
+def year_vector(years: Sequence[Optional[int]]) -> tuple[np.ndarray, np.ndarray]:
+    present = np.fromiter((year is not None for year in years), dtype=bool, count=len(years))
+    values = np.fromiter((year or 0 for year in years), dtype=np.int32, count=len(years))
+    return values, present
+
+@dataclass
+class BookMatrix:
+    ids: np.ndarray
+    genre_codes: np.ndarray
+    author_codes: np.ndarray
+    genres: list[str]
+    authors: list[str]
+    years: np.ndarray
+    has_year: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows) -> "BookMatrix":
+        """``rows`` of (id, genre, author, year_published), in the order ties should keep."""
+        ids, genres, authors, years = zip(*rows) if rows else ((), (), (), ())
+        genre_values, genre_codes = intern(genres)
+        author_values, author_codes = intern(authors)
+        year_values, has_year = year_vector(years)
+        return cls(np.asarray(ids, dtype=np.int64), genre_codes, author_codes, genre_values, author_values,
+                   year_values, has_year)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+@dataclass
+class UserMatrix:
+    usernames: list[str]
+    genres: list[str]
+    authors: list[str]
+    genre_codes: np.ndarray
+    author_codes: np.ndarray
+    min_years: np.ndarray
+    has_min_year: np.ndarray
+    max_years: np.ndarray
+    has_max_year: np.ndarray
+
+    @classmethod
+    def from_rows(cls, rows) -> "UserMatrix":
+        """``rows`` of (username, genre, author, min_year, max_year)."""
+        usernames, genres, authors, min_years, max_years = zip(*rows) if rows else ((), (), (), (), ())
+        genre_values, genre_codes = intern(genres)
+        author_values, author_codes = intern(authors)
+        # 0 means "no bound", as in score_book
+        min_values, has_min = year_vector([year or None for year in min_years])
+        max_values, has_max = year_vector([year or None for year in max_years])
+        return cls(
+            list(usernames), genre_values, author_values,
+            genre_codes, author_codes, min_values, has_min, max_values, has_max,
+        )
+
+    def __len__(self) -> int:
+        return len(self.usernames)
+
+def score_chunk(users: UserMatrix, books: BookMatrix, start: int, stop: int) -> np.ndarray:
+    """Scores of users[start:stop] against every book, summed in score_book's order.
+
+    Substring tables cover only the preferences of these users, so their size is bounded
+    by the chunk rather than by every distinct preference.
+    """
+    rows = slice(start, stop)
+    genre_table, genre_codes = chunk_table(users.genres, users.genre_codes[rows], books.genres)
+    author_table, author_codes = chunk_table(users.authors, users.author_codes[rows], books.authors)
+    genre = genre_table[genre_codes][:, books.genre_codes]
+    author = author_table[author_codes][:, books.author_codes]
+    min_ok = users.has_min_year[rows, None] & books.has_year & (books.years >= users.min_years[rows, None])
+    max_ok = users.has_max_year[rows, None] & books.has_year & (books.years <= users.max_years[rows, None])
+
+    scores = np.zeros(genre.shape, dtype=np.float64)
+    scores += GENRE_WEIGHT * genre
+    scores += AUTHOR_WEIGHT * author
+    scores += MIN_YEAR_WEIGHT * min_ok
+    scores += MAX_YEAR_WEIGHT * max_ok
+    return scores
+
+def top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Per row, indices of the k best books by rating (earlier book first on ties), and their scores.
+
+    Ratings and book position are folded into one unique int64 key, so argpartition
+    selects exactly what a stable sort would, without sorting every book.
+    """
+    n_books = scores.shape[1]
+    k = min(k, n_books)
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64), np.empty((scores.shape[0], 0))
+    steps = np.rint(scores * SCORE_STEPS).astype(np.int64)
+    keys = steps * n_books + (n_books - 1 - np.arange(n_books, dtype=np.int64))
+    best = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(keys, best, axis=1), axis=1)
+    best = np.take_along_axis(best, order, axis=1)
+    return best, np.take_along_axis(scores, best, axis=1)
+
+def chunk_size_for(books: BookMatrix, memory_bytes: int) -> int:
+    # per book: float64 scores plus int64 keys plus a handful of boolean/temporary matrices;
+    # per distinct book genre/author: a substring table row and its int64 find() result
+    bytes_per_user = max(len(books), 1) * 40 + (len(books.genres) + len(books.authors) + 2) * 9
+    return max(1, memory_bytes // bytes_per_user)
+
+def recommend_all(users: UserMatrix, books: BookMatrix, k: int,
+                  memory_bytes: int) -> Iterator[tuple[list[str], list[dict]]]:
+    """Yield, per chunk of users, their usernames and the rows to store: their top-k matching books."""
+    step = chunk_size_for(books, memory_bytes)
+    for start in range(0, len(users), step):
+        stop = min(start + step, len(users))
+        best, best_scores = top_k(score_chunk(users, books, start, stop), k)
+        rows = []
+        for offset, (indices, scores) in enumerate(zip(best, best_scores)):
+            username = users.usernames[start + offset]
+            matched = scores > 0
+            for rank, (index, match_score) in enumerate(zip(indices[matched], scores[matched]), start=1):
+                rows.append({
+                    "username": username,
+                    "book_id": int(books.ids[index]),
+                    "rank": rank,
+                    "rating": rating(float(match_score)),
+                    "confidence": confidence(float(match_score)),
+                })
+        yield users.usernames[start:stop], rows
+
+async def load_books(db: AsyncSession) -> BookMatrix:
+    result = await db.execute(
+        select(models.Book.id, models.Book.genre, models.Book.author, models.Book.year_published)
+        .order_by(models.Book.id)
+    )
+    return BookMatrix.from_rows(result.all())
+
+async def load_users(db: AsyncSession) -> UserMatrix:
+    result = await db.execute(
+        select(models.User.username, models.User.genre, models.User.author, models.User.min_year, models.User.max_year)
+        .order_by(models.User.username)
+    )
+    return UserMatrix.from_rows(result.all())
+
+async def run_batch(session_factory, k: int, memory_bytes: int) -> tuple[int, int]:
+    """Recompute and store every user's top-k; each chunk replaces its users' rows in one transaction."""
+    async with session_factory() as db:
+        books = await load_books(db)
+        users = await load_users(db)
+
+    generated_at = datetime.utcnow()
+    stored = 0
+    for usernames, rows in recommend_all(users, books, k, memory_bytes):
+        async with session_factory() as db:
+            await db.execute(delete(models.UserRecommendation).where(models.UserRecommendation.username.in_(usernames)))
+            if rows:
+                await db.execute(
+                    insert(models.UserRecommendation), [{**row, "generated_at": generated_at} for row in rows]
+                )
+            await db.commit()
+        stored += len(rows)
+    return len(users), stored
@@ -0,0 +1,166 @@
+# book_manager/app/services/review_batcher.py
+# Optional group commit for POST /books/{id}/reviews (REVIEW_GROUP_COMMIT): many small
+# inserts become one multi-row INSERT and one commit, so write throughput is bounded by
+# transactions per batch rather than per review.
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.future import select
+
+from app.core.config import settings
+from app.db import models
+from app.db.database import SessionLocal
+from app.services.catalog_cache import commit_with_invalidation, reviews_changed
+
+class BookNotFound(Exception):
+    pass
+
+def writer_stopped() -> RuntimeError:
+    return RuntimeError("Review writer stopped; the review may not have been saved")
+
+@dataclass
+class PendingReview:
+    book_id: int
+    user_id: str
+    review_text: str
+    rating: int
+    future: asyncio.Future
+
+    def values(self) -> dict:
+        return {"book_id": self.book_id, "user_id": self.user_id, "review_text": self.review_text, "rating": self.rating}
+
+class ReviewBatcher:
+    """Group commit for review submissions.
+
+    Reviews wait up to ``flush_interval`` seconds (or until ``max_batch`` are queued)
+    and are then written together: one existence check for their books, one multi-row
+    INSERT ... RETURNING id, one review_version bump per book and a single commit.
+    Each submitter gets its own row back, or its own error: reviews for missing books
+    fail with BookNotFound, and if the batch transaction fails the rows are retried one
+    by one so a bad row cannot sink the others. If the writer itself fails or is stopped
+    at shutdown, every review it still holds fails rather than waiting forever. A
+    submitter that goes away after queuing does not withdraw its review.
+    """
+
+    def __init__(self, session_factory, max_batch: int, flush_interval: float):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending: list[PendingReview] = []
+        self._full: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def submit(self, book_id: int, user_id: str, review_text: str, rating: int) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(PendingReview(book_id, user_id, review_text, rating, future))
+        if self._worker is None:
+            # created per worker run, so the event always belongs to the running loop
+            self._full = asyncio.Event()
+            self._worker = asyncio.create_task(self._run())
+        if len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def stop(self):
+        """Cancel the worker; reviews it has not written fail instead of waiting forever."""
+        if self._worker is not None:
+            worker = self._worker
+            worker.cancel()
+            try:
+                await worker
+            except asyncio.CancelledError:
+                pass
+        # a worker cancelled before its first step never reaches its own cleanup
+        self._fail(self._pending, writer_stopped())
+        self._pending = []
+        self._worker = None
+
+    @staticmethod
+    def _fail(reviews: list[PendingReview], error: BaseException):
+        for review in reviews:
+            if not review.future.done():
+                review.future.set_exception(error)
+
+    async def _run(self):
+        batch = []
+        error: BaseException = writer_stopped()
+        try:
+            while self._pending:
+                if len(self._pending) < self.max_batch:
+                    try:
+                        await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                self._full.clear()
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                await self._flush(batch)
+                batch = []
+        except Exception as e:
+            print(f"Review batch writer failed: {e!r}")
+            error = e
+        finally:
+            # after an unexpected error or cancellation, nobody else would resolve these
+            self._fail(batch + self._pending, error)
+            self._pending = []
+            self._worker = None
+
+    async def _flush(self, batch: list[PendingReview]):
+        try:
+            results = await self._write(batch)
+        except Exception:
+            results = []
+            for review in batch:
+                try:
+                    results.extend(await self._write([review]))
+                except Exception as e:
+                    results.append(e)
+        for review, result in zip(batch, results):
+            if review.future.done():
+                continue  # the submitter was cancelled; its row is written regardless
+            if isinstance(result, Exception):
+                review.future.set_exception(result)
+            else:
+                review.future.set_result(result)
+
+    async def _write(self, batch: list[PendingReview]) -> list:
+        """One transaction for the whole batch; returns a row dict or BookNotFound per review."""
+        async with self.session_factory() as db:
+            book_ids = {review.book_id for review in batch}
+            result = await db.execute(select(models.Book.id).where(models.Book.id.in_(book_ids)))
+            existing = set(result.scalars())
+            accepted = [review for review in batch if review.book_id in existing]
+
+            ids = []
+            if accepted:
+                result = await db.execute(
+                    insert(models.Review).returning(models.Review.id, sort_by_parameter_order=True),
+                    [review.values() for review in accepted],
+                )
+                ids = list(result.scalars())
+                counts = Counter(review.book_id for review in accepted)
+                # a Core UPDATE on the table: the ORM would treat a list of parameters as bulk-by-primary-key
+                books = models.Book.__table__
+                await db.execute(
+                    update(books)
+                    .where(books.c.id == bindparam("b_id"))
+                    .values(review_version=books.c.review_version + bindparam("added")),
+                    [{"b_id": book_id, "added": added} for book_id, added in counts.items()],
+                )
+            await commit_with_invalidation(db, *(reviews_changed(book_id) for book_id in sorted(book_ids & existing)))
+
+        rows = iter(zip(accepted, ids))
+        results = []
+        for review in batch:
+            if review.book_id in existing:
+                _, review_id = next(rows)
+                results.append({"id": review_id, **review.values()})
+            else:
+                results.append(BookNotFound(review.book_id))
+        return results
+
+review_batcher = ReviewBatcher(
+    SessionLocal, max_batch=settings.REVIEW_BATCH_MAX_SIZE, flush_interval=settings.REVIEW_BATCH_FLUSH_INTERVAL
+)
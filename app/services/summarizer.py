@@ -0,0 +1,225 @@
+# book_manager/app/services/summarizer.py
+# PDF parsing, splitting and the LangChain summarize chain. Imports are deferred to
+# first use (see app/services/llm.py); all functions here are blocking and meant to
+# run in a worker thread.
+import threading
+from functools import lru_cache, partial
+from typing import Callable, Optional
+
+from anyio import CapacityLimiter, create_task_group, from_thread, to_thread
+
+from app.core.config import settings
+from app.services.book_text import chunker_fingerprint, summary_fingerprint
+from app.services.chunk_summaries import partial_fingerprint
+from app.services.llm import ensure_ai_enabled, get_chat_model, message_text, DEFAULT_MODEL
+from app.services.llm_cache import llm_cache
+from app.services.llm_scheduler import Priority
+from app.services.text_cleanup import CleanupStats, estimate_tokens, near_duplicate_indices, strip_boilerplate
+
+QUICK_SUMMARY_PAGES = 10
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 150
+# prompt budget for one reduce call, as in LangChain's map_reduce chain
+REDUCE_TOKEN_MAX = 3000
+
+def extract_page_texts(file_path: str) -> list[str]:
+    """Text of every page; quick summaries select their pages later, so the PDF is parsed once."""
+    ensure_ai_enabled()
+    from langchain_community.document_loaders import PyMuPDFLoader
+
+    return [page.page_content for page in PyMuPDFLoader(file_path).load()]
+
+def select_pages(pages: list[str], quick: bool = False) -> list[str]:
+    return pages[:QUICK_SUMMARY_PAGES] if quick else pages
+
+def chunker_for(pages: list[str]) -> str:
+    return chunker_fingerprint(len(pages), CHUNK_SIZE, CHUNK_OVERLAP)
+
+def documents_from_texts(texts: list[str]):
+    from langchain_core.documents import Document
+
+    return [Document(page_content=text, metadata={"page": index}) for index, text in enumerate(texts)]
+
+def split_pages(pages):
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    return splitter.split_documents(pages)
+
+def chunk_tokens(docs) -> int:
+    return sum(estimate_tokens(doc.page_content) for doc in docs)
+
+def strip_page_boilerplate(pages: list[str], stats: CleanupStats):
+    texts, stats.lines_removed = strip_boilerplate(pages)
+    return [doc for doc in documents_from_texts(texts) if doc.page_content.strip()]
+
+def drop_duplicate_chunks(docs, stats: CleanupStats):
+    duplicates = near_duplicate_indices([doc.page_content for doc in docs])
+    kept = [doc for index, doc in enumerate(docs) if index not in duplicates]
+    stats.chunks_removed = len(duplicates)
+    stats.tokens_after = chunk_tokens(kept)
+    return kept
+
+def prepare_documents(pages: list[str]) -> tuple[list, CleanupStats]:
+    """Boilerplate-free, de-duplicated chunks ready for the summarize chain."""
+    stats = CleanupStats()
+    # both sides are counted on split chunks, so chunk overlap is not mistaken for added text
+    stats.tokens_before = chunk_tokens(split_pages(documents_from_texts(pages)))
+    docs = drop_duplicate_chunks(split_pages(strip_page_boilerplate(pages, stats)), stats)
+    if not docs:
+        raise ValueError("No summarizable text could be extracted from the PDF")
+    return docs, stats
+
+def choose_summary_chain_type(docs) -> str:
+    # Choose refine if many long documents, else use map_reduce
+    avg_length = sum(len(doc.page_content) for doc in docs) / len(docs)
+    if len(docs) > 20 or avg_length > 1000:
+        return "refine"
+    else:
+        return "map_reduce"
+
+def expected_llm_calls(chain_type: str, docs) -> int:
+    # map_reduce runs one map call per chunk plus the combine step; refine runs one call per chunk
+    return len(docs) + 1 if chain_type == "map_reduce" else len(docs)
+
+@lru_cache(maxsize=None)
+def _progress_handler_class():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMCallProgressHandler(BaseCallbackHandler):
+        """Counts finished LLM calls of the summarize chain."""
+
+        def __init__(self, on_call_done: Callable[[int], None]):
+            self.on_call_done = on_call_done
+            self.calls_done = 0
+
+        def on_llm_end(self, response, **kwargs):
+            self.calls_done += 1
+            self.on_call_done(self.calls_done)
+
+    return LLMCallProgressHandler
+
+def summarize_documents(docs, chain_type: str, on_call_done: Optional[Callable[[int], None]] = None) -> str:
+    from langchain.chains.summarize import load_summarize_chain
+    from app.core.prompt_templates import SUMMARY_PROMPT_TEXT, summary_prompt_template
+
+    def run_chain() -> str:
+        # per-call caching lets a re-upload reuse chunk results even when the whole book differs
+        chain = load_summarize_chain(get_chat_model(cached=True, priority=Priority.BACKGROUND), chain_type=chain_type)
+        chain.llm_chain.prompt = summary_prompt_template()
+
+        callbacks = [_progress_handler_class()(on_call_done)] if on_call_done else []
+        res = chain.invoke(docs, config={"callbacks": callbacks})
+        return res["output_text"] if isinstance(res, dict) else res
+
+    # identical uploads (same chunks, template and chain) share one chain run across all workers
+    book_text = "\x1e".join(doc.page_content for doc in docs)
+    key = llm_cache.make_key(DEFAULT_MODEL, book_text, chain_type=chain_type, template=SUMMARY_PROMPT_TEXT)
+    return llm_cache.get_or_generate_blocking(key, DEFAULT_MODEL, run_chain)
+
+def summary_prompts(texts: list[str]) -> list[str]:
+    from app.core.prompt_templates import SUMMARY_PROMPT_TEXT
+
+    return [SUMMARY_PROMPT_TEXT.format(text=text) for text in texts]
+
+def run_prompts(prompts: list[str], on_call_done: Optional[Callable[[int], None]] = None) -> list[str]:
+    """Responses to ``prompts``, at most OLLAMA_NUM_PARALLEL calls at a time.
+
+    Runs in an anyio worker thread. Each call gets an anyio worker thread of its own
+    rather than one from LangChain's batch executor, because the scheduler slot and
+    ``on_call_done`` both reach the event loop through ``anyio.from_thread``.
+    """
+    if not prompts:
+        return []
+    model = get_chat_model(cached=True, priority=Priority.BACKGROUND)
+    results = [""] * len(prompts)
+    calls_done = 0
+    lock = threading.Lock()
+
+    def invoke(index: int):
+        nonlocal calls_done
+        results[index] = message_text(model.invoke(prompts[index]))
+        if on_call_done:
+            with lock:
+                calls_done += 1
+                done = calls_done
+            on_call_done(done)
+
+    async def invoke_all():
+        limiter = CapacityLimiter(settings.OLLAMA_NUM_PARALLEL)
+        async with create_task_group() as group:
+            for index in range(len(prompts)):
+                group.start_soon(partial(to_thread.run_sync, invoke, index, limiter=limiter))
+
+    from_thread.run(invoke_all)
+    return results
+
+def map_chunks(texts: list[str], on_call_done: Optional[Callable[[int], None]] = None) -> list[str]:
+    """The map phase on its own: one summary per chunk."""
+    return run_prompts(summary_prompts(texts), on_call_done)
+
+def group_partials(partials: list[str], token_max: int = REDUCE_TOKEN_MAX) -> list[list[str]]:
+    """Consecutive partials packed into reduce calls of at most ``token_max`` tokens.
+
+    Every group but the last takes at least two partials, so each round at least halves
+    the count even when single partials are near the budget.
+    """
+    groups, current, tokens = [], [], 0
+    for partial in partials:
+        size = estimate_tokens(partial)
+        if len(current) >= 2 and tokens + size > token_max:
+            groups.append(current)
+            current, tokens = [], 0
+        current.append(partial)
+        tokens += size
+    if current:
+        groups.append(current)
+    return groups
+
+def reduce_partials(partials: list[str], on_round: Optional[Callable[[int], None]] = None,
+                    on_call_done: Optional[Callable[[int], None]] = None) -> str:
+    """Combine chunk summaries into one, in rounds until a single summary remains.
+
+    ``on_round`` gets the number of calls each round is about to make. Calls go through
+    the LLM cache, so groups of unchanged partials are not recombined either.
+    """
+    if not partials:
+        raise ValueError("No summarizable text could be extracted from the PDF")
+    level = partials
+    calls_done = 0
+
+    def count_call(_):
+        nonlocal calls_done
+        calls_done += 1
+        if on_call_done:
+            on_call_done(calls_done)
+
+    while True:
+        groups = group_partials(level)
+        if on_round:
+            on_round(len(groups))
+        level = run_prompts(summary_prompts(["\n\n".join(group) for group in groups]), count_call)
+        if len(level) == 1:
+            return level[0]
+
+def current_partial_fingerprint() -> str:
+    from app.core.prompt_templates import SUMMARY_PROMPT_TEXT
+
+    return partial_fingerprint(SUMMARY_PROMPT_TEXT, DEFAULT_MODEL)
+
+def current_summary_fingerprint(chunker: str) -> str:
+    from app.core.prompt_templates import SUMMARY_PROMPT_TEXT
+
+    return summary_fingerprint(SUMMARY_PROMPT_TEXT, chunker)
+
+def preload():
+    """Import the whole AI stack up front so the first upload on this worker doesn't pay for it."""
+    ensure_ai_enabled()
+    import langchain.chains.summarize  # noqa: F401
+    import langchain_community.document_loaders  # noqa: F401
+    import langchain_text_splitters  # noqa: F401
+    import langchain_ollama  # noqa: F401
+    from app.core.prompt_templates import recommendation_prompt, summary_prompt_template
+
+    summary_prompt_template()
+    recommendation_prompt()
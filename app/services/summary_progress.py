@@ -0,0 +1,94 @@
+# book_manager/app/services/summary_progress.py
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, replace
+from typing import AsyncIterator, Optional
+
+from app.db.models import SummaryStatus
+
+TERMINAL_STATUSES = {SummaryStatus.COMPLETED.value, SummaryStatus.FAILED.value}
+
+@dataclass(frozen=True)
+class SummaryProgress:
+    book_id: int
+    status: str = SummaryStatus.PENDING.value
+    stage: str = "queued"
+    chunks_done: int = 0
+    chunks_total: int = 0
+    tokens_removed: int = 0
+    version: int = 0
+    error: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["summary_ready"] = self.status == SummaryStatus.COMPLETED.value
+        return data
+
+class SummaryProgressTracker:
+    """In-process registry of summary job progress.
+
+    Jobs run as background tasks inside the worker that accepted the upload, so
+    the worker can wake long-poll and SSE waiters the moment state changes
+    instead of clients hammering the database. Must be called from the event
+    loop thread; worker threads go through ``anyio.from_thread``.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._states: "OrderedDict[int, SummaryProgress]" = OrderedDict()
+        self._changed: dict[int, asyncio.Event] = {}
+
+    def get(self, book_id: int) -> Optional[SummaryProgress]:
+        return self._states.get(book_id)
+
+    def update(self, book_id: int, **changes) -> SummaryProgress:
+        current = self._states.get(book_id) or SummaryProgress(book_id=book_id)
+        state = replace(current, version=current.version + 1, **changes)
+        self._states[book_id] = state
+        self._states.move_to_end(book_id)
+        self._evict()
+
+        event = self._changed.pop(book_id, None)
+        if event is not None:
+            event.set()
+        return state
+
+    def _evict(self):
+        while len(self._states) > self._max_entries:
+            book_id, _ = self._states.popitem(last=False)
+            event = self._changed.pop(book_id, None)
+            if event is not None:
+                event.set()
+
+    def active(self) -> list[SummaryProgress]:
+        return [state for state in self._states.values() if not state.finished]
+
+    async def wait_for_change(self, book_id: int, since_version: int, timeout: float) -> Optional[SummaryProgress]:
+        state = self._states.get(book_id)
+        if state is not None and state.version > since_version:
+            return state
+        event = self._changed.setdefault(book_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._states.get(book_id)
+
+    async def subscribe(self, book_id: int, heartbeat: float = 15.0) -> AsyncIterator[Optional[SummaryProgress]]:
+        """Yield every new state until the job finishes; ``None`` marks a heartbeat."""
+        version = -1
+        while True:
+            state = await self.wait_for_change(book_id, version, heartbeat)
+            if state is None or state.version <= version:
+                yield None
+                continue
+            version = state.version
+            yield state
+            if state.finished:
+                return
+
+summary_progress = SummaryProgressTracker()
@@ -0,0 +1,141 @@
+# book_manager/app/services/text_cleanup.py
+# Strips text that costs LLM calls without adding content: running headers/footers,
+# page numbers, copyright lines, tables of contents and near-duplicate chunks.
+import re
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+# front-matter pages only run to a few dozen, so roman numerals are limited to i..xxxix
+ROMAN = r"x{0,3}(ix|iv|v?i{0,3})"
+PAGE_NUMBER_RE = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+# roman page numbers and copyright notices read like chapter headings and prose in the body,
+# so outside the front matter they are only dropped when they repeat as headers/footers
+ROMAN_PAGE_NUMBER_RE = re.compile(rf"^(page\s*)?(?=[ivx]){ROMAN}$", re.IGNORECASE)
+TOC_LINE_RE = re.compile(rf"^.{{2,}}?(\.\s?){{3,}}\s*(\d+|(?=[ivx]){ROMAN})$", re.IGNORECASE)
+BOILERPLATE_RE = re.compile(r"©|\(c\)\s*\d{4}|copyright\s+\d{4}|all rights reserved|isbn[\s:-]", re.IGNORECASE)
+ISBN_RE = re.compile(r"isbn[\s:-]", re.IGNORECASE)
+WORD_RE = re.compile(r"\w+")
+
+# a line repeated on at least this share of pages (and MIN_REPEAT_PAGES pages) is a header/footer
+REPEATED_LINE_FRACTION = 0.5
+MIN_REPEAT_PAGES = 3
+MAX_REPEATED_LINE_LENGTH = 120
+# front matter ends at the last of these leading pages that has a TOC entry or an ISBN
+FRONT_MATTER_MAX_PAGES = 30
+
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+DUPLICATE_THRESHOLD = 0.85
+_MERSENNE_PRIME = (1 << 61) - 1
+
+@dataclass
+class CleanupStats:
+    tokens_before: int = 0
+    tokens_after: int = 0
+    lines_removed: int = 0
+    chunks_removed: int = 0
+
+    @property
+    def tokens_removed(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text with llama-style tokenizers
+    return len(text) // 4
+
+def normalize_line(line: str) -> str:
+    # page numbers inside running headers differ per page, so digits are folded together
+    return re.sub(r"\d+", "#", " ".join(line.split()).lower())
+
+def is_noise_line(line: str, front_matter: bool = False) -> bool:
+    stripped = line.strip()
+    if PAGE_NUMBER_RE.match(stripped) or TOC_LINE_RE.match(stripped):
+        return True
+    return front_matter and bool(ROMAN_PAGE_NUMBER_RE.match(stripped) or BOILERPLATE_RE.search(stripped))
+
+def front_matter_pages(page_lines: list[list[str]]) -> int:
+    """How many leading pages are front matter (title, copyright and contents pages)."""
+    end = 0
+    for index, lines in enumerate(page_lines[:FRONT_MATTER_MAX_PAGES]):
+        if any(TOC_LINE_RE.match(line.strip()) or ISBN_RE.search(line) for line in lines):
+            end = index + 1
+    return end
+
+def strip_boilerplate(pages: list[str]) -> tuple[list[str], int]:
+    """Drop repeated header/footer lines, page numbers, TOC entries and front-matter copyright lines.
+
+    Returns the cleaned page texts and the number of lines removed. Pages without
+    noise are returned unchanged.
+    """
+    page_lines = [page.splitlines() for page in pages]
+    seen_on_pages = Counter()
+    for lines in page_lines:
+        seen_on_pages.update({normalize_line(line) for line in lines if line.strip()})
+
+    threshold = max(MIN_REPEAT_PAGES, REPEATED_LINE_FRACTION * len(pages))
+    repeated = {
+        line for line, count in seen_on_pages.items()
+        if count >= threshold and len(line) <= MAX_REPEATED_LINE_LENGTH
+    }
+    front_matter = front_matter_pages(page_lines)
+
+    cleaned, removed = [], 0
+    for index, (page, lines) in enumerate(zip(pages, page_lines)):
+        kept = [
+            line for line in lines
+            if not line.strip()
+            or not (normalize_line(line) in repeated or is_noise_line(line, front_matter=index < front_matter))
+        ]
+        removed += len(lines) - len(kept)
+        cleaned.append(page if len(kept) == len(lines) else "\n".join(kept))
+    return cleaned, removed
+
+def _shingle_hashes(text: str) -> np.ndarray:
+    words = WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+def _permutations(seed: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+    b = rng.integers(0, 1 << 31, size=NUM_PERMUTATIONS, dtype=np.uint64)
+    return a, b
+
+def minhash_signature(text: str, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # crc32 hashes and 31-bit coefficients keep a*h + b below 2**63, so uint64 never overflows
+    hashes = _shingle_hashes(text)
+    return ((np.outer(a, hashes) + b[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+def near_duplicate_indices(texts: list[str], threshold: float = DUPLICATE_THRESHOLD) -> set[int]:
+    """Indices of texts whose estimated Jaccard similarity to an earlier text reaches ``threshold``.
+
+    MinHash signatures are bucketed with LSH banding so only candidate pairs are compared.
+    """
+    a, b = _permutations()
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets = defaultdict(list)
+    signatures = []
+    duplicates = set()
+
+    for index, text in enumerate(texts):
+        if not text.strip():
+            duplicates.add(index)
+            signatures.append(None)
+            continue
+        signature = minhash_signature(text, a, b)
+        signatures.append(signature)
+        bands = [signature[band * rows:(band + 1) * rows].tobytes() for band in range(LSH_BANDS)]
+        candidates = {other for band, key in enumerate(bands) for other in buckets[(band, key)]}
+        if any(np.mean(signature == signatures[other]) >= threshold for other in candidates):
+            duplicates.add(index)
+            continue
+        for band, key in enumerate(bands):
+            buckets[(band, key)].append(index)
+    return duplicates
@@ -0,0 +1,63 @@
+# book_manager/benchmarks/bench_batch_recommendations.py
+"""Compare per-user Python scoring with the NumPy batch engine for all users.
+
+Usage: python -m benchmarks.bench_batch_recommendations [--users 2000] [--books 5000] [--top-k 10]
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from app.services import recommender
+
+def make_catalog(users: int, books: int):
+    rng = random.Random(1)
+    genres = [f"Genre {i}" for i in range(40)]
+    authors = [f"Author {i}" for i in range(800)]
+    book_rows = [
+        SimpleNamespace(id=i + 1, genre=rng.choice(genres), author=rng.choice(authors),
+                        year_published=rng.randint(1900, 2024))
+        for i in range(books)
+    ]
+    user_rows = [
+        SimpleNamespace(username=f"user{i}", genre=rng.choice(genres + [None]), author=rng.choice(authors + [None]),
+                        min_year=rng.choice([None, 1950, 1980]), max_year=rng.choice([None, 2000, 2020]))
+        for i in range(users)
+    ]
+    return user_rows, book_rows
+
+def per_request(users, books, k: int) -> int:
+    stored = 0
+    for user in users:
+        scored = [(recommender.score_book(user, book), book) for book in books]
+        matched = sorted((pair for pair in scored if pair[0] > 0),
+                         key=lambda pair: recommender.rating(pair[0]), reverse=True)
+        stored += len(matched[:k])
+    return stored
+
+def batch(users, books, k: int, memory_bytes: int) -> int:
+    book_matrix = recommender.BookMatrix.from_rows([(b.id, b.genre, b.author, b.year_published) for b in books])
+    user_matrix = recommender.UserMatrix.from_rows(
+        [(u.username, u.genre, u.author, u.min_year, u.max_year) for u in users]
+    )
+    return sum(len(rows) for _, rows in recommender.recommend_all(user_matrix, book_matrix, k, memory_bytes))
+
+def main(users: int, books: int, k: int, memory_mb: int):
+    user_rows, book_rows = make_catalog(users, books)
+    timings = {}
+    for name, run in (("python", lambda: per_request(user_rows, book_rows, k)),
+                      ("numpy", lambda: batch(user_rows, book_rows, k, memory_mb * 1024 * 1024))):
+        start = time.perf_counter()
+        stored = run()
+        timings[name] = time.perf_counter() - start
+        print(f"  {name:<7} {timings[name]:8.2f} s   {stored} rows")
+    print(f"{users} users x {books} books, top {k}: speedup {timings['python'] / timings['numpy']:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--memory-mb", type=int, default=256)
+    args = parser.parse_args()
+    main(args.users, args.books, args.top_k, args.memory_mb)
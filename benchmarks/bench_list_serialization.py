@@ -0,0 +1,78 @@
+# book_manager/benchmarks/bench_list_serialization.py
+"""Compare the default and FAST_JSON_LISTS paths of GET /books/ end to end.
+
+Usage: python -m benchmarks.bench_list_serialization [--rows 10000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from unittest.mock import patch
+
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.main import app
+from app.db import models
+from app.api.routes import books
+from app.core.security import get_current_user
+
+async def seed(engine, rows: int):
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+        await conn.execute(insert(models.Book), [
+            {
+                "title": f"Book {i}",
+                "author": f"Author {i % 500}",
+                "genre": ("Fiction", "History", "Science")[i % 3],
+                "year_published": 1900 + i % 120,
+                "summary": "A reasonably sized summary of the book content. " * 4,
+                "summary_status": "completed",
+                "version": 1,
+                "review_version": 0,
+            }
+            for i in range(rows)
+        ])
+
+async def time_path(client: AsyncClient, fast: bool, repeat: int) -> list[float]:
+    timings = []
+    with patch("app.core.config.settings.FAST_JSON_LISTS", fast):
+        await client.get("/books/")  # warm up
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.get("/books/")
+            timings.append(time.perf_counter() - start)
+            response.raise_for_status()
+    return timings
+
+async def main(rows: int, repeat: int):
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await seed(engine, rows)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[books.get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: "bench"
+    async with AsyncClient(app=app, base_url="http://bench") as client: # pylint: disable=unexpected-keyword-arg
+        results = {
+            "default": await time_path(client, fast=False, repeat=repeat),
+            "fast_json": await time_path(client, fast=True, repeat=repeat),
+        }
+    await engine.dispose()
+
+    print(f"GET /books/ with {rows} rows, {repeat} runs each")
+    for name, timings in results.items():
+        print(f"  {name:<10} median {statistics.median(timings) * 1000:8.1f} ms   min {min(timings) * 1000:8.1f} ms")
+    speedup = statistics.median(results["default"]) / statistics.median(results["fast_json"])
+    print(f"  speedup    {speedup:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
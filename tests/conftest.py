@@ -1,3 +1,4 @@
+import subprocess
 import sys
 from pathlib import Path
 
@@ -5,6 +6,7 @@ from pathlib import Path
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root))
 
+import pytest
 import pytest_asyncio
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -33,3 +35,24 @@ async def client(db_session):
 async def db_session():
     async with SessionLocal() as session:
         yield session
+
+FAKE_OLLAMA = Path(__file__).with_name("fake_ollama.py")
+
+@pytest.fixture
+def fake_ollama():
+    """Starts tests/fake_ollama.py servers; returns their base URLs."""
+    processes = []
+
+    def start(name: str, *options: str) -> str:
+        process = subprocess.Popen(
+            [sys.executable, str(FAKE_OLLAMA), "--name", name, *options], stdout=subprocess.PIPE, text=True
+        )
+        processes.append(process)
+        port = process.stdout.readline().split()[1]
+        return f"http://127.0.0.1:{port}"
+
+    start.processes = processes
+    yield start
+    for process in processes:
+        process.terminate()
+        process.wait()
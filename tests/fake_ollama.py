@@ -0,0 +1,88 @@
+"""A stand-in Ollama server for pool tests: ``python tests/fake_ollama.py --name a --installed llama3``.
+
+Serves /api/tags, /api/ps, /api/chat (streamed) and /api/generate. Replies start with
+the server's name so tests can see where each call went. Prints ``port <n>`` once it
+is listening.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def model_entry(name: str) -> dict:
+    return {"name": name, "model": name, "size": 1, "digest": "0" * 12, "details": {}}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--name", required=True)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--installed", action="append", default=[])
+    parser.add_argument("--loaded", action="append", default=[])
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--fail", action="store_true", help="answer every generation with 500")
+    args = parser.parse_args()
+
+    installed = {name if ":" in name else f"{name}:latest" for name in args.installed}
+    loaded = {name if ":" in name else f"{name}:latest" for name in args.loaded}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with lock:
+                if self.path == "/api/tags":
+                    return self.send_json(200, {"models": [model_entry(name) for name in sorted(installed)]})
+                if self.path == "/api/ps":
+                    return self.send_json(200, {"models": [model_entry(name) for name in sorted(loaded)]})
+            self.send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if self.path not in ("/api/chat", "/api/generate"):
+                return self.send_json(404, {"error": "not found"})
+            model = request.get("model", "")
+            model = model if ":" in model else f"{model}:latest"
+            if args.fail:
+                return self.send_json(500, {"error": "backend failure"})
+            if model not in installed:
+                return self.send_json(404, {"error": f"model '{model}' not found"})
+            time.sleep(args.delay)
+            with lock:
+                loaded.add(model)
+
+            if self.path == "/api/generate":
+                return self.send_json(200, {"model": model, "response": f"{args.name}: generated", "done": True})
+
+            prompt = request["messages"][-1]["content"]
+            lines = [
+                {"model": model, "created_at": "2024-01-01T00:00:00Z",
+                 "message": {"role": "assistant", "content": f"{args.name}: {prompt[:40]}"}, "done": False},
+                {"model": model, "created_at": "2024-01-01T00:00:00Z", "message": {"role": "assistant", "content": ""},
+                 "done": True, "done_reason": "stop", "prompt_eval_count": 1, "eval_count": 1},
+            ]
+            body = b"".join(json.dumps(line).encode() + b"\n" for line in lines)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"port {server.server_address[1]}", flush=True)
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
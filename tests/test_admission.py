@@ -0,0 +1,186 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.security import get_current_user
+from app.api.routes import books, recommendations
+from app.services.admission import (
+    AdmissionController, AdmissionRejected, InMemoryBucketStore, RateLimit, SQLiteBucketStore, INTERACTIVE, UPLOAD
+)
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_scheduler import LLMScheduler, Priority
+from app.services.recommendation_blurbs import BlurbStore
+from app.services.summary_progress import SummaryProgressTracker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_controller(store=None, clock=None, max_queue=4, max_summaries=2):
+    scheduler = LLMScheduler(2, {Priority.INTERACTIVE: 10, Priority.BACKGROUND: 10})
+    progress = SummaryProgressTracker()
+    controller = AdmissionController(
+        store=store or InMemoryBucketStore(),
+        limits={INTERACTIVE: RateLimit.parse("2/10"), UPLOAD: RateLimit.parse("1/60")},
+        scheduler=scheduler,
+        progress=progress,
+        max_interactive_queue=max_queue,
+        max_active_summaries=max_summaries,
+        clock=clock or FakeClock(),
+    )
+    return controller, scheduler, progress
+
+def test_rate_limit_parse():
+    limit = RateLimit.parse("20/60")
+    assert limit.capacity == 20
+    assert limit.refill_per_second == pytest.approx(1 / 3)
+
+@pytest.mark.asyncio
+async def test_bucket_rejects_with_exact_retry_after_and_refills():
+    clock = FakeClock()
+    controller, _, _ = make_controller(clock=clock)
+    await controller.admit("alice", INTERACTIVE)
+    await controller.admit("alice", INTERACTIVE)
+    with pytest.raises(AdmissionRejected) as exc:
+        await controller.admit("alice", INTERACTIVE)
+    assert exc.value.status_code == 429
+    assert exc.value.retry_after == 5
+
+    await controller.admit("bob", INTERACTIVE)  # buckets are per user
+    clock.now += 5
+    await controller.admit("alice", INTERACTIVE)
+
+@pytest.mark.asyncio
+async def test_sqlite_buckets_are_shared_between_workers(tmp_path):
+    path = str(tmp_path / "buckets.sqlite3")
+    clock = FakeClock()
+    worker_a, _, _ = make_controller(store=SQLiteBucketStore(path), clock=clock)
+    worker_b, _, _ = make_controller(store=SQLiteBucketStore(path), clock=clock)
+    await worker_a.admit("alice", INTERACTIVE)
+    await worker_b.admit("alice", INTERACTIVE)
+    with pytest.raises(AdmissionRejected):
+        await worker_a.admit("alice", INTERACTIVE)
+
+@pytest.mark.asyncio
+async def test_interactive_load_shedding_uses_queue_depth():
+    controller, scheduler, _ = make_controller(max_queue=0)
+    scheduler.stats[Priority.INTERACTIVE].recent_service = 3.0
+    with pytest.raises(AdmissionRejected) as exc:
+        await controller.admit("alice", INTERACTIVE)
+    assert exc.value.status_code == 503
+    assert exc.value.retry_after == 2  # (0 queued + 1) * 3s / 2 slots
+
+@pytest.mark.asyncio
+async def test_upload_shedding_counts_active_summaries():
+    controller, scheduler, progress = make_controller(max_summaries=2)
+    scheduler.stats[Priority.BACKGROUND].recent_service = 2.0
+    progress.update(1, status="processing", chunks_total=10, chunks_done=7)
+    await controller.admit("alice", UPLOAD)
+
+    progress.update(2, status="processing", chunks_total=10, chunks_done=0)
+    with pytest.raises(AdmissionRejected) as exc:
+        await controller.admit("bob", UPLOAD)
+    assert exc.value.status_code == 503
+    assert exc.value.retry_after == 6  # 3 calls left * 2s * 2 jobs / 2 slots
+
+    progress.update(1, status="completed")
+    await controller.admit("bob", UPLOAD)
+
+def test_route_returns_429_with_retry_after():
+    book = MagicMock(id=1, version=3, title="Dune", summary="Spice.")
+
+    def execute(query):
+        # book 1 exists; queries select either the whole row or just its version
+        found = query.compile().params["id_1"] == 1
+        value = book.version if query.column_descriptions[0]["name"] == "version" else book
+        return MagicMock(scalar_one_or_none=MagicMock(return_value=value if found else None))
+
+    mock_session = MagicMock()
+    mock_session.execute = AsyncMock(side_effect=execute)
+    overrides = dict(app.dependency_overrides)  # restored as-is: other modules install their own
+    app.dependency_overrides[get_current_user] = lambda: "limited-user"
+    app.dependency_overrides[books.get_db] = lambda: mock_session
+    try:
+        client = TestClient(app)
+        controller, _, _ = make_controller()
+        with patch("app.api.dependencies.admission_controller", controller), \
+                patch.object(books, "generate_summary", AsyncMock(return_value="Generated")):
+            etag = client.get("/books/1/summary").headers["etag"]
+            # revalidations and missing books never reach the LLM, so they are not charged
+            revalidated = [client.get("/books/1/summary", headers={"If-None-Match": etag}) for _ in range(3)]
+            missing = [client.get("/books/2/summary") for _ in range(3)]
+            responses = [client.get("/books/1/summary") for _ in range(2)]
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+    assert [r.status_code for r in revalidated] == [304, 304, 304]
+    assert [r.status_code for r in missing] == [404, 404, 404]
+    assert [r.status_code for r in responses] == [200, 429]
+    assert responses[-1].headers["retry-after"] == "5"
+
+def test_recommendations_are_charged_only_for_new_blurbs(tmp_path):
+    pref = MagicMock(genre="Sci-Fi", author=None, min_year=None, max_year=None)
+    book = MagicMock(title="Dune", author="Frank Herbert", genre="Sci-Fi", year_published=1965, summary="Spice.")
+    state = {"pref": pref}
+
+    async def execute(query):
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = state["pref"]
+        result.scalars.return_value.all.return_value = [book]
+        return result
+
+    mock_session = MagicMock(execute=execute)
+    model = MagicMock()
+    model.invoke.return_value = MagicMock(content="Read these.")
+    blurbs = BlurbStore()
+    uncached = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_bytes=10**6, enabled=False)
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[recommendations.get_current_user] = lambda: "limited-user"
+    app.dependency_overrides[recommendations.get_db] = lambda: mock_session
+    try:
+        client = TestClient(app)
+        controller, _, _ = make_controller()
+        with patch("app.api.dependencies.admission_controller", controller), \
+                patch.object(recommendations, "blurbs", blurbs), \
+                patch.object(recommendations, "get_chat_model", return_value=model), \
+                patch.object(recommendations, "llm_cache", uncached):
+            first = client.get("/recommendations/recommendations")
+            # a cached blurb and missing preferences never reach the LLM, so they are not charged
+            cached = [client.get("/recommendations/recommendations") for _ in range(3)]
+            state["pref"] = None
+            missing = [client.get("/recommendations/recommendations") for _ in range(3)]
+            state["pref"] = pref
+            responses = []
+            for _ in range(2):
+                blurbs.clear()
+                responses.append(client.get("/recommendations/recommendations"))
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+    assert first.status_code == 200 and first.json()["recommendation_summary"] == "Read these."
+    assert [r.status_code for r in cached] == [200, 200, 200]
+    assert [r.status_code for r in missing] == [404, 404, 404]
+    assert [r.status_code for r in responses] == [200, 429]
+    assert model.invoke.call_count == 2
+
+def test_uploads_are_not_charged_when_ai_is_disabled():
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[get_current_user] = lambda: "limited-user"
+    try:
+        client = TestClient(app)
+        controller, _, _ = make_controller()
+        with patch("app.api.dependencies.admission_controller", controller), \
+                patch("app.core.config.settings.AI_ENABLED", False):
+            statuses = [client.post(
+                "/books/",
+                data={"title": "T", "author": "A", "genre": "G", "year_published": "2020"},
+                files={"file": ("book.pdf", b"%PDF-1.4", "application/pdf")},
+            ).status_code for _ in range(3)]
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+    assert statuses == [503, 503, 503]
+    assert controller.store.take("upload:limited-user", controller.limits[UPLOAD], controller.clock()) == 0
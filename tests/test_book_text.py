@@ -0,0 +1,95 @@
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.main import app
+from app.db import models
+from app.db.migrations import run_migrations
+from app.api.routes import books
+from app.core.security import create_access_token
+from app.services import book_text, summarizer
+from app.services.summary_progress import summary_progress
+
+def test_pack_round_trip():
+    texts = ["Chapter one.\n", "", "Ünïcode — text", "x" * 5000]
+    blob, offsets = book_text.pack_texts(texts)
+    assert book_text.unpack_texts(blob, offsets) == texts
+    assert len(blob) < sum(len(t) for t in texts)
+
+def test_summary_fingerprint_tracks_template_and_chunker():
+    base = book_text.summary_fingerprint("Summarize {text}", "pages=10;size=1000;overlap=150")
+    assert base == book_text.summary_fingerprint("Summarize {text}", "pages=10;size=1000;overlap=150")
+    assert base != book_text.summary_fingerprint("Summarize briefly {text}", "pages=10;size=1000;overlap=150")
+    assert base != book_text.summary_fingerprint("Summarize {text}", "pages=40;size=1000;overlap=150")
+
+PAGES = [f"Page {i} tells of the river town and its ferry number {i}, which sails at dawn." * 20 for i in range(15)]
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'text.db'}")
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.Book), [
+            {"title": "Stored", "author": "A", "genre": "G", "year_published": 2000,
+             "summary": "Old summary", "summary_status": "completed"},
+            {"title": "Legacy", "author": "B", "genre": "G", "year_published": 2001,
+             "summary": "Old summary", "summary_status": "completed"},
+        ])
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        await book_text.save_pages(db, 1, PAGES)
+    yield factory
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_regenerate_reuses_stored_text(session_factory):
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[books.get_db] = override_get_db
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'reader'})}"}
+    try:
+        with patch.object(books, "SessionLocal", session_factory), \
+                patch.object(summarizer, "summarize_documents", return_value="New summary") as summarize:
+            async with AsyncClient(app=app, base_url="http://test") as client: # pylint: disable=unexpected-keyword-arg
+                assert (await client.post("/books/99/summary/regenerate", headers=headers)).status_code == 404
+                assert (await client.post("/books/2/summary/regenerate", headers=headers)).status_code == 409
+
+                response = await client.post("/books/1/summary/regenerate?quick=true", headers=headers)
+                assert response.status_code == 202
+                quick_docs = summarize.call_args.args[0]
+
+                await client.post("/books/1/summary/regenerate", headers=headers)
+                full_docs = summarize.call_args.args[0]
+    finally:
+        app.dependency_overrides.pop(books.get_db, None)
+
+    assert summary_progress.get(1).stage == "done"
+    assert len(full_docs) > len(quick_docs)
+    async with session_factory() as db:
+        book = await db.get(models.Book, 1)
+        stored = await book_text.load_book_text(db, 1)
+    assert book.summary == "New summary" and book.summary_status == "completed"
+    chunker = summarizer.chunker_for(PAGES)
+    assert stored.chunker == chunker
+    assert stored.chunks == [doc.page_content for doc in full_docs]
+    assert stored.summarized_with == summarizer.current_summary_fingerprint(chunker)
+
+@pytest.mark.asyncio
+async def test_stored_chunks_skip_cleaning(session_factory):
+    chunker = summarizer.chunker_for(PAGES)
+    async with session_factory() as db:
+        await book_text.save_chunks(db, 1, ["first chunk", "second chunk"], chunker)
+
+    with patch.object(books, "SessionLocal", session_factory), \
+            patch.object(summarizer, "prepare_documents") as prepare, \
+            patch.object(summarizer, "summarize_documents", return_value="From chunks") as summarize:
+        await books.resummarize_book(1)
+
+    prepare.assert_not_called()
+    assert [doc.page_content for doc in summarize.call_args.args[0]] == ["first chunk", "second chunk"]
@@ -0,0 +1,139 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.main import app
+from app.db import models
+from app.db.migrations import run_migrations
+from app.api.routes import books, reviews
+from app.core.security import get_current_user
+from app.services.catalog_cache import (
+    CachedList, CatalogCache, InvalidationListener, LIST_CHANGED, book_changed, commit_with_invalidation,
+    reviews_changed,
+)
+
+def counting_loader(value):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return value
+    return load, calls
+
+@pytest.mark.asyncio
+async def test_book_rows_are_bounded_lru():
+    cache = CatalogCache(max_books=2, max_list_rows=10)
+    for book_id in (1, 2, 1, 3):
+        load, _ = counting_loader({"id": book_id})
+        await cache.get_book(book_id, load)
+    load, calls = counting_loader({"id": 2})
+    await cache.get_book(2, load)
+    assert calls == [1]  # 2 was least recently used and evicted by 3
+    assert cache.metrics()["books"] == 2
+
+@pytest.mark.asyncio
+async def test_invalidation_messages():
+    cache = CatalogCache(max_books=10, max_list_rows=10)
+    await cache.get_book(1, counting_loader({"id": 1})[0])
+    await cache.get_list(counting_loader(CachedList(b"[]", '"e"', 0))[0])
+
+    cache.apply(reviews_changed(1))
+    assert cache.metrics()["books"] == 0 and cache.metrics()["list_cached"]
+    cache.apply(LIST_CHANGED)
+    assert not cache.metrics()["list_cached"]
+
+    await cache.get_book(1, counting_loader({"id": 1})[0])
+    await cache.get_list(counting_loader(CachedList(b"[]", '"e"', 0))[0])
+    cache.apply(book_changed(1))
+    assert cache.metrics()["books"] == 0 and not cache.metrics()["list_cached"]
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_stored():
+    cache = CatalogCache(max_books=10, max_list_rows=1)
+
+    async def racing_load():
+        cache.apply(book_changed(1))
+        return {"id": 1, "title": "stale"}
+
+    assert (await cache.get_book(1, racing_load))["title"] == "stale"
+    assert cache.metrics()["books"] == 0
+    too_big, _ = counting_loader(CachedList(b"[]", '"e"', 2))
+    await cache.get_list(too_big)
+    assert not cache.metrics()["list_cached"]
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'catalog.db'}")
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.User), [{"username": "mockuser", "password": "x"}])
+        await conn.execute(insert(models.Book), [{
+            "title": "Dune", "author": "Frank Herbert", "genre": "Sci-Fi", "year_published": 1965,
+            "summary": "Spice.", "summary_status": "completed",
+        }])
+    yield engine, async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_hot_reads_skip_the_database_until_a_write(database):
+    engine, session_factory = database
+    cache = CatalogCache(max_books=10, max_list_rows=10)
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    overrides = dict(app.dependency_overrides)  # restored as-is: other modules install their own
+    app.dependency_overrides[books.get_db] = override_get_db
+    app.dependency_overrides[reviews.get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: "mockuser"
+    try:
+        with patch("app.services.catalog_cache.catalog_cache", cache), patch.object(books, "catalog_cache", cache), \
+                patch.object(books, "SessionLocal", session_factory):
+            async with AsyncClient(app=app, base_url="http://test") as client: # pylint: disable=unexpected-keyword-arg
+                first = await client.get("/books/1")
+                listing = await client.get("/books/")
+                statements.clear()
+                assert (await client.get("/books/1")).json() == first.json() == {
+                    "id": 1, "title": "Dune", "author": "Frank Herbert", "genre": "Sci-Fi",
+                    "year_published": 1965, "summary": "Spice.",
+                }
+                assert (await client.get("/books/", headers={"If-None-Match": listing.headers["etag"]})).status_code == 304
+                assert statements == []
+
+                assert (await client.post("/books/1/reviews", json={"review_text": "Great", "rating": 5})).status_code == 200
+                assert cache.metrics()["books"] == 0 and cache.metrics()["list_cached"]
+
+                await books.set_summary_status(1, models.SummaryStatus.COMPLETED, summary="Worms.")
+                assert (await client.get("/books/1")).json()["summary"] == "Worms."
+                refreshed = await client.get("/books/", headers={"If-None-Match": listing.headers["etag"]})
+                assert refreshed.status_code == 200 and refreshed.json()[0]["summary"] == "Worms."
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+
+@pytest.mark.asyncio
+async def test_changes_reach_other_workers_through_the_change_table(database):
+    engine, session_factory = database
+    writer, reader = CatalogCache(10, 10), CatalogCache(10, 10)
+    listener = InvalidationListener(engine, reader, poll_interval=0.02)
+    listener.start()
+    try:
+        await asyncio.sleep(0.05)
+        await reader.get_book(1, counting_loader({"id": 1})[0])
+        async with session_factory() as db:
+            await commit_with_invalidation(db, book_changed(1), cache=writer)
+        for _ in range(100):
+            if reader.metrics()["books"] == 0:
+                break
+            await asyncio.sleep(0.02)
+        assert reader.metrics()["books"] == 0
+    finally:
+        await listener.stop()
@@ -0,0 +1,139 @@
+import random
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from anyio import from_thread, to_thread
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+
+from app.db import models
+from app.db.migrations import run_migrations
+from app.api.routes import books
+from app.core.config import settings
+from app.services import book_text, chunk_summaries, llm, llm_cache, summarizer
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_pool import LLMPool
+from app.services.summary_progress import summary_progress
+
+def test_chunk_hash_ignores_extraction_noise():
+    assert chunk_summaries.chunk_hash("The  ferry\nsails at\tdawn. ") == chunk_summaries.chunk_hash("The ferry sails at dawn.")
+    assert chunk_summaries.chunk_hash("ﬁsh") == chunk_summaries.chunk_hash("fish")
+    assert chunk_summaries.chunk_hash("The ferry sails at dawn.") != chunk_summaries.chunk_hash("The ferry sails at dusk.")
+
+def test_partial_fingerprint_tracks_template_and_model():
+    base = chunk_summaries.partial_fingerprint("Summarize {text}", "llama3")
+    assert base != chunk_summaries.partial_fingerprint("Summarize briefly {text}", "llama3")
+    assert base != chunk_summaries.partial_fingerprint("Summarize {text}", "mistral")
+
+def test_reduce_groups_fit_the_budget_and_shrink():
+    partials = ["x" * 4000] * 7  # ~1000 tokens each
+    groups = summarizer.group_partials(partials, token_max=3000)
+    assert [len(group) for group in groups] == [3, 3, 1]
+    # oversized partials still pair up, so every round makes progress
+    assert [len(group) for group in summarizer.group_partials(["x" * 20000] * 5, token_max=3000)] == [2, 2, 1]
+
+def test_reduce_rejects_an_empty_book():
+    with patch.object(summarizer, "run_prompts") as run_prompts, pytest.raises(ValueError, match="No summarizable text"):
+        summarizer.reduce_partials([])
+    run_prompts.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_map_runs_every_call_through_the_scheduler(fake_ollama, tmp_path):
+    pool = LLMPool([fake_ollama("solo", "--installed", "llama3", "--loaded", "llama3", "--delay", "0.05")],
+                   eject_after=3, eject_seconds=30)
+    progress = []
+
+    def report(calls_done):
+        from_thread.run_sync(progress.append, calls_done)
+
+    with patch.object(llm, "llm_pool", pool), \
+            patch.object(llm_cache, "llm_cache", LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_bytes=10**6)):
+        summaries = await to_thread.run_sync(summarizer.map_chunks, ["first", "second", "third"], report)
+
+    assert len(summaries) == 3 and all(summary.startswith("solo:") for summary in summaries)
+    assert sorted(progress) == [1, 2, 3]
+    assert pool.backends[0].requests == 3 and pool.backends[0].outstanding == 0
+
+def edition(seed: int, pages: int = 40) -> list[str]:
+    words = random.Random(seed).choices(["river", "ferry", "dawn", "town", "bell", "salt", "lantern", "harbor",
+                                         "winter", "letter", "market", "tide", "orchard", "mill", "bridge"], k=pages * 300)
+    return [f"{' '.join(words[i * 300:(i + 1) * 300])} page{i}marker." for i in range(pages)]
+
+class FakeLLM:
+    def __init__(self):
+        self.prompts = []
+
+    def __call__(self, prompts, on_call_done=None):
+        self.prompts.extend(prompts)
+        results = []
+        for done, prompt in enumerate(prompts, start=1):
+            results.append(f"summary#{len(self.prompts) - len(prompts) + done}")
+            if on_call_done:
+                on_call_done(done)
+        return results
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chunks.db'}")
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.Book), [
+            {"title": "First edition", "author": "A", "genre": "G", "year_published": 2000},
+            {"title": "Second edition", "author": "A", "genre": "G", "year_published": 2010},
+        ])
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    yield factory
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_revised_edition_only_maps_changed_chunks(session_factory):
+    first = edition(seed=1)
+    revised = list(first)
+    revised[17] = edition(seed=2)[17]
+    async with session_factory() as db:
+        await book_text.save_pages(db, 1, first)
+        await book_text.save_pages(db, 2, revised)
+
+    llm = FakeLLM()
+    with patch.object(settings, "SUMMARY_CHUNK_REUSE", True), patch.object(books, "SessionLocal", session_factory), \
+            patch.object(summarizer, "run_prompts", llm), \
+            patch.object(summarizer, "summarize_documents") as chain:
+        await books.resummarize_book(1)
+        first_calls = len(llm.prompts)
+        await books.resummarize_book(2)
+        revised_calls = len(llm.prompts) - first_calls
+        await books.resummarize_book(1)
+        repeat_calls = len(llm.prompts) - first_calls - revised_calls
+
+    chain.assert_not_called()
+    async with session_factory() as db:
+        stored = await book_text.load_book_text(db, 1)
+        chunk_count = len(stored.chunks)
+        stored_partials = (await db.execute(select(models.ChunkSummary))).scalars().all()
+        book = await db.get(models.Book, 2)
+
+    reduce_calls = first_calls - chunk_count
+    assert chunk_count > 40 and 1 <= reduce_calls < 10
+    # the changed page's chunks plus the reduce rounds
+    assert revised_calls - reduce_calls <= 4
+    assert repeat_calls == reduce_calls
+    assert len(stored_partials) == chunk_count + revised_calls - reduce_calls
+    assert book.summary_status == "completed" and book.summary.startswith("summary#")
+
+    progress = summary_progress.get(1)
+    assert progress.stage == "done" and progress.chunks_done == progress.chunks_total == reduce_calls
+
+@pytest.mark.asyncio
+async def test_partials_are_stored_once(session_factory):
+    fingerprint = "f1"
+    async with session_factory() as db:
+        await chunk_summaries.save_partials(db, {"a": "first"}, fingerprint)
+        await chunk_summaries.save_partials(db, {"a": "second", "b": "other"}, fingerprint)
+        plan = await chunk_summaries.plan_chunks(db, ["x", "y", "x"], fingerprint)
+
+    assert plan.to_map == [0, 1]  # the repeated chunk is mapped once
+    async with session_factory() as db:
+        assert await chunk_summaries.load_partials(db, ["a", "b", "c"], fingerprint) == {"a": "first", "b": "other"}
+        assert await chunk_summaries.load_partials(db, ["a"], "f2") == {}
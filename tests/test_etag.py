@@ -0,0 +1,93 @@
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from app.main import app
+from app.db import models
+from app.api.routes import books, reviews
+from app.core.security import get_current_user
+from app.core.etag import make_etag, catalog_etag
+
+engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+TestingSessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+@pytest_asyncio.fixture
+async def client():
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    async with TestingSessionLocal() as db:
+        db.add(models.User(username="mockuser", password="x"))
+        db.add(models.Book(id=1, title="Dune", author="Frank Herbert", genre="Sci-Fi",
+                           year_published=1965, summary="Spice."))
+        await db.commit()
+
+    async def override_get_db():
+        async with TestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[books.get_db] = override_get_db
+    app.dependency_overrides[reviews.get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: "mockuser"
+    async with AsyncClient(app=app, base_url="http://test") as ac: # pylint: disable=unexpected-keyword-arg
+        yield ac
+    app.dependency_overrides.pop(books.get_db)
+    app.dependency_overrides.pop(reviews.get_db)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+
+def test_make_etag_is_quoted_and_stable():
+    assert make_etag("book", 1, 2) == make_etag("book", 1, 2)
+    assert make_etag("book", 1, 2) != make_etag("book", 1, 3)
+    assert make_etag("x").startswith('"') and make_etag("x").endswith('"')
+    assert catalog_etag(0, None, None) == catalog_etag(0, 0, 0)
+
+@pytest.mark.asyncio
+async def test_get_book_returns_304_for_matching_etag(client):
+    response = await client.get("/books/1")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = await client.get("/books/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = await client.get("/books/1", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert response.status_code == 304
+
+    response = await client.get("/books/1", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_get_book_conditional_missing_book(client):
+    response = await client.get("/books/99", headers={"If-None-Match": '"x"'})
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_catalog_etag_changes_when_a_book_is_added(client):
+    first = await client.get("/books/")
+    etag = first.headers["etag"]
+    assert (await client.get("/books/", headers={"If-None-Match": etag})).status_code == 304
+
+    async with TestingSessionLocal() as db:
+        db.add(models.Book(title="Emma", author="Jane Austen", genre="Classic", year_published=1815, summary="-"))
+        await db.commit()
+
+    response = await client.get("/books/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers["etag"] != etag
+
+@pytest.mark.asyncio
+async def test_review_write_invalidates_reviews_etag(client):
+    first = await client.get("/books/1/reviews")
+    etag = first.headers["etag"]
+    assert (await client.get("/books/1/reviews", headers={"If-None-Match": etag})).status_code == 304
+
+    response = await client.post("/books/1/reviews", json={"review_text": "Great", "rating": 5})
+    assert response.status_code == 200
+
+    response = await client.get("/books/1/reviews", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+    assert response.headers["etag"] != etag
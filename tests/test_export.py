@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.main import app
+from app.db import models
+from app.db.migrations import run_migrations
+from app.services import export
+
+NOW = datetime(2026, 1, 1)
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'export.db'}")
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.User), [{"username": "reader", "password": "x"}])
+        await conn.execute(insert(models.Book), [{
+            "title": f"Book {i}", "author": "A", "genre": ("History", "Fiction")[i % 2],
+            "year_published": 1990 + i, "summary": f"Summary, with \"quotes\" {i}", "summary_status": "completed",
+            "updated_at": NOW + timedelta(days=i),
+        } for i in range(25)])
+        await conn.execute(insert(models.Review), [{
+            "book_id": 1 + i % 25, "user_id": "reader", "review_text": f"Review {i}", "rating": i % 5,
+            "created_at": NOW + timedelta(hours=i),
+        } for i in range(60)])
+    yield async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+async def collect(session_factory, kind, fmt="ndjson", gzip_output=False, **filters) -> bytes:
+    async with session_factory() as db:
+        chunks = [chunk async for chunk in export.export_bytes(
+            db, kind, fmt, export.ExportFilters(**filters), gzip=gzip_output, batch_size=7
+        )]
+    return b"".join(chunks)
+
+def ndjson(data: bytes) -> list[dict]:
+    return [json.loads(line) for line in data.splitlines()]
+
+@pytest.mark.asyncio
+async def test_ndjson_streams_every_row_in_id_order(session_factory):
+    rows = ndjson(await collect(session_factory, "reviews"))
+    assert [row["id"] for row in rows] == list(range(1, 61))
+    assert set(rows[0]) == {"id", "book_id", "user_id", "review_text", "rating", "created_at"}
+
+@pytest.mark.asyncio
+async def test_filters_and_resume(session_factory):
+    rows = ndjson(await collect(session_factory, "books", genre="history", year_from=1995, year_to=2010))
+    assert [row["year_published"] for row in rows] == [1996, 1998, 2000, 2002, 2004, 2006, 2008, 2010]
+
+    rows = ndjson(await collect(session_factory, "books", updated_since=NOW + timedelta(days=20)))
+    assert [row["id"] for row in rows] == [21, 22, 23, 24, 25]
+
+    first = ndjson(await collect(session_factory, "reviews"))
+    resumed = ndjson(await collect(session_factory, "reviews", after_id=first[29]["id"]))
+    assert first[:30] + resumed == first
+
+    fiction_reviews = ndjson(await collect(session_factory, "reviews", genre="Fiction"))
+    assert fiction_reviews and all(row["book_id"] % 2 == 0 for row in fiction_reviews)
+
+@pytest.mark.asyncio
+async def test_gzip_csv(session_factory):
+    data = gzip.decompress(await collect(session_factory, "books", fmt="csv", gzip_output=True))
+    rows = list(csv.DictReader(io.StringIO(data.decode())))
+    assert len(rows) == 25
+    assert rows[3]["summary"] == 'Summary, with "quotes" 3'
+    assert rows[3]["updated_at"] == (NOW + timedelta(days=3)).isoformat()
+
+@pytest.mark.asyncio
+async def test_export_endpoint_requires_admin_and_streams(session_factory):
+    with patch("app.api.routes.export.SessionLocal", session_factory), \
+            patch("app.core.config.settings.ADMIN_TOKEN", "secret"):
+        async with AsyncClient(app=app, base_url="http://test") as client: # pylint: disable=unexpected-keyword-arg
+            assert (await client.get("/export/books")).status_code == 403
+            response = await client.get("/export/reviews?gzip=true&after_id=50", headers={"X-Admin-Token": "secret"})
+            assert (await client.get("/export/users", headers={"X-Admin-Token": "secret"})).status_code == 422
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == 'attachment; filename="reviews.ndjson.gz"'
+    assert [row["id"] for row in ndjson(gzip.decompress(response.content))] == list(range(51, 61))
@@ -0,0 +1,70 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.security import get_current_user
+from app.services.admission import InMemoryBucketStore
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Generous enough for a cold CI runner; pulling LangChain back in at import time blows well past it
+IMPORT_BUDGET_SECONDS = 3.0
+HEAVY_MODULES = ("langchain", "langchain_core", "langchain_community", "langchain_ollama", "fitz", "pymupdf",
+                 "transformers")
+
+def run_python(code: str, **env) -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env={**os.environ, "PYTHONPATH": str(PROJECT_ROOT), **env},
+        capture_output=True,
+        text=True,
+        timeout=120,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_app_import_stays_within_budget_and_skips_ai_stack():
+    data = run_python(
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        "import app.main\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = sorted({{m.split('.')[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))"
+    )
+    assert data["heavy"] == []
+    assert data["elapsed"] < IMPORT_BUDGET_SECONDS
+
+def test_prompt_templates_are_built_on_first_access():
+    data = run_python(
+        "import json, sys\n"
+        "from app.core import prompt_templates\n"
+        "before = 'langchain' in sys.modules\n"
+        "template = prompt_templates.summary_prompt_template()\n"
+        "print(json.dumps({'before': before, 'after': 'langchain' in sys.modules,"
+        " 'variables': template.input_variables}))"
+    )
+    assert data == {"before": False, "after": True, "variables": ["text"]}
+
+def test_ai_endpoints_return_503_when_ai_disabled():
+    overrides = dict(app.dependency_overrides)  # restored as-is: other modules install their own
+    app.dependency_overrides[get_current_user] = lambda: "mockuser"
+    try:
+        client = TestClient(app)
+        # a fresh bucket store, so uploads made by earlier tests cannot rate-limit this one
+        with patch("app.core.config.settings.AI_ENABLED", False), \
+                patch("app.api.dependencies.admission_controller.store", InMemoryBucketStore()):
+            response = client.post(
+                "/books/",
+                data={"title": "T", "author": "A", "genre": "G", "year_published": "2020"},
+                files={"file": ("book.pdf", b"%PDF-1.4", "application/pdf")},
+            )
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+    assert response.status_code == 503
+    assert response.json() == {"detail": "AI features are disabled on this worker"}
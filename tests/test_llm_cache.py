@@ -0,0 +1,167 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.services.llm_cache import LLMResponseCache, langchain_cache_class
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "llm.sqlite3")
+
+def test_key_depends_on_model_prompt_and_params():
+    key = LLMResponseCache.make_key("llama3", "hello", temperature=0.7)
+    assert key == LLMResponseCache.make_key("llama3", "hello", temperature=0.7)
+    assert key != LLMResponseCache.make_key("llama3", "hello", temperature=0.2)
+    assert key != LLMResponseCache.make_key("mistral", "hello", temperature=0.7)
+    assert key != LLMResponseCache.make_key("llama3", "hello!", temperature=0.7)
+
+def test_store_and_lookup_shared_between_instances(cache_path):
+    LLMResponseCache(cache_path, max_bytes=1000).store("k", "llama3", "answer")
+    assert LLMResponseCache(cache_path, max_bytes=1000).lookup("k") == "answer"
+
+def test_evicts_least_recently_used_beyond_max_bytes(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=10)
+    cache.store("a", "m", "aaaa")
+    time.sleep(0.01)
+    cache.store("b", "m", "bbbb")
+    time.sleep(0.01)
+    cache.lookup("a")  # a is now more recent than b
+    time.sleep(0.01)
+    cache.store("c", "m", "cccc")
+    assert cache.lookup("b") is None
+    assert cache.lookup("a") == "aaaa"
+    assert cache.lookup("c") == "cccc"
+
+def test_running_total_tracks_stores_replacements_and_evictions(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=10)
+    cache.store("a", "m", "aaaa")
+    cache.store("a", "m", "aaaaaa")  # replacing an entry counts only its new size
+    assert cache.total_bytes() == 6
+    cache.store("b", "m", "bbbb")
+    assert cache.total_bytes() == 10
+    cache.store("c", "m", "cc")
+    assert cache.total_bytes() == 6 and cache.lookup("a") is None
+    cache.clear()
+    assert cache.total_bytes() == 0
+
+def test_lookups_write_access_times_in_batches(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=1000, touch_batch=3, touch_interval=60)
+    for key in "abc":
+        cache.store(key, "m", key)
+    stored = lambda: dict(cache._connection().execute("SELECT key, last_access FROM llm_responses"))
+    before = stored()
+    time.sleep(0.01)
+    cache.lookup("a")
+    cache.lookup("b")
+    assert stored() == before
+    cache.lookup("c")
+    after = stored()
+    assert all(after[key] > before[key] for key in "abc")
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_requests_generate_once(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=1000)
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "once"
+
+    results = await asyncio.gather(*(cache.get_or_generate("k", "m", generate) for _ in range(10)))
+    assert results == ["once"] * 10
+    assert len(calls) == 1
+    assert await cache.get_or_generate("k", "m", generate) == "once"
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_other_process_waits_on_lease_instead_of_generating(cache_path):
+    worker_a = LLMResponseCache(cache_path, max_bytes=1000, poll_interval=0.01)
+    worker_b = LLMResponseCache(cache_path, max_bytes=1000, poll_interval=0.01)
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "shared"
+
+    results = await asyncio.gather(
+        worker_a.get_or_generate("k", "m", generate),
+        worker_b.get_or_generate("k", "m", generate),
+    )
+    assert results == ["shared", "shared"]
+    assert len(calls) == 1
+
+def test_expired_lease_is_taken_over(cache_path):
+    stale = LLMResponseCache(cache_path, max_bytes=1000, lease_seconds=-1)
+    assert stale.try_claim("k", "stale")
+    fresh = LLMResponseCache(cache_path, max_bytes=1000)
+    assert fresh.try_claim("k", "fresh")
+    assert not stale.try_claim("k", "stale")
+
+@pytest.mark.asyncio
+async def test_failed_generation_releases_lease(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=1000)
+
+    async def failing():
+        raise RuntimeError("ollama down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_generate("k", "m", failing)
+    assert LLMResponseCache(cache_path, max_bytes=1000).try_claim("k", "other")
+
+@pytest.mark.asyncio
+async def test_async_and_blocking_callers_in_one_process_generate_once(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=1000, poll_interval=0.01)
+    calls = []
+
+    async def generate():
+        calls.append("async")
+        await asyncio.sleep(0.2)
+        return "shared"
+
+    def generate_blocking():
+        calls.append("blocking")
+        time.sleep(0.2)
+        return "shared"
+
+    results = await asyncio.gather(
+        cache.get_or_generate("k", "m", generate),
+        asyncio.to_thread(cache.get_or_generate_blocking, "k", "m", generate_blocking),
+    )
+    assert results == ["shared", "shared"]
+    assert len(calls) == 1
+
+def test_blocking_variant_coalesces_threads(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=1000)
+    calls = []
+    results = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.05)
+        return "threaded"
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_generate_blocking("k", "m", generate)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["threaded"] * 5
+    assert len(calls) == 1
+
+def test_disabled_cache_always_generates(cache_path):
+    cache = LLMResponseCache(cache_path, max_bytes=1000, enabled=False)
+    assert cache.get_or_generate_blocking("k", "m", lambda: "a") == "a"
+    assert cache.get_or_generate_blocking("k", "m", lambda: "b") == "b"
+
+def test_langchain_adapter_round_trips_generations(cache_path):
+    from langchain_core.outputs import ChatGeneration
+    from langchain_core.messages import AIMessage
+
+    adapter = langchain_cache_class()(LLMResponseCache(cache_path, max_bytes=100000))
+    assert adapter.lookup("prompt", "llm-config") is None
+    adapter.update("prompt", "llm-config", [ChatGeneration(message=AIMessage(content="hi"))])
+    cached = adapter.lookup("prompt", "llm-config")
+    assert cached[0].message.content == "hi"
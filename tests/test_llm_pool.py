@@ -0,0 +1,142 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from anyio import to_thread
+
+from app.services import ai_summary, llm
+from app.services.llm_pool import LLMPool, LLMPoolMonitor
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_least_outstanding_with_model_affinity():
+    pool = LLMPool(["http://a", "http://b", "http://c"], eject_after=3, eject_seconds=30)
+    first = [pool.acquire("llama3").url for _ in range(3)]
+    assert sorted(first) == ["http://a", "http://b", "http://c"]
+    for backend in pool.backends:
+        pool.release(backend, "llama3")
+
+    a, b, c = pool.backends
+    a.loaded = frozenset()
+    c.loaded = frozenset()
+    # b has the model loaded: it wins until it is COLD_MODEL_PENALTY calls busier than the others
+    assert pool.acquire("llama3") is b
+    assert pool.acquire("llama3") is b
+    assert pool.acquire("llama3") in (a, c)
+
+    a.models = frozenset({"mistral:latest"})
+    b.models = c.models = frozenset({"llama3:latest"})
+    assert pool.acquire("mistral") is a
+
+def test_failing_backend_is_ejected_and_readmitted():
+    clock = Clock()
+    pool = LLMPool(["http://a", "http://b"], eject_after=2, eject_seconds=30, clock=clock)
+    a, b = pool.backends
+    with pytest.raises(ConnectionError), pool.lease("llama3") as backend:
+        assert backend is a
+        raise ConnectionError("refused")
+    assert a.available(clock()) and a.outstanding == 0
+    a.outstanding += 1
+    pool.release(a, "llama3", ConnectionError("refused"))
+    assert not a.available(clock()) and a.last_error == "refused"
+    assert {pool.acquire("llama3").url for _ in range(4)} == {"http://b"}
+
+    clock.now += 31
+    assert a.available(clock()) and pool.acquire("llama3") is a
+
+    # with every backend ejected calls still go somewhere: the one due back first
+    pool._eject(b)
+    clock.now += 1
+    pool._eject(a)
+    assert pool.acquire("llama3") is b
+    assert pool.metrics()["backends"][0]["available"] is False
+
+@pytest.mark.asyncio
+async def test_health_checks_track_models_and_eject_dead_backends(fake_ollama):
+    hot = fake_ollama("hot", "--installed", "llama3", "--loaded", "llama3")
+    cold = fake_ollama("cold", "--installed", "llama3")
+    other = fake_ollama("other", "--installed", "mistral")
+    pool = LLMPool([hot, cold, other], eject_after=3, eject_seconds=30)
+
+    assert await pool.check_all() == [True, True, True]
+    metrics = {backend["url"]: backend for backend in pool.metrics()["backends"]}
+    assert metrics[hot]["loaded"] == ["llama3:latest"] and metrics[cold]["loaded"] == []
+    assert metrics[other]["models"] == ["mistral:latest"]
+    assert pool.acquire("llama3").url == hot
+    assert pool.acquire("mistral").url == other
+
+    fake_ollama.processes[1].terminate()
+    fake_ollama.processes[1].wait()
+    assert await pool.check_all() == [True, False, True]
+    assert not pool.metrics()["backends"][1]["available"]
+
+@pytest.mark.asyncio
+async def test_chat_calls_spread_across_backends(fake_ollama):
+    urls = [fake_ollama(name, "--installed", "llama3", "--loaded", "llama3", "--delay", "0.2") for name in "ab"]
+    pool = LLMPool(urls, eject_after=3, eject_seconds=30)
+
+    with patch.object(llm, "llm_pool", pool):
+        model = llm.get_chat_model()
+        replies = await to_thread.run_sync(
+            lambda: model.batch([f"chunk {i}" for i in range(8)], config={"max_concurrency": 4})
+        )
+
+    served_by = [llm.message_text(reply).split(":")[0] for reply in replies]
+    assert len(served_by) == 8 and abs(served_by.count("a") - served_by.count("b")) <= 2
+    assert all(backend.outstanding == 0 for backend in pool.backends)
+
+@pytest.mark.asyncio
+async def test_failing_backend_stops_receiving_calls(fake_ollama):
+    healthy = fake_ollama("healthy", "--installed", "llama3", "--loaded", "llama3")
+    broken = fake_ollama("broken", "--installed", "llama3", "--loaded", "llama3", "--fail")
+    pool = LLMPool([healthy, broken], eject_after=1, eject_seconds=30)
+    await pool.check_all()
+
+    with patch.object(llm, "llm_pool", pool):
+        model = llm.get_chat_model()
+        replies = []
+        for i in range(5):
+            try:
+                replies.append(llm.message_text(await to_thread.run_sync(model.invoke, f"prompt {i}")))
+            except Exception:
+                replies.append("error")
+
+    assert replies.count("error") == 1
+    assert all(reply.startswith("healthy:") for reply in replies if reply != "error")
+    broken_backend = pool.backends[1]
+    assert broken_backend.failures == 1 and not broken_backend.available(pool._clock())
+
+@pytest.mark.asyncio
+async def test_interactive_summaries_use_the_pool(fake_ollama):
+    url = fake_ollama("solo", "--installed", "llama3")
+    pool = LLMPool([url], eject_after=3, eject_seconds=30)
+    with patch.object(ai_summary, "llm_pool", pool):
+        assert await ai_summary.request_summary("Summarize Dune") == "solo: generated"
+    assert pool.backends[0].requests == 1 and pool.backends[0].loaded == frozenset({"llama3:latest"})
+
+@pytest.mark.asyncio
+async def test_monitor_survives_unexpected_check_errors(fake_ollama):
+    pool = LLMPool([fake_ollama("solo", "--installed", "llama3")], eject_after=3, eject_seconds=30)
+    calls = []
+    check_all = pool.check_all
+
+    async def flaky_check_all():
+        calls.append(1)
+        if len(calls) == 1:
+            raise AttributeError("'list' object has no attribute 'get'")
+        return await check_all()
+
+    monitor = LLMPoolMonitor(pool, interval=0.01)
+    with patch.object(pool, "check_all", flaky_check_all):
+        monitor.start()
+        for _ in range(100):
+            if len(calls) >= 3:
+                break
+            await asyncio.sleep(0.01)
+        await monitor.stop()
+    assert len(calls) >= 3 and pool.backends[0].models == frozenset({"llama3:latest"})
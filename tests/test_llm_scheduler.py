@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+from anyio import to_thread
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.llm_scheduler import LLMScheduler, Priority, SchedulerQueueFull
+
+def make_scheduler(max_concurrency=1, interactive=10, background=10):
+    return LLMScheduler(max_concurrency, {Priority.INTERACTIVE: interactive, Priority.BACKGROUND: background})
+
+@pytest.mark.asyncio
+async def test_interactive_calls_overtake_queued_background_calls():
+    scheduler = make_scheduler()
+    order = []
+    await scheduler.acquire(Priority.BACKGROUND)
+
+    async def call(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    tasks = [asyncio.create_task(call("bg-1", Priority.BACKGROUND)),
+             asyncio.create_task(call("bg-2", Priority.BACKGROUND))]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(call("interactive", Priority.INTERACTIVE)))
+    await asyncio.sleep(0)
+    assert scheduler.queue_depth() == 3
+
+    scheduler.release(Priority.BACKGROUND)
+    await asyncio.gather(*tasks)
+    assert order == ["interactive", "bg-1", "bg-2"]
+    assert scheduler.running == 0
+    assert scheduler.queue_depth() == 0
+
+@pytest.mark.asyncio
+async def test_concurrency_never_exceeds_cap():
+    scheduler = make_scheduler(max_concurrency=2)
+    active = []
+    peak = []
+
+    async def call():
+        async with scheduler.slot(Priority.BACKGROUND):
+            active.append(1)
+            peak.append(len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    await asyncio.gather(*(call() for _ in range(8)))
+    assert max(peak) == 2
+    assert scheduler.stats[Priority.BACKGROUND].admitted == 8
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_immediately():
+    scheduler = make_scheduler(interactive=1)
+    await scheduler.acquire(Priority.INTERACTIVE)
+    waiting = asyncio.create_task(scheduler.acquire(Priority.INTERACTIVE))
+    await asyncio.sleep(0)
+
+    with pytest.raises(SchedulerQueueFull) as exc:
+        await scheduler.acquire(Priority.INTERACTIVE)
+    assert exc.value.retry_after >= 1
+    assert scheduler.stats[Priority.INTERACTIVE].rejected == 1
+
+    scheduler.release(Priority.INTERACTIVE)
+    await waiting
+    scheduler.release(Priority.INTERACTIVE)
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    scheduler = make_scheduler()
+    await scheduler.acquire(Priority.BACKGROUND)
+    cancelled = asyncio.create_task(scheduler.acquire(Priority.BACKGROUND))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert scheduler.queue_depth() == 0
+
+    scheduler.release(Priority.BACKGROUND)
+    assert scheduler.running == 0
+    await asyncio.wait_for(scheduler.acquire(Priority.INTERACTIVE), timeout=1)
+    scheduler.release(Priority.INTERACTIVE)
+
+@pytest.mark.asyncio
+async def test_blocking_slot_from_worker_thread():
+    scheduler = make_scheduler()
+
+    def call():
+        with scheduler.blocking_slot(Priority.BACKGROUND):
+            return scheduler.running
+
+    assert await to_thread.run_sync(call) == 1
+    assert scheduler.running == 0
+
+def test_metrics_endpoint_requires_admin_token():
+    client = TestClient(app)
+    with patch("app.core.config.settings.ADMIN_TOKEN", "s3cret"):
+        assert client.get("/admin/llm/scheduler").status_code == 403
+        assert client.get("/admin/llm/scheduler", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        response = client.get("/admin/llm/scheduler", headers={"X-Admin-Token": "s3cret"})
+    assert response.status_code == 200
+    assert set(response.json()["classes"]) == {"interactive", "background"}
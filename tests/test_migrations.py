@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.migrations import MIGRATIONS, migration_status, run_migrations
+
+@pytest.mark.asyncio
+async def test_migrations_apply_once(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'fresh.db'}")
+    assert await run_migrations(engine) == [m.version for m in MIGRATIONS]
+    assert await run_migrations(engine) == []
+    assert all(applied for _, _, applied in await migration_status(engine))
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_migrations_upgrade_a_create_all_database(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'legacy.db'}")
+    async with engine.begin() as conn:
+        # the schema the app used to create with metadata.create_all, before versioning
+        await conn.execute(text(
+            "CREATE TABLE books (id INTEGER PRIMARY KEY, title VARCHAR, author VARCHAR, genre VARCHAR,"
+            " year_published INTEGER, summary VARCHAR)"
+        ))
+        await conn.execute(text(
+            "CREATE TABLE reviews (id INTEGER PRIMARY KEY, book_id INTEGER, user_id VARCHAR,"
+            " review_text VARCHAR, rating INTEGER)"
+        ))
+        await conn.execute(text(
+            "INSERT INTO books (title, author, genre, year_published, summary) VALUES"
+            " ('Done', 'A', 'G', 2000, 'A summary'), ('Running', 'B', 'G', 2001, 'Generating...')"
+        ))
+
+    await run_migrations(engine)
+
+    async with engine.connect() as conn:
+        statuses = (await conn.execute(text("SELECT title, summary_status FROM books ORDER BY id"))).all()
+        indexes = await conn.run_sync(lambda sync: {i["name"] for i in inspect(sync).get_indexes("reviews")})
+    assert statuses == [("Done", "completed"), ("Running", "pending")]
+    assert "ix_reviews_book_id" in indexes
+    await engine.dispose()
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import app as main_app
+from app.core.profiling import ProfileStore, ProfilingMiddleware
+from app.core.timing import StageTimer, TimingStats
+
+def busy_work():
+    return sum(i * i for i in range(20000))
+
+def make_client(store, sample_rate=0.0):
+    app = FastAPI()
+
+    @app.get("/work")
+    async def work():
+        timer = StageTimer("work", stats=TimingStats())
+        with timer.stage("compute"):
+            busy_work()
+        timer.finish()
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, store=store, sample_rate=sample_rate)
+    return TestClient(app)
+
+def test_stage_timer_aggregates_runs():
+    stats = TimingStats()
+    for outcome in ("ok", "failed"):
+        timer = StageTimer("summary", stats=stats, book_id=1)
+        with timer.stage("parsing"):
+            pass
+        with timer.stage("parsing"):
+            pass
+        record = timer.finish(outcome)
+    assert record["outcome"] == "failed" and record["book_id"] == 1
+    assert set(record["stages_ms"]) == {"parsing"}
+    snapshot = stats.snapshot()
+    assert snapshot["summary"]["parsing"]["count"] == 2
+    assert snapshot["summary"]["total"]["count"] == 2
+
+def test_admin_header_profiles_request(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=10)
+    client = make_client(store)
+    with patch("app.core.config.settings.ADMIN_TOKEN", "secret"):
+        assert "x-profile-id" not in client.get("/work", headers={"X-Profile": "1"}).headers
+        assert "x-profile-id" not in client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "nope"}).headers
+        response = client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"})
+
+    profile_id = response.headers["x-profile-id"]
+    [meta] = store.list()
+    assert meta["id"] == profile_id and meta["path"] == "/work" and meta["status"] == 200
+    assert meta["stages"][0]["operation"] == "work"
+    assert "busy_work" in store.text_report(profile_id)
+
+def test_sampling_profiles_without_header_and_keeps_newest(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    client = make_client(store, sample_rate=1.0)
+    for _ in range(3):
+        response = client.get("/work")
+        assert "x-profile-id" not in response.headers
+    profiles = store.list()
+    assert len(profiles) == 2 and {p["trigger"] for p in profiles} == {"sampled"}
+    assert len(list(tmp_path.iterdir())) == 4
+
+def test_profile_download_requires_admin(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=10)
+    client = make_client(store)
+    admin = TestClient(main_app)
+    with patch("app.core.config.settings.ADMIN_TOKEN", "secret"), \
+            patch("app.api.routes.admin.profile_store", store):
+        profile_id = client.get("/work", headers={"X-Profile": "1", "X-Admin-Token": "secret"}).headers["x-profile-id"]
+        assert admin.get(f"/admin/profiles/{profile_id}").status_code == 403
+        headers = {"X-Admin-Token": "secret"}
+        assert admin.get("/admin/profiles", headers=headers).json()[0]["id"] == profile_id
+        raw = admin.get(f"/admin/profiles/{profile_id}", headers=headers)
+        assert raw.status_code == 200 and raw.headers["content-type"] == "application/octet-stream"
+        text = admin.get(f"/admin/profiles/{profile_id}?format=text", headers=headers)
+        assert "busy_work" in text.text
+        assert admin.get("/admin/profiles/..%2Fetc", headers=headers).status_code == 404
+        assert admin.get("/admin/timings", headers=headers).status_code == 200
@@ -0,0 +1,173 @@
+"""EXPLAIN every query the read/write routes issue against a seeded, migrated database.
+
+Runs on a temporary SQLite file by default, where each filtered statement's EXPLAIN QUERY
+PLAN must match tests/query_plans_sqlite.json. Point QUERY_PLAN_DATABASE_URL at an empty
+scratch Postgres database (postgresql+asyncpg://...) to check Postgres plans as well; there,
+plan costs are compared with tests/query_plan_costs.json. UPDATE_QUERY_PLAN_BASELINE=1
+rewrites the baseline of the database in use. A run without a baseline entry for every
+filtered statement fails, so the regression check cannot be skipped by accident.
+"""
+import json
+import os
+import re
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+
+from app.main import app
+from app.db import models
+from app.db.database import get_db
+from app.db.migrations import run_migrations
+from app.api.routes import books, reviews
+from app.core.security import create_access_token, hash_password
+
+BASELINE_PATHS = {
+    "postgresql": Path(__file__).resolve().parent / "query_plan_costs.json",
+    "sqlite": Path(__file__).resolve().parent / "query_plans_sqlite.json",
+}
+COST_TOLERANCE = 1.5
+BOOKS = 5000
+REVIEWS = 20000
+
+ROUTE_CALLS = [
+    ("list books", "GET", "/books/", {}),
+    ("get book", "GET", "/books/17", {}),
+    ("get book conditional", "GET", "/books/17", {"headers": {"If-None-Match": '"stale"'}}),
+    ("summary status", "GET", "/books/17/summary/status", {}),
+    ("summary", "GET", "/books/17/summary", {}),
+    ("list reviews", "GET", "/books/17/reviews", {}),
+    ("add review", "POST", "/books/17/reviews", {"json": {"review_text": "Solid", "rating": 4}}),
+    ("recommendations", "GET", "/recommendations/recommendations", {}),
+    ("login", "POST", "/auth/token", {"data": {"username": "reader", "password": "secret"}}),
+]
+
+@pytest_asyncio.fixture
+async def plan_engine(tmp_path):
+    url = os.environ.get("QUERY_PLAN_DATABASE_URL") or f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}"
+    engine = create_async_engine(url)
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.User), [{
+            "username": "reader", "password": hash_password("secret"),
+            "genre": "history", "author": "author 7", "min_year": 1950, "max_year": 2000,
+        }])
+        await conn.execute(insert(models.Book), [{
+            "title": f"Book {i}", "author": f"Author {i % 400}", "genre": ("History", "Fiction", "Science")[i % 3],
+            "year_published": 1900 + i % 120, "summary": "Summary", "summary_status": "completed",
+            "version": 1, "review_version": 0,
+        } for i in range(BOOKS)])
+        await conn.execute(insert(models.Review), [{
+            "book_id": 1 + i % BOOKS, "user_id": "reader", "review_text": "Fine", "rating": i % 5,
+        } for i in range(REVIEWS)])
+        await conn.execute(text("ANALYZE"))
+    yield engine
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.run_sync(models.Base.metadata.drop_all)
+            await conn.execute(text("DROP TABLE IF EXISTS schema_migrations"))
+    await engine.dispose()
+
+async def capture_route_queries(engine) -> dict:
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    captured, current = {}, []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        current.append((statement, parameters))
+
+    overrides = {get_db: override_get_db, books.get_db: override_get_db, reviews.get_db: override_get_db}
+    app.dependency_overrides.update(overrides)
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    token = create_access_token({"sub": "reader"})
+    try:
+        with patch("app.api.routes.books.generate_summary", return_value="summary"), \
+                patch("app.core.config.settings.AI_ENABLED", False):
+            async with AsyncClient(app=app, base_url="http://plans") as client: # pylint: disable=unexpected-keyword-arg
+                for label, method, path, kwargs in ROUTE_CALLS:
+                    current.clear()
+                    headers = {"Authorization": f"Bearer {token}", **kwargs.get("headers", {})}
+                    response = await client.request(
+                        method, path, **{**kwargs, "headers": headers}
+                    )
+                    assert response.status_code < 400, (label, response.text)
+                    captured[label] = list(current)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+        for dependency in overrides:
+            app.dependency_overrides.pop(dependency, None)
+    return captured
+
+def needs_index(statement: str) -> bool:
+    # full listings and whole-catalog aggregates scan by design; anything filtered must not
+    verb = statement.lstrip().split(None, 1)[0].upper()
+    return verb in {"SELECT", "UPDATE", "DELETE"} and re.search(r"\bWHERE\b", statement, re.IGNORECASE) is not None
+
+def sqlite_seq_scans(plan_rows) -> list:
+    details = [row[-1] for row in plan_rows]
+    return [d for d in details if d.startswith("SCAN ") and "USING" not in d]
+
+def postgres_nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from postgres_nodes(child)
+
+@pytest.mark.asyncio
+async def test_route_queries_use_indexes_and_keep_their_cost(plan_engine):
+    captured = await capture_route_queries(plan_engine)
+    postgres = plan_engine.dialect.name == "postgresql"
+    baseline_path = BASELINE_PATHS[plan_engine.dialect.name]
+    updating = os.environ.get("UPDATE_QUERY_PLAN_BASELINE") == "1"
+    if not updating and not baseline_path.exists():
+        pytest.fail(f"{baseline_path.name} is missing; generate it with UPDATE_QUERY_PLAN_BASELINE=1")
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    # Postgres plans are tracked by total cost, SQLite plans (which have no costs) by their steps
+    plans, problems = {}, []
+
+    async with plan_engine.connect() as conn:
+        if postgres:
+            # with seq scans priced out, one can only remain where no usable index exists
+            await conn.execute(text("SET enable_seqscan = off"))
+        for label, statements in captured.items():
+            for position, (statement, parameters) in enumerate(statements):
+                if not needs_index(statement):
+                    continue
+                key = f"{label}#{position}"
+                if postgres:
+                    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                    plan = result.scalar()[0]["Plan"]
+                    scans = [n.get("Relation Name") for n in postgres_nodes(plan) if n["Node Type"] == "Seq Scan"]
+                    plans[key] = plan["Total Cost"]
+                    regressed = key in baseline and plans[key] > baseline[key] * COST_TOLERANCE + 1
+                else:
+                    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                    rows = result.all()
+                    scans = sqlite_seq_scans(rows)
+                    plans[key] = [row[-1] for row in rows]
+                    regressed = key in baseline and plans[key] != baseline[key]
+                if scans:
+                    problems.append(f"{key}: sequential scan {scans} in {statement!r}")
+                if updating:
+                    continue
+                if key not in baseline:
+                    problems.append(f"{key}: no baseline in {baseline_path.name} for {statement!r}")
+                elif regressed:
+                    problems.append(f"{key}: plan {plans[key]} vs baseline {baseline[key]} for {statement!r}")
+
+    if updating:
+        baseline_path.write_text(json.dumps(plans, indent=2, sort_keys=True) + "\n")
+    assert not problems, "\n".join(problems)
+
+@pytest.mark.asyncio
+async def test_filtered_statements_were_captured(plan_engine):
+    captured = await capture_route_queries(plan_engine)
+    assert set(captured) == {label for label, *_ in ROUTE_CALLS}
+    assert any(needs_index(statement) for statement, _ in captured["list reviews"])
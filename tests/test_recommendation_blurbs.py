@@ -0,0 +1,109 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.api.routes import recommendations
+from app.services.llm_cache import LLMResponseCache
+from app.services.recommendation_blurbs import BlurbStore, blurb_key
+
+def test_blurb_key_ignores_case_and_title_order():
+    first = blurb_key("Fantasy ", "J.K. Rowling", 1990, 2020, ["B", "A", "A"])
+    second = blurb_key("fantasy", "j.k. rowling", 1990, 2020, ["A", "B"])
+    assert first == second
+    assert first != blurb_key("fantasy", "j.k. rowling", 1991, 2020, ["A", "B"])
+
+@pytest.mark.asyncio
+async def test_fast_generation_is_returned_and_cached():
+    store = BlurbStore()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        return "Read these!"
+
+    assert await store.get("k", generate, timeout=1) == "Read these!"
+    assert await store.get("k", generate, timeout=1) == "Read these!"
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_slow_generation_finishes_in_background():
+    store = BlurbStore()
+    release = asyncio.Event()
+
+    async def generate():
+        await release.wait()
+        return "Worth the wait."
+
+    assert await store.get("k", generate, timeout=0.01) is None
+    assert store.is_pending("k")
+
+    release.set()
+    await asyncio.sleep(0.01)
+    assert not store.is_pending("k")
+    assert store.get_cached("k") == "Worth the wait."
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_generation():
+    store = BlurbStore()
+    calls = []
+
+    async def generate():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "Shared."
+
+    results = await asyncio.gather(*(store.get("k", generate, timeout=1) for _ in range(5)))
+    assert results == ["Shared."] * 5
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_failed_generation_is_logged_and_not_cached(capsys):
+    store = BlurbStore()
+
+    async def generate():
+        raise RuntimeError("ollama down")
+
+    with pytest.raises(RuntimeError, match="ollama down"):
+        await store.get("k", generate, timeout=1)
+    await asyncio.sleep(0)
+    assert "Recommendation blurb generation failed: RuntimeError('ollama down')" in capsys.readouterr().out
+    assert store.get_cached("k") is None
+    assert not store.is_pending("k")
+
+def test_cache_is_bounded():
+    store = BlurbStore(max_entries=2)
+    for key in ("a", "b", "c"):
+        store.put(key, key)
+    assert store.get_cached("a") is None
+    assert store.get_cached("c") == "c"
+
+def test_route_returns_ranked_books_when_the_blurb_fails(tmp_path):
+    pref = MagicMock(genre="Sci-Fi", author=None, min_year=None, max_year=None)
+    book = MagicMock(title="Dune", author="Frank Herbert", genre="Sci-Fi", year_published=1965, summary="Spice.")
+
+    async def execute(query):
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = pref
+        result.scalars.return_value.all.return_value = [book]
+        return result
+
+    model = MagicMock()
+    model.invoke.side_effect = ConnectionError("ollama down")
+    uncached = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_bytes=10**6, enabled=False)
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[recommendations.get_current_user] = lambda: "reader"
+    app.dependency_overrides[recommendations.get_db] = lambda: MagicMock(execute=execute)
+    try:
+        with patch.object(recommendations, "blurbs", BlurbStore()), \
+                patch.object(recommendations, "get_chat_model", return_value=model), \
+                patch.object(recommendations, "llm_cache", uncached):
+            response = TestClient(app).get("/recommendations/recommendations")
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
+    assert response.status_code == 200
+    assert response.json()["recommendation_summary"] is None
+    assert [b["title"] for b in response.json()["books"]] == ["Dune"]
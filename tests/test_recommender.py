@@ -0,0 +1,97 @@
+import random
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import func, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+
+from app.db import models
+from app.db.migrations import run_migrations
+from app.services import recommender
+
+GENRES = ["Science Fiction", "Fiction", "History", "Poetry", ""]
+AUTHORS = ["Ursula K. Le Guin", "Frank Herbert", "Mary Beard", "Le Carré"]
+
+def make_books(rng, count):
+    return [
+        SimpleNamespace(id=i + 1, genre=rng.choice(GENRES), author=rng.choice(AUTHORS),
+                        year_published=rng.choice([None, 0, *range(1950, 2021, 7)]))
+        for i in range(count)
+    ]
+
+def make_users(rng, count):
+    return [
+        SimpleNamespace(username=f"user{i:03d}", genre=rng.choice([None, "", "fiction", "HIST", "sci", "drama"]),
+                        author=rng.choice([None, "le", "herbert", "nobody"]),
+                        min_year=rng.choice([None, 0, 1960, 1990]), max_year=rng.choice([None, 1980, 2010]))
+        for i in range(count)
+    ]
+
+def expected_top_k(user, books, k):
+    scored = [(recommender.score_book(user, book), book) for book in books]
+    matched = [(score, book) for score, book in scored if score > 0]
+    matched.sort(key=lambda pair: recommender.rating(pair[0]), reverse=True)
+    return [(user.username, book.id, rank, recommender.rating(score), recommender.confidence(score))
+            for rank, (score, book) in enumerate(matched[:k], start=1)]
+
+def test_batch_matches_per_request_scoring_across_chunks():
+    rng = random.Random(7)
+    books, users = make_books(rng, 120), make_users(rng, 60)
+    book_matrix = recommender.BookMatrix.from_rows([(b.id, b.genre, b.author, b.year_published) for b in books])
+    user_matrix = recommender.UserMatrix.from_rows(
+        [(u.username, u.genre, u.author, u.min_year, u.max_year) for u in users]
+    )
+    # a budget this small forces many chunks of a few users each
+    chunks = list(recommender.recommend_all(user_matrix, book_matrix, k=5, memory_bytes=120 * 40 * 7))
+    assert len(chunks) > 5
+
+    actual = [(r["username"], r["book_id"], r["rank"], r["rating"], r["confidence"]) for _, rows in chunks for r in rows]
+    expected = [row for user in users for row in expected_top_k(user, books, 5)]
+    assert actual == expected
+
+def test_substring_tables_count_toward_the_memory_budget():
+    rows = [(i, "Fiction", f"Author {i}", 2000) for i in range(1000)]
+    few_authors = recommender.BookMatrix.from_rows([(i, genre, "Author", year) for i, genre, _, year in rows])
+    many_authors = recommender.BookMatrix.from_rows(rows)
+    budget = 10 * 1024 * 1024
+    assert recommender.chunk_size_for(many_authors, budget) < recommender.chunk_size_for(few_authors, budget)
+
+    table, codes = recommender.chunk_table(["le", "zz", "herbert"], np.array([2, 3, 2]), ["frank herbert", "le guin"])
+    assert table.tolist() == [[True, False, False], [False, False, False]]
+    assert codes.tolist() == [0, 1, 0]
+
+def test_empty_catalog_and_users():
+    books = recommender.BookMatrix.from_rows([])
+    users = recommender.UserMatrix.from_rows([("alice", "fiction", None, None, None)])
+    assert list(recommender.recommend_all(users, books, k=3, memory_bytes=1024)) == [(["alice"], [])]
+
+@pytest.mark.asyncio
+async def test_run_batch_replaces_stored_rows(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'recs.db'}")
+    await run_migrations(engine)
+    rng = random.Random(3)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.User), [
+            {"username": u.username, "password": "x", "genre": u.genre, "author": u.author,
+             "min_year": u.min_year, "max_year": u.max_year} for u in make_users(rng, 20)
+        ])
+        await conn.execute(insert(models.Book), [
+            {"title": f"Book {b.id}", "author": b.author, "genre": b.genre, "year_published": b.year_published}
+            for b in make_books(rng, 50)
+        ])
+    session_factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    users, stored = await recommender.run_batch(session_factory, k=3, memory_bytes=4096)
+    assert users == 20 and 0 < stored <= 60
+    await recommender.run_batch(session_factory, k=3, memory_bytes=4096)
+    async with session_factory() as db:
+        count = (await db.execute(select(func.count(models.UserRecommendation.id)))).scalar()
+        ranks = (await db.execute(
+            select(models.UserRecommendation.rank).where(models.UserRecommendation.username == "user000")
+            .order_by(models.UserRecommendation.rank)
+        )).scalars().all()
+    assert count == stored
+    assert ranks == list(range(1, len(ranks) + 1))
+    await engine.dispose()
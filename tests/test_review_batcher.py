@@ -0,0 +1,145 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.future import select
+
+from app.main import app
+from app.db import models
+from app.db.migrations import run_migrations
+from app.api.routes import reviews
+from app.core.config import settings
+from app.core.security import get_current_user
+from app.services.review_batcher import BookNotFound, ReviewBatcher
+
+@pytest_asyncio.fixture
+async def database(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'reviews.db'}")
+    await run_migrations(engine)
+    async with engine.begin() as conn:
+        await conn.execute(insert(models.Book), [
+            {"title": "Dune", "author": "Frank Herbert", "genre": "Sci-Fi", "year_published": 1965},
+            {"title": "Emma", "author": "Jane Austen", "genre": "Romance", "year_published": 1815},
+        ])
+    yield engine, async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_concurrent_reviews_share_one_transaction(database):
+    engine, session_factory = database
+    commits = []
+    event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+    batcher = ReviewBatcher(session_factory, max_batch=100, flush_interval=0.05)
+
+    rows = await asyncio.gather(*(
+        batcher.submit(1 + i % 2, f"user{i}", f"review {i}", 1 + i % 5) for i in range(20)
+    ))
+
+    assert len(commits) == 1
+    assert len({row["id"] for row in rows}) == 20
+    assert [row["user_id"] for row in rows] == [f"user{i}" for i in range(20)]
+    async with session_factory() as db:
+        stored = dict((await db.execute(select(models.Review.id, models.Review.user_id))).all())
+        versions = dict((await db.execute(select(models.Book.id, models.Book.review_version))).all())
+    assert all(stored[row["id"]] == row["user_id"] for row in rows)
+    assert versions == {1: 10, 2: 10}
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_without_waiting(database):
+    _, session_factory = database
+    batcher = ReviewBatcher(session_factory, max_batch=3, flush_interval=60)
+    rows = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(1, f"user{i}", "ok", 4) for i in range(3))), timeout=5
+    )
+    assert len(rows) == 3
+
+@pytest.mark.asyncio
+async def test_each_review_gets_its_own_error(database):
+    _, session_factory = database
+    batcher = ReviewBatcher(session_factory, max_batch=100, flush_interval=0.01)
+
+    results = await asyncio.gather(
+        batcher.submit(1, "alice", "fine", 5),
+        batcher.submit(99, "bob", "no such book", 3),
+        batcher.submit(2, "carol", {"not": "text"}, 4),  # cannot be bound, which fails the whole batch
+        batcher.submit(2, "dave", "also fine", 2),
+        return_exceptions=True,
+    )
+
+    assert results[0]["user_id"] == "alice" and results[3]["user_id"] == "dave"
+    assert isinstance(results[1], BookNotFound)
+    assert isinstance(results[2], Exception) and not isinstance(results[2], BookNotFound)
+    async with session_factory() as db:
+        stored = (await db.execute(select(models.Review.user_id).order_by(models.Review.id))).scalars().all()
+    assert stored == ["alice", "dave"]
+
+@pytest.mark.asyncio
+async def test_failed_insert_fails_every_submitter(database):
+    _, session_factory = database
+    batcher = ReviewBatcher(session_factory, max_batch=100, flush_interval=0.01)
+
+    async def failing_write(batch):
+        raise OSError("disk full")
+
+    with patch.object(batcher, "_write", failing_write):
+        results = await asyncio.wait_for(asyncio.gather(
+            *(batcher.submit(1, f"user{i}", "ok", 4) for i in range(3)), return_exceptions=True
+        ), timeout=5)
+    assert all(isinstance(result, OSError) for result in results)
+
+    # an error outside the per-row fallback resolves every queued future as well
+    async def broken_flush(batch):
+        raise RuntimeError("bug")
+
+    with patch.object(batcher, "_flush", broken_flush):
+        results = await asyncio.wait_for(asyncio.gather(
+            *(batcher.submit(1, f"user{i}", "ok", 4) for i in range(3)), return_exceptions=True
+        ), timeout=5)
+    assert [str(result) for result in results] == ["bug"] * 3
+    assert await batcher.submit(2, "alice", "still works", 5)
+
+@pytest.mark.asyncio
+async def test_stop_fails_queued_reviews(database):
+    _, session_factory = database
+    batcher = ReviewBatcher(session_factory, max_batch=100, flush_interval=60)
+    submitted = [asyncio.ensure_future(batcher.submit(1, f"user{i}", "ok", 4)) for i in range(3)]
+    await asyncio.sleep(0)
+    await batcher.stop()
+    results = await asyncio.wait_for(asyncio.gather(*submitted, return_exceptions=True), timeout=5)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    async with session_factory() as db:
+        assert (await db.execute(select(models.Review.id))).first() is None
+
+@pytest.mark.asyncio
+async def test_route_uses_group_commit(database):
+    _, session_factory = database
+    batcher = ReviewBatcher(session_factory, max_batch=100, flush_interval=0.01)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    overrides = dict(app.dependency_overrides)  # restored as-is: other modules install their own
+    app.dependency_overrides[reviews.get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: "mockuser"
+    try:
+        with patch.object(settings, "REVIEW_GROUP_COMMIT", True), patch.object(reviews, "review_batcher", batcher):
+            async with AsyncClient(app=app, base_url="http://test") as client: # pylint: disable=unexpected-keyword-arg
+                created, missing = await asyncio.gather(
+                    client.post("/books/1/reviews", json={"review_text": "Great", "rating": 5}),
+                    client.post("/books/42/reviews", json={"review_text": "Lost", "rating": 1}),
+                )
+                assert created.status_code == 200
+                assert created.json() == {
+                    "id": 1, "review_text": "Great", "rating": 5, "user_id": "mockuser", "book_id": 1,
+                }
+                assert missing.status_code == 404
+                listed = await client.get("/books/1/reviews")
+                assert [review["id"] for review in listed.json()] == [1]
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
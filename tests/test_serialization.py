@@ -0,0 +1,68 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import patch
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from app.main import app
+from app.db import models
+from app.api.routes import books, reviews
+from app.core.security import get_current_user
+from app.core.serialization import RowSerializer
+from app.schemas.book import BookOut
+
+engine = create_async_engine("sqlite+aiosqlite:///:memory:", future=True)
+TestingSessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+@pytest_asyncio.fixture
+async def client():
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.create_all)
+    async with TestingSessionLocal() as db:
+        db.add_all([
+            models.Book(title=f"Book {i}", author="Author", genre="Fiction", year_published=2000 + i, summary="s")
+            for i in range(5)
+        ])
+        db.add(models.Review(book_id=1, user_id="mockuser", review_text="Good", rating=4))
+        await db.commit()
+
+    async def override_get_db():
+        async with TestingSessionLocal() as session:
+            yield session
+
+    app.dependency_overrides[books.get_db] = override_get_db
+    app.dependency_overrides[reviews.get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: "mockuser"
+    async with AsyncClient(app=app, base_url="http://test") as ac: # pylint: disable=unexpected-keyword-arg
+        yield ac
+    app.dependency_overrides.pop(books.get_db)
+    app.dependency_overrides.pop(reviews.get_db)
+    async with engine.begin() as conn:
+        await conn.run_sync(models.Base.metadata.drop_all)
+
+def test_row_serializer_follows_schema_field_order():
+    serializer = RowSerializer(BookOut)
+    assert serializer.fields == ("title", "author", "genre", "year_published", "summary", "id")
+    payload = serializer.dumps([("T", "A", "G", 1999, None, 7, "ignored-extra-column")])
+    assert payload == b'[{"title":"T","author":"A","genre":"G","year_published":1999,"summary":null,"id":7}]'
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/books/", "/books/1/reviews"])
+async def test_fast_path_matches_default_path(client, path):
+    slow = await client.get(path)
+    with patch("app.core.config.settings.FAST_JSON_LISTS", True):
+        fast = await client.get(path)
+    assert slow.status_code == fast.status_code == 200
+    assert fast.json() == slow.json()
+    assert fast.headers["etag"] == slow.headers["etag"]
+    assert fast.headers["content-type"] == "application/json"
+
+def test_openapi_schema_is_unchanged_by_fast_path():
+    app.openapi_schema = None
+    default_schema = app.openapi()
+    app.openapi_schema = None
+    with patch("app.core.config.settings.FAST_JSON_LISTS", True):
+        fast_schema = app.openapi()
+    app.openapi_schema = None
+    assert default_schema == fast_schema
+    ref = default_schema["paths"]["/books/"]["get"]["responses"]["200"]["content"]["application/json"]["schema"]
+    assert ref["items"]["$ref"].endswith("/BookOut")
@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.database import get_db
+from app.api.routes import books
+from app.core.security import get_current_user
+from app.services.summary_progress import SummaryProgressTracker, summary_progress
+
+client = TestClient(app)
+
+@pytest.mark.asyncio
+async def test_update_bumps_version():
+    tracker = SummaryProgressTracker()
+    first = tracker.update(1, status="processing", stage="loading")
+    second = tracker.update(1, chunks_done=3, chunks_total=10)
+    assert second.version == first.version + 1
+    assert second.stage == "loading"
+    assert second.as_dict()["summary_ready"] is False
+
+@pytest.mark.asyncio
+async def test_wait_for_change_wakes_on_update():
+    tracker = SummaryProgressTracker()
+    state = tracker.update(1, status="processing")
+
+    async def finish():
+        await asyncio.sleep(0.05)
+        tracker.update(1, status="completed", stage="done")
+
+    asyncio.create_task(finish())
+    changed = await tracker.wait_for_change(1, state.version, timeout=2)
+    assert changed.status == "completed"
+    assert changed.finished
+
+@pytest.mark.asyncio
+async def test_wait_for_change_times_out():
+    tracker = SummaryProgressTracker()
+    state = tracker.update(1, status="processing")
+    unchanged = await tracker.wait_for_change(1, state.version, timeout=0.05)
+    assert unchanged.version == state.version
+
+@pytest.mark.asyncio
+async def test_subscribe_stops_after_terminal_state():
+    tracker = SummaryProgressTracker()
+    tracker.update(1, status="processing")
+
+    async def drive():
+        await asyncio.sleep(0.02)
+        tracker.update(1, chunks_done=1, chunks_total=2)
+        await asyncio.sleep(0.02)
+        tracker.update(1, status="failed", error="boom")
+
+    asyncio.create_task(drive())
+    seen = [state async for state in tracker.subscribe(1, heartbeat=1)]
+    assert [s.status for s in seen][-1] == "failed"
+    assert seen[-1].error == "boom"
+
+def test_evicts_oldest_entries():
+    tracker = SummaryProgressTracker(max_entries=2)
+    tracker.update(1)
+    tracker.update(2)
+    tracker.update(3)
+    assert tracker.get(1) is None
+    assert tracker.get(3) is not None
+
+@pytest.mark.asyncio
+async def test_long_poll_falls_back_to_database_when_entry_is_evicted():
+    tracker = SummaryProgressTracker(max_entries=1)
+    tracker.update(1, status="processing", stage="summarizing")
+    book = MagicMock(id=1, summary_status="completed", summary="Done.")
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(scalar_one_or_none=MagicMock(return_value=book)))
+
+    async def evict():
+        await asyncio.sleep(0.05)
+        tracker.update(2)
+
+    with patch.object(books, "summary_progress", tracker):
+        state, _ = await asyncio.gather(books.wait_for_summary_progress(db, 1, since=1, wait=5), evict())
+    assert state.status == "completed" and state.finished
+
+def test_summary_status_reports_progress_from_tracker():
+    overrides = dict(app.dependency_overrides)  # restored as-is: other modules install their own
+    app.dependency_overrides[get_current_user] = lambda: "mockuser"
+    app.dependency_overrides[books.get_db] = lambda: MagicMock()
+    try:
+        summary_progress.update(4242, status="processing", stage="summarizing", chunks_done=2, chunks_total=5)
+
+        response = client.get("/books/4242/summary/status")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "processing"
+        assert data["chunks_done"] == 2
+        assert data["chunks_total"] == 5
+        assert data["summary_ready"] is False
+
+        summary_progress.update(4242, status="completed", stage="done")
+        response = client.get("/books/4242/summary/events")
+        assert response.status_code == 200
+        assert "event: completed" in response.text
+    finally:
+        app.dependency_overrides.clear()
+        app.dependency_overrides.update(overrides)
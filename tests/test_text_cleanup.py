@@ -0,0 +1,76 @@
+import random
+from app.services.text_cleanup import is_noise_line, near_duplicate_indices, strip_boilerplate
+
+def make_paragraph(seed: int, words: int = 120) -> str:
+    rng = random.Random(seed)
+    vocabulary = ["river", "castle", "storm", "letter", "garden", "promise", "winter", "market", "silence",
+                  "captain", "harbor", "lantern", "orchard", "secret", "journey", "mirror", "valley", "echo"]
+    return " ".join(rng.choice(vocabulary) for _ in range(words))
+
+def test_noise_lines():
+    assert is_noise_line("42")
+    assert is_noise_line("Page 7 of 300")
+    assert is_noise_line("xiv", front_matter=True)
+    assert is_noise_line("Chapter 3: The Storm ........ 57")
+    assert is_noise_line("© 2021 Example Press. All rights reserved.", front_matter=True)
+    assert is_noise_line("ISBN 978-0-00-000000-0", front_matter=True)
+    assert not is_noise_line("IV")
+    assert not is_noise_line("The letter was marked © 1921 and all rights reserved, she noticed.")
+    assert not is_noise_line("Copyright law changed in 1976 and the captain knew it.")
+    assert not is_noise_line("mix the flour")
+
+def test_strip_boilerplate_removes_running_headers_and_footers():
+    pages = [f"THE LONG JOURNEY — Chapter {i}\n{make_paragraph(i)}\nPage {i}" for i in range(1, 9)]
+    cleaned, removed = strip_boilerplate(pages)
+    assert removed == 16
+    for i, page in enumerate(cleaned, start=1):
+        assert page == make_paragraph(i)
+
+def test_strip_boilerplate_keeps_lines_on_few_pages():
+    pages = ["Shared line\nunique a", "Shared line\nunique b", "other\nunique c", "other\nunique d"]
+    cleaned, removed = strip_boilerplate(pages)
+    assert removed == 0
+    assert cleaned == pages
+
+def test_front_matter_is_cleaned_but_body_headings_and_prose_are_kept():
+    prose = "The letter was marked © 1921 and all rights reserved, which puzzled the captain."
+    pages = [
+        "The Long Journey\n© 2021 Example Press. All rights reserved.\nISBN 978-0-00-000000-0\nii",
+        "Contents\nThe Harbor ........ 1\nThe Storm ........ 9\niii",
+        f"I\n{make_paragraph(1)}",
+        f"IV\n{make_paragraph(2)}\n{prose}",
+    ]
+    cleaned, removed = strip_boilerplate(pages)
+    assert cleaned[0] == "The Long Journey" and cleaned[1] == "Contents"
+    assert cleaned[2:] == pages[2:]
+    assert removed == 6
+
+def test_near_duplicates_are_detected_once():
+    base = make_paragraph(1, 200)
+    tweaked = base.replace("river", "rivers", 1)
+    texts = [base, make_paragraph(2, 200), tweaked, base, "   "]
+    assert near_duplicate_indices(texts) == {2, 3, 4}
+
+def test_distinct_chunks_are_kept():
+    texts = [make_paragraph(seed, 150) for seed in range(30)]
+    assert near_duplicate_indices(texts) == set()
+
+def test_prepare_documents_reports_removed_tokens():
+    from app.services.summarizer import prepare_documents
+
+    repeated = make_paragraph(99, 150)
+    pages = [f"RUNNING HEADER\n{make_paragraph(i, 150)}\n{repeated}\n{i}" for i in range(6)]
+    docs, stats = prepare_documents(pages)
+    assert stats.lines_removed == 12
+    assert stats.chunks_removed > 0
+    assert 0 < stats.tokens_removed < stats.tokens_before
+    assert all("RUNNING HEADER" not in doc.page_content for doc in docs)
+
+def test_clean_book_reports_no_removed_tokens():
+    from app.services.summarizer import prepare_documents
+
+    pages = [make_paragraph(i, 400) for i in range(5)]
+    docs, stats = prepare_documents(pages)
+    assert len(docs) > len(pages)  # split with overlap
+    assert stats.lines_removed == 0 and stats.chunks_removed == 0
+    assert stats.tokens_removed == 0